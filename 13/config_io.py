@@ -1,46 +1,103 @@
 # config_io.py
+import hashlib
 import json
 import os
+import threading
 from glob import glob
 
 class ConfigError(Exception):
     pass
 
 try:
-    from jsonschema import validate
-    from jsonschema.exceptions import ValidationError
+    from jsonschema import validators
+    from jsonschema.exceptions import SchemaError, ValidationError, best_match
     _HAS_JSONSCHEMA = True
 except Exception:
     _HAS_JSONSCHEMA = False
     ValidationError = Exception  # fallback type alias
+    SchemaError = Exception
+
+
+# compiled validators keyed by sha256 of the stage schema
+_VALIDATORS = {}
+# path -> {"stamp": (mtime_ns, size), "sha": hex, "doc": dict, "schema_sha": hex}
+_FILE_CACHE = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def _sha(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
 
 
 def _load_json(path: str) -> dict:
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
+def _validator(stage_schema: dict):
+    key = _sha(json.dumps(stage_schema, sort_keys=True).encode("utf-8"))
+    v = _VALIDATORS.get(key)
+    if v is None:
+        cls = validators.validator_for(stage_schema)
+        cls.check_schema(stage_schema)
+        v = _VALIDATORS[key] = cls(stage_schema)
+    return v
+
 def _validate(stage_key: str, doc: dict, schema_root: dict):
     if not _HAS_JSONSCHEMA:
         # soft warning: validator not installed, skip strict check
         return
+    # schema.json nests stages as a json-schema object: properties.stages.properties
+    stages = schema_root.get("stages") or schema_root.get("properties", {}).get("stages", {}).get("properties", {})
     try:
-        stage_schema = schema_root["stages"][stage_key]
+        stage_schema = stages[stage_key]
     except KeyError:
         raise ConfigError(f"schema missing for {stage_key}")
+    # same error choice as jsonschema.validate, minus the per-call validator build
     try:
-        validate(instance=doc, schema=stage_schema)
-    except ValidationError as e:
+        v = _validator(stage_schema)
+    except SchemaError as e:
+        raise ConfigError(f"schema for {stage_key} invalid: {e.message}") from e
+    e = best_match(v.iter_errors(doc))
+    if e is not None:
         loc = " → ".join(str(p) for p in e.path) if getattr(e, "path", None) else ""
         msg = f"{stage_key} invalid: {e.message}"
         if loc:
             msg += f" at {loc}"
         raise ConfigError(msg) from e
 
-def load_master_docs(config_dir: str) -> dict:
+def _read_cached(path: str):
     """
-    loads stage_01.json ... stage_13.json and validates each against schema.json.
-    returns a dict keyed by 'stage_XX'.
+    returns (entry, changed). the file is only opened when its mtime/size moved,
+    and only re-parsed when its content hash moved.
     """
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    entry = _FILE_CACHE.get(path)
+    if entry is not None and entry["stamp"] == stamp:
+        return entry, False
+    with open(path, "rb") as f:
+        raw = f.read()
+    sha = _sha(raw)
+    if entry is not None and entry["sha"] == sha:
+        entry["stamp"] = stamp
+        return entry, False
+    try:
+        doc = json.loads(raw.decode("utf-8"))
+    except ValueError as e:
+        raise ConfigError(f"invalid json in {os.path.basename(path)}: {e}") from e
+    return {"stamp": stamp, "sha": sha, "doc": doc, "schema_sha": None}, True
+
+def _load(config_dir: str):
+    try:
+        return _load_set(config_dir)
+    except ConfigError:
+        raise
+    except Exception as e:
+        # unreadable files, a schema of the wrong shape, a stage that is not an
+        # object: all of it is a bad config set, never a crash of the caller
+        raise ConfigError(f"cannot load {config_dir}: {type(e).__name__}: {e}") from e
+
+def _load_set(config_dir: str):
     if not os.path.isdir(config_dir):
         raise ConfigError(f"config dir not found: {config_dir}")
 
@@ -48,24 +105,122 @@ def load_master_docs(config_dir: str) -> dict:
     schema_path = os.path.join(config_dir, "schema.json")
     if not os.path.isfile(schema_path):
         raise ConfigError(f"schema.json not found in {config_dir}")
-    schema_root = _load_json(schema_path)
 
-    docs = {}
-    for i in range(1, 14):
-        stage_key = f"stage_{i:02d}"
-        fname = f"{stage_key}.json"
-        path = os.path.join(config_dir, fname)
-        if not os.path.isfile(path):
-            raise ConfigError(f"missing config: {path}")
-        doc = _load_json(path)
+    with _CACHE_LOCK:
+        schema, _ = _read_cached(schema_path)
+        _FILE_CACHE[schema_path] = schema
+        schema_root = schema["doc"]
+
+        docs = {}
+        fresh = {}
+        version = hashlib.sha256(schema["sha"].encode())
+        for i in range(1, 14):
+            stage_key = f"stage_{i:02d}"
+            fname = f"{stage_key}.json"
+            path = os.path.join(config_dir, fname)
+            if not os.path.isfile(path):
+                raise ConfigError(f"missing config: {path}")
+            entry, _ = _read_cached(path)
+            doc = entry["doc"]
+
+            # quick top-level sanity
+            if "name" not in doc:
+                raise ConfigError(f"'name' missing in {fname}")
+
+            # jsonschema validation, once per (content, schema) pair
+            if entry["schema_sha"] != schema["sha"]:
+                _validate(stage_key, doc, schema_root)
+                entry["schema_sha"] = schema["sha"]
+
+            fresh[path] = entry
+            docs[stage_key] = doc
+            version.update(entry["sha"].encode())
+
+        # only commit once the whole set is valid, so a bad push is retried
+        _FILE_CACHE.update(fresh)
+    return docs, version.hexdigest()
+
+def load_master_docs(config_dir: str) -> dict:
+    """
+    loads stage_01.json ... stage_13.json and validates each against schema.json.
+    returns a dict keyed by 'stage_XX'.
+    unchanged files are served from a process-wide cache, so the stage dicts are
+    shared between calls: treat them as read-only.
+    """
+    return _load(config_dir)[0]
+
+
+class MasterDocsWatcher:
+    """
+    polls a master_docs directory and pushes new configs into running agents.
+    a poll is a stat() per file while nothing changes. a changed set is loaded
+    and validated on the watcher thread, then each agent gets it through
+    reload_master_docs(), which swaps config and compiled plan together, so the
+    packet stream never waits on parsing or validation. an invalid push is
+    reported via on_error / last_error and the agents keep their current config.
+    """
+
+    def __init__(self, config_dir: str, agents=(), interval_s: float = 2.0, on_error=None):
+        self.config_dir = config_dir
+        self.interval_s = interval_s
+        self.on_error = on_error
+        self.agents = list(agents)
+        self.docs, self.version = _load(config_dir)
+        self.last_error = None
+        self.reloads = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def attach(self, agent):
+        """register an agent and bring it up to the current config."""
+        if agent.master_docs is not self.docs:
+            agent.reload_master_docs(self.docs)
+        self.agents.append(agent)
+
+    def detach(self, agent):
+        self.agents.remove(agent)
+
+    def _report(self, e: Exception):
+        msg = str(e)
+        if msg != self.last_error:
+            self.last_error = msg
+            if self.on_error is not None:
+                self.on_error(e)
 
-        # quick top-level sanity
-        if "name" not in doc:
-            raise ConfigError(f"'name' missing in {fname}")
+    def check(self) -> bool:
+        """one poll; returns True when a new config was pushed to the agents."""
+        try:
+            docs, version = _load(self.config_dir)
+        except ConfigError as e:
+            self._report(e)
+            return False
+        self.last_error = None
+        if version == self.version:
+            return False
+        for agent in list(self.agents):
+            agent.reload_master_docs(docs)
+        self.docs, self.version = docs, version
+        self.reloads += 1
+        return True
 
-        # jsonschema validation
-        _validate(stage_key, doc, schema_root)
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.check()
+            except Exception as e:
+                # an agent that fails to reload, or a failing on_error hook,
+                # must not end the watch; the next poll tries again
+                self.last_error = f"{type(e).__name__}: {e}"
 
-        docs[stage_key] = doc
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="master-docs-watch", daemon=True)
+            self._thread.start()
+        return self
 
-    return docs
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
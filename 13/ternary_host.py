@@ -1,9 +1,19 @@
 import json
+import pickle
+import threading
 import time
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Tuple, Optional, Iterable, Iterator, Deque
 from dataclasses import dataclass, field
 from copy import deepcopy
 from pathlib import Path
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from types import MappingProxyType
+
+from utils.keyword_matcher import KeywordAutomaton, Hits
+from utils.log_ring import LogRing, LogView, freeze
+from utils.jsonl_logger import AsyncSpill
 
 import os
 from openai import OpenAI
@@ -42,46 +52,205 @@ MASTER_DOCS = {
     "stage_13": {"name": "The Great Reset", "reset_state": "tend_to_base_state"}
 }
 
+HARM_KEYWORDS = ("critical", "hazard", "toxicity", "species_extinction", "ecosystem_collapse")
+WEIGHT_HINTS = {
+    "biodiversity": ("bird", "insect", "flora", "biodiversity"),
+    "atmospheric_stability": ("stable", "pressure", "weather", "clean_air"),
+    "geological_data": ("seismic", "geology", "mag_field"),
+}
+
+
+@dataclass(frozen=True)
+class StagePlan:
+    """master_docs compiled once: thresholds, weights and one keyword automaton
+    covering stages 2, 3, 4, 6 and 8."""
+    matcher: KeywordAutomaton
+    triage: Tuple[str, ...]
+    weights: Tuple[Tuple[str, float], ...]
+    intent: Tuple[str, ...]
+    conflict_threshold: float
+    harm_threshold: float
+    align_min: float
+    docs: Dict[str, Any] = field(compare=False, repr=False)
+
+    @classmethod
+    def compile(cls, docs: Dict[str, Any]) -> "StagePlan":
+        extra = {("stage_03", k): hints for k, hints in WEIGHT_HINTS.items()}
+        extra[("stage_06", "harm")] = HARM_KEYWORDS
+        return cls(
+            matcher=KeywordAutomaton.from_master_docs(docs, extra),
+            triage=("signal", "noise", "ambiguous"),
+            weights=tuple((k, float(w)) for k, w in docs["stage_03"]["weights"].items()),
+            intent=tuple(docs["stage_04"]["rules"]),
+            conflict_threshold=docs["stage_05"]["rules"]["conflict_threshold"],
+            harm_threshold=docs["stage_06"]["rules"]["harm_threshold"],
+            align_min=docs["stage_07"]["rules"]["alignment_score"]["min"],
+            docs=docs,
+        )
+
+
+DEFAULT_LOG_CAPACITY = 4096
+
+
+def categorical_state(state: float, harm_threshold: float, align_min: float) -> str:
+    if state <= harm_threshold:
+        return "REFRAIN"
+    if state >= align_min:
+        return "AFFIRM"
+    return "TEND"
+
+
+@dataclass
+class PacketContext:
+    """Per-packet pipeline state.
+
+    Holds the scalar state plus the ordered effects of one packet: log entries,
+    ("action", state) requests and the stage 12 feedback slot. Plain data only,
+    so it pickles back from a worker process.
+    """
+    harm_threshold: float
+    align_min: float
+    state: float = 0.0
+    outcome: Optional[Dict[str, Any]] = None
+    events: List[Tuple[str, Any]] = field(default_factory=list)
+
+    def log(self, stage_name: str, data: Any, kind: str = "log") -> None:
+        self.events.append((kind, {
+            "timestamp": time.time(),
+            "stage": stage_name,
+            "scalar_state": round(self.state, 3),
+            "categorical_state": categorical_state(self.state, self.harm_threshold, self.align_min),
+            "data": data,
+        }))
+
+    def act(self) -> None:
+        self.events.append(("action", self.state))
+
+
+# per-process agent for process_stream workers, built by _init_worker and
+# rebuilt by _run_chunk when the stream's config version moves
+_WORKER_AGENT: Optional["TernaryLogicAgent"] = None
+_WORKER_VERSION = 0
+
+
+def _init_worker(agent_cls: type, master_docs: Dict[str, Any], version: int = 0) -> None:
+    global _WORKER_AGENT, _WORKER_VERSION
+    _WORKER_AGENT = agent_cls(master_docs, compiled=True)
+    _WORKER_VERSION = version
+
+
+def _run_chunk(packets: List[Dict[str, Any]], version: int = 0,
+               docs_blob: Optional[bytes] = None) -> List[PacketContext]:
+    if version != _WORKER_VERSION:
+        # docs_blob is the pickled master_docs of that version, pickled once by
+        # the parent; None only ever comes with the version the worker started on
+        _init_worker(type(_WORKER_AGENT), pickle.loads(docs_blob), version)
+    ctxs = [_WORKER_AGENT._run_packet(raw) for raw in packets]
+    for ctx in ctxs:
+        # the parent still holds the packet; don't pickle it back
+        ctx.events[0][1]["data"] = None
+    return ctxs
+
+
 @dataclass
 class TernaryLogicAgent:
     master_docs: Dict[str, Any]
     state: float = 0.0  # 0..13 scale; default = TEND baseline
     memory: Dict[str, Any] = field(default_factory=dict)
     log: List[Dict[str, Any]] = field(default_factory=list)
+    # compiled=True: serialize/lowercase each packet once, keep stage annotations
+    # in a side dict, and return a LogView instead of a deep copy of the log
+    compiled: bool = False
+    # bounded log: keep the newest log_capacity entries in memory; evicted ones
+    # go to `logger` (utils.jsonl_logger.JSONLLogger) on a background thread.
+    # log_deltas=True logs stage 2-4 annotations instead of full packet copies.
+    log_capacity: Optional[int] = None
+    logger: Optional[Any] = None
+    log_deltas: bool = False
+    _plan: Optional[StagePlan] = field(default=None, init=False, repr=False)
+    _swap_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+    _spill: Optional[AsyncSpill] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        self.plan  # build the keyword automaton up front, not on the first packet
+        if self.logger is not None and self.log_capacity is None:
+            self.log_capacity = DEFAULT_LOG_CAPACITY
+        if self.log_capacity:
+            if self.logger is not None:
+                self._spill = AsyncSpill(self.logger)
+            ring = LogRing(self.log_capacity, self._spill.submit if self._spill else None)
+            for entry in self.log:
+                ring.append(entry)
+            self.log = ring
+
+    def close(self) -> None:
+        """Spill what is left in a bounded log and close the logger."""
+        if isinstance(self.log, LogRing):
+            self.log.drain()
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    def _log_copy(self) -> List[Dict[str, Any]]:
+        return deepcopy(self.log if isinstance(self.log, list) else list(self.log))
+
+    def _stage_data(self, data: Dict[str, Any], key: str) -> Dict[str, Any]:
+        return {key: data[key]} if self.log_deltas else data
+
+    def reload_master_docs(self, master_docs: Dict[str, Any]) -> None:
+        """swap in a reloaded config.
+
+        The stage plan and automaton are compiled on the caller's thread first;
+        config and plan are then swapped together, so a packet thread never
+        compiles and never sees one without the other.
+        """
+        plan = StagePlan.compile(master_docs)
+        with self._swap_lock:
+            self.master_docs = master_docs
+            self._plan = plan
+
+    @property
+    def plan(self) -> StagePlan:
+        plan = self._plan
+        if plan is not None and plan.docs is self.master_docs:
+            return plan
+        # first use, mid-swap, or master_docs assigned directly
+        with self._swap_lock:
+            if self._plan is None or self._plan.docs is not self.master_docs:
+                self._plan = StagePlan.compile(self.master_docs)
+            return self._plan
 
     def log_state(self, stage_name: str, data: Any):
         ts = time.time()
         # categorical mapping
         harm_threshold = self.master_docs["stage_06"]["rules"]["harm_threshold"]
         align_min = self.master_docs["stage_07"]["rules"]["alignment_score"]["min"]
-        if self.state <= harm_threshold:
-            label = "REFRAIN"
-        elif self.state >= align_min:
-            label = "AFFIRM"
-        else:
-            label = "TEND"
+        label = categorical_state(self.state, harm_threshold, align_min)
         entry = {
             "timestamp": ts,
             "stage": stage_name,
             "scalar_state": round(self.state, 3),
             "categorical_state": label,
-            "data": data,
+            # compiled entries are read-only all the way down: a frozen copy, not the caller's dict
+            "data": freeze(data) if self.compiled else data,
         }
-        self.log.append(entry)
+        self.log.append(MappingProxyType(entry) if self.compiled else entry)
         print(f"[{ts:.2f}] {stage_name}: scalar={self.state:.2f} -> {label}")
 
     # --- Core pipeline ---
     def process_data_stream(self, raw_data: Dict[str, Any]):
+        if self.compiled:
+            return self._process_compiled(raw_data)
         self.log_state("Stage 1 - Ingress", raw_data)
 
         triaged = self._triage_data(raw_data)
-        self.log_state("Stage 2 - Triaging", triaged)
+        self.log_state("Stage 2 - Triaging", self._stage_data(triaged, "_triage"))
 
         weighted = self._weigh_data(triaged)
-        self.log_state("Stage 3 - Weighting", weighted)
+        self.log_state("Stage 3 - Weighting", self._stage_data(weighted, "_scores"))
 
         mapped = self._map_intent(weighted)
-        self.log_state("Stage 4 - Intent Mapping", mapped)
+        self.log_state("Stage 4 - Intent Mapping", self._stage_data(mapped, "_intent"))
 
         # Pre-decision scalar
         self.state = self._calculate_state_from_data(mapped)
@@ -92,7 +261,7 @@ class TernaryLogicAgent:
         if self.state <= ambiguity_threshold:
             self.state = 0.0
             self.log_state("Stage 5 - AMBIGUOUS", {"reason": "score <= conflict_threshold"})
-            return deepcopy(self.log)
+            return self._log_copy()
 
         # Stage 6: harm / refrain trigger
         harm_threshold = self.master_docs["stage_06"]["rules"]["harm_threshold"]
@@ -100,7 +269,7 @@ class TernaryLogicAgent:
             self.state = 0.0
             self.log_state("Stage 6 - REFRAIN", {"reason": "harm or low state"})
             self._execute_action()
-            return deepcopy(self.log)
+            return self._log_copy()
 
         # Stage 7: affirm tendency
         align_min = self.master_docs["stage_07"]["rules"]["alignment_score"]["min"]
@@ -113,7 +282,7 @@ class TernaryLogicAgent:
             self.state = 0.0
             self.log_state("Stage 8 - OVERRIDE→REFRAIN", {"reason": "ecocentric violation"})
             self._execute_action()
-            return deepcopy(self.log)
+            return self._log_copy()
 
         # Stage 9: resolution
         self.log_state("Stage 9 - Resolution", {"final_state": self.state})
@@ -128,56 +297,182 @@ class TernaryLogicAgent:
 
         # Stage 12: feedback
         self._provide_feedback(outcome)
-        self.log_state("Stage 12 - Feedback", {"memory": self.memory})
+        self.log_state("Stage 12 - Feedback", {"memory": dict(self.memory)})
 
         # Stage 13: reset
         self._reset_state()
         self.log_state("Stage 13 - Reset", {"state": self.state})
 
-        return deepcopy(self.log)
+        return self._log_copy()
+
+    def _process_compiled(self, raw_data: Dict[str, Any]) -> LogView:
+        self._commit(self._run_packet(raw_data))
+        return LogView(self.log)
+
+    def _run_packet(self, raw_data: Dict[str, Any]) -> "PacketContext":
+        """Same 13 stages, but the packet is serialized and lowercased once.
+
+        Stages 2-4 write their annotations into a side dict instead of copying
+        the packet, so keyword checks see only the packet text (the legacy path
+        also matched against earlier annotation keys, which never hit the default
+        rules). Per-packet cost depends on the packet, not on the log length.
+
+        All per-packet state lives in the returned PacketContext; nothing on the
+        agent is touched, so this can run in a worker process. Actions, feedback
+        and logging are applied by _commit() in the owning process.
+        """
+        plan = self.plan
+        ctx = PacketContext(plan.harm_threshold, plan.align_min)
+        hits = plan.matcher.scan(json.dumps(raw_data).lower())
+        ctx.log("Stage 1 - Ingress", raw_data)
+
+        ann: Dict[str, Any] = {"_triage": self._triage_hits(hits, plan)}
+        ctx.log("Stage 2 - Triaging", {"_triage": ann["_triage"]})
+        ann["_scores"] = self._weigh_hits(hits, plan)
+        ctx.log("Stage 3 - Weighting", {"_scores": ann["_scores"]})
+        ann["_intent"] = self._intent_hits(hits, plan)
+        ctx.log("Stage 4 - Intent Mapping", {"_intent": ann["_intent"]})
+
+        ctx.state = self._calculate_state_from_data(ann)
+        ctx.log("Pre-Decision", {"score_inputs": ann["_scores"]})
+
+        if ctx.state <= plan.conflict_threshold:
+            ctx.state = 0.0
+            ctx.log("Stage 5 - AMBIGUOUS", {"reason": "score <= conflict_threshold"})
+            return ctx
+
+        if ("stage_06", "harm") in hits or ctx.state <= plan.harm_threshold:
+            ctx.state = 0.0
+            ctx.log("Stage 6 - REFRAIN", {"reason": "harm or low state"})
+            ctx.act()
+            return ctx
+
+        if ctx.state >= plan.align_min:
+            ctx.state = 13.0
+            ctx.log("Stage 7 - AFFIRM", {"reason": "meets alignment score"})
+
+        if ctx.state == 13.0 and ("stage_08", "non_negotiables") in hits:
+            ctx.state = 0.0
+            ctx.log("Stage 8 - OVERRIDE→REFRAIN", {"reason": "ecocentric violation"})
+            ctx.act()
+            return ctx
+
+        ctx.log("Stage 9 - Resolution", {"final_state": ctx.state})
+        ctx.act()
+        ctx.log("Stage 10 - Action", {"done": True})
+        ctx.outcome = self._observe_outcome(ann)
+        ctx.log("Stage 11 - Outcome", ctx.outcome)
+        ctx.log("Stage 12 - Feedback", None, kind="feedback")
+        ctx.state = 0.0
+        ctx.log("Stage 13 - Reset", {"state": ctx.state})
+        return ctx
+
+    def _commit(self, ctx: "PacketContext") -> Tuple[Any, ...]:
+        """Apply a packet's effects in order: log entries, actions, feedback."""
+        out = []
+        for kind, item in ctx.events:
+            if kind == "action":
+                self._execute_action(item)
+                continue
+            if kind == "feedback":
+                self._provide_feedback(ctx.outcome)
+                item["data"] = {"memory": dict(self.memory)}
+            if self.compiled:
+                item["data"] = freeze(item["data"])
+            entry = MappingProxyType(item) if self.compiled else item
+            self.log.append(entry)
+            out.append(entry)
+            print(f"[{item['timestamp']:.2f}] {item['stage']}: "
+                  f"scalar={item['scalar_state']:.2f} -> {item['categorical_state']}")
+        self.state = ctx.state
+        return tuple(out)
+
+    def process_stream(self, packets: Iterable[Dict[str, Any]], workers: int = 1,
+                       chunksize: int = 32) -> Iterator[Tuple[Any, ...]]:
+        """Run packets through the compiled pipeline, yielding each packet's log
+        entries in input order.
+
+        With workers > 1 the stages run in a process pool; each worker compiles
+        master_docs once. Packets are read lazily with at most 2 * workers chunks
+        in flight, so an endless ingress iterable is fine. Entries still land in
+        self.log and actions/feedback run here, in input order. A reload
+        (reload_master_docs, or a MasterDocsWatcher push) reaches the workers
+        with the next chunk submitted; chunks already in flight finish on the
+        config they were sent with. This is a generator: nothing is processed
+        until it is iterated.
+        """
+        if workers <= 1:
+            for raw in packets:
+                yield self._commit(self._run_packet(raw))
+            return
+        it = iter(packets)
+        pending: Deque[Tuple[List[Dict[str, Any]], Future]] = deque()
+        docs = self.plan.docs
+        # [version, docs the version was cut from, their pickle]
+        current: List[Any] = [0, docs, None]
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=(type(self), docs, 0)) as pool:
+            def submit() -> bool:
+                chunk = list(islice(it, chunksize))
+                if chunk:
+                    docs = self.plan.docs
+                    if docs is not current[1]:
+                        current[:] = [current[0] + 1, docs, pickle.dumps(docs)]
+                    pending.append((chunk, pool.submit(_run_chunk, chunk, current[0], current[2])))
+                return bool(chunk)
+
+            try:
+                for _ in range(2 * workers):
+                    if not submit():
+                        break
+                while pending:
+                    chunk, fut = pending.popleft()
+                    ctxs = fut.result()
+                    submit()
+                    for raw, ctx in zip(chunk, ctxs):
+                        ctx.events[0][1]["data"] = raw
+                        yield self._commit(ctx)
+            finally:
+                for _, fut in pending:
+                    fut.cancel()
 
     # --- Implementations ---
+    def _scan(self, data: Dict[str, Any]) -> Hits:
+        return self.plan.matcher.scan(json.dumps(data).lower())
+
+    @staticmethod
+    def _triage_hits(hits: Hits, plan: StagePlan) -> Dict[str, int]:
+        return {k: len(hits.get(("stage_02", k), ())) for k in plan.triage}
+
+    @staticmethod
+    def _weigh_hits(hits: Hits, plan: StagePlan) -> Dict[str, float]:
+        scores = {k: (1.0 if ("stage_03", k) in hits else 0.0) for k in WEIGHT_HINTS}
+        weighted_sum = sum(scores[k] * w for k, w in plan.weights)
+        return {"ecosystem_weighted": weighted_sum, **scores}
+
+    @staticmethod
+    def _intent_hits(hits: Hits, plan: StagePlan) -> Dict[str, bool]:
+        mapped = {"is_sentient": False, "is_natural": False, "is_random": False}
+        for k in plan.intent:
+            mapped[k] = ("stage_04", k) in hits
+        return mapped
+
     def _triage_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Tag items as signal/noise/ambiguous based on simple keyword heuristics."""
-        rules = self.master_docs["stage_02"]["rules"]
-        text_blobs = json.dumps(data).lower()
-        tags = {"signal": 0, "noise": 0, "ambiguous": 0}
-        for k in ["signal", "noise", "ambiguous"]:
-            for kw in rules.get(k, []):
-                if kw in text_blobs:
-                    tags[k] += 1
         out = deepcopy(data)
-        out["_triage"] = tags
+        out["_triage"] = self._triage_hits(self._scan(data), self.plan)
         return out
 
     def _weigh_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Compute ecocentric sub-scores from hints in the packet."""
-        weights = self.master_docs["stage_03"]["weights"]
-        scores = {"biodiversity": 0.0, "atmospheric_stability": 0.0, "geological_data": 0.0}
-
-        # crude heuristics
-        s = json.dumps(data).lower()
-        if "bird" in s or "insect" in s or "flora" in s or "biodiversity" in s:
-            scores["biodiversity"] += 1.0
-        if "stable" in s or "pressure" in s or "weather" in s or "clean_air" in s:
-            scores["atmospheric_stability"] += 1.0
-        if "seismic" in s or "geology" in s or "mag_field" in s:
-            scores["geological_data"] += 1.0
-
-        weighted_sum = sum(scores[k] * weights[k] for k in weights)
         out = deepcopy(data)
-        out["_scores"] = {"ecosystem_weighted": weighted_sum, **scores}
+        out["_scores"] = self._weigh_hits(self._scan(data), self.plan)
         return out
 
     def _map_intent(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Classify intent hints with very simple pattern checks."""
-        rules = self.master_docs["stage_04"]["rules"]
-        text = json.dumps(data).lower()
-        mapped = {"is_sentient": False, "is_natural": False, "is_random": False}
-        for k, kws in rules.items():
-            mapped[k] = any(kw in text for kw in kws)
         out = deepcopy(data)
-        out["_intent"] = mapped
+        out["_intent"] = self._intent_hits(self._scan(data), self.plan)
         return out
 
     def _calculate_state_from_data(self, data: Dict[str, Any]) -> float:
@@ -198,25 +493,22 @@ class TernaryLogicAgent:
 
     def _detect_harm(self, data: Dict[str, Any]) -> bool:
         """Very naive harm detector: flags if 'critical', 'hazard', 'toxicity' present."""
-        s = json.dumps(data).lower()
-        keywords = ["critical", "hazard", "toxicity", "species_extinction", "ecosystem_collapse"]
-        return any(kw in s for kw in keywords)
+        return ("stage_06", "harm") in self._scan(data)
 
     def _check_ecocentric_override(self, data: Dict[str, Any]) -> bool:
         """Abort AFFIRM if any non-negotiable appears in the packet context."""
-        non_negs = set(self.master_docs["stage_08"]["non_negotiables"])
-        s = json.dumps(data).lower()
-        return not any(nn in s for nn in non_negs)
+        return ("stage_08", "non_negotiables") not in self._scan(data)
 
-    def _execute_action(self):
+    def _execute_action(self, state: Optional[float] = None):
+        state = self.state if state is None else state
         actions = self.master_docs["stage_10"]["actions"]
-        if self.state >= 13.0:
+        if state >= 13.0:
             mode = "AFFIRM"
-        elif self.state <= self.master_docs["stage_06"]["rules"]["harm_threshold"]:
+        elif state <= self.master_docs["stage_06"]["rules"]["harm_threshold"]:
             mode = "REFRAIN"
         else:
             mode = "TEND"
-        print(f"→ ACTION: {actions[mode]} ({mode}) at state {self.state:.2f}")
+        print(f"→ ACTION: {actions[mode]} ({mode}) at state {state:.2f}")
 
     def _observe_outcome(self, mapped: Dict[str, Any]) -> Dict[str, Any]:
         """Stubbed observation phase."""
@@ -0,0 +1,53 @@
+import os
+import sys
+import types
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+FIREWALL_DIR = os.path.join(ROOT, "𒀯")
+
+# the 13/ modules import each other as top level names (config_io, utils.*, ring_log)
+for p in (ROOT, FIREWALL_DIR, os.path.join(ROOT, "toy_implementation_pyton")):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+
+def _load_section(path: str, name: str, first: str, stop: str) -> types.ModuleType:
+    # ternary_server_firewall.py carries other material around the module itself
+    # (a client prelude, agent drafts, a logger draft), so the file as a whole
+    # does not import. load one section: from the line starting with first up to
+    # the line starting with stop, compiled under the real file name and padded
+    # so tracebacks point at the right lines.
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines(True)
+    start = next(i for i, ln in enumerate(lines) if ln.startswith(first))
+    end = next(i for i, ln in enumerate(lines) if i > start and ln.startswith(stop))
+    src = "\n" * start + "".join(lines[start:end])
+    mod = types.ModuleType(name)
+    mod.__file__ = path
+    # registered before exec: dataclasses and pickling look the module up by name
+    sys.modules[name] = mod
+    exec(compile(src, path, "exec"), mod.__dict__)
+    return mod
+
+
+@pytest.fixture(scope="session")
+def firewall(tmp_path_factory):
+    os.environ.setdefault("FIREWALL_CHAIN_PATH", str(tmp_path_factory.mktemp("chain") / "default.chain.jsonl"))
+    mod = sys.modules.get("ternary_server_firewall")
+    if mod is None:
+        mod = _load_section(os.path.join(FIREWALL_DIR, "ternary_server_firewall.py"), "ternary_server_firewall",
+                            "#!/usr/bin/env python3", 'if __name__ == "__main__":')
+    return mod
+
+
+@pytest.fixture(scope="session")
+def json_logger():
+    # the signed JsonLogger section near the end of the same file
+    mod = sys.modules.get("json_logger")
+    if mod is None:
+        mod = _load_section(os.path.join(FIREWALL_DIR, "ternary_server_firewall.py"), "json_logger",
+                            "# json_logger.py", "# pad 0001")
+    return mod
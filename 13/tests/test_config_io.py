@@ -0,0 +1,136 @@
+import json
+import os
+import shutil
+import time
+
+import pytest
+
+import config_io
+from config_io import ConfigError, MasterDocsWatcher, load_master_docs
+
+MASTER_DOCS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "master_docs")
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    d = tmp_path / "master_docs"
+    d.mkdir()
+    for name in ["schema.json"] + [f"stage_{i:02d}.json" for i in range(1, 14)]:
+        shutil.copy(os.path.join(MASTER_DOCS, name), d / name)
+    return str(d)
+
+
+def _rewrite(config_dir, stage, change):
+    path = os.path.join(config_dir, f"{stage}.json")
+    with open(path, encoding="utf-8") as f:
+        doc = json.load(f)
+    change(doc)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f)
+    # mtime granularity can hide a quick rewrite; the size or a bumped stamp shows it
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+class _Agent:
+    def __init__(self, docs):
+        self.master_docs = docs
+        self.reloads = 0
+
+    def reload_master_docs(self, docs):
+        self.master_docs = docs
+        self.reloads += 1
+
+
+def test_unchanged_files_are_served_from_cache(config_dir):
+    docs, version = config_io._load(config_dir)
+    assert sorted(docs) == [f"stage_{i:02d}" for i in range(1, 14)]
+    again, version2 = config_io._load(config_dir)
+    assert version2 == version
+    assert all(again[k] is docs[k] for k in docs)
+
+
+def test_changed_file_moves_version_and_only_its_doc(config_dir):
+    docs, version = config_io._load(config_dir)
+    _rewrite(config_dir, "stage_05", lambda d: d.update(notes="changed"))
+    new, version2 = config_io._load(config_dir)
+    assert version2 != version
+    assert new["stage_05"] is not docs["stage_05"]
+    assert new["stage_05"]["notes"] == "changed"
+    assert new["stage_01"] is docs["stage_01"]
+
+
+def test_invalid_push_raises_and_keeps_cache(config_dir):
+    docs, version = config_io._load(config_dir)
+    path = os.path.join(config_dir, "stage_03.json")
+    with open(path, "rb") as f:
+        raw = f.read()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{not json")
+    with pytest.raises(ConfigError):
+        load_master_docs(config_dir)
+    # same bytes back: same version, and the cached dicts are reused
+    with open(path, "wb") as f:
+        f.write(raw)
+    again, version2 = config_io._load(config_dir)
+    assert version2 == version
+    assert again["stage_03"] is docs["stage_03"]
+
+
+def test_watcher_pushes_new_config_and_reports_errors(config_dir):
+    errors = []
+    w = MasterDocsWatcher(config_dir, on_error=errors.append)
+    agent = _Agent(w.docs)
+    w.attach(agent)
+    assert agent.reloads == 0
+    assert w.check() is False
+
+    _rewrite(config_dir, "stage_06", lambda d: d["rules"].update(harm_threshold=3.0))
+    assert w.check() is True
+    assert agent.reloads == 1
+    assert agent.master_docs["stage_06"]["rules"]["harm_threshold"] == 3.0
+
+    os.remove(os.path.join(config_dir, "stage_07.json"))
+    assert w.check() is False
+    assert len(errors) == 1 and isinstance(errors[0], ConfigError)
+    assert "stage_07" in w.last_error
+    assert agent.reloads == 1
+
+
+def _break_schema(config_dir, stage):
+    path = os.path.join(config_dir, "schema.json")
+    with open(path, encoding="utf-8") as f:
+        schema = json.load(f)
+    stages = schema.get("stages") or schema["properties"]["stages"]["properties"]
+    stages[stage] = {"type": "not-a-type"}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(schema, f)
+
+
+def test_bad_schema_push_is_a_config_error(config_dir):
+    pytest.importorskip("jsonschema")
+    config_io._load(config_dir)
+    _break_schema(config_dir, "stage_04")
+    with pytest.raises(ConfigError, match="stage_04"):
+        load_master_docs(config_dir)
+
+
+def test_watcher_thread_survives_bad_schema_push(config_dir):
+    pytest.importorskip("jsonschema")
+    errors = []
+    w = MasterDocsWatcher(config_dir, interval_s=0.01, on_error=errors.append)
+    agent = _Agent(w.docs)
+    w.attach(agent)
+    w.start()
+    try:
+        _break_schema(config_dir, "stage_04")
+        for _ in range(500):
+            if errors:
+                break
+            time.sleep(0.01)
+        assert len(errors) == 1 and isinstance(errors[0], ConfigError)
+        assert "stage_04" in w.last_error
+        assert w._thread.is_alive()
+        assert agent.reloads == 0
+    finally:
+        w.stop()
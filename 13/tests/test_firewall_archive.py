@@ -0,0 +1,94 @@
+import json
+import os
+
+import pytest
+
+
+@pytest.fixture
+def rotated(firewall, tmp_path, monkeypatch):
+    # small segments, small archive blocks and an index sidecar written as the chain grows
+    monkeypatch.setattr(firewall, "CHAIN_MAX_MB", 0.01)
+    monkeypatch.setattr(firewall, "CHAIN_INDEX", True)
+    monkeypatch.setattr(firewall, "ARCHIVE_BLOCK", 16)
+    path = str(tmp_path / "c.jsonl")
+    fw = firewall.TernaryServerFirewall(seed=21, chain_path=path)
+    for i in range(300):
+        fw.process_packet({"signal_a": 0.01 * (i % 100), "signal_b": 0.4, "signal_c": 0.2})
+    fw.close()
+    segs = [fp for fp in firewall.chain_segments(path) if fp.endswith(".rotated")]
+    assert len(segs) >= 3
+    before = {}
+    for fp in segs:
+        with open(fp, encoding="utf-8") as f:
+            before[fp] = [json.loads(ln) for ln in f if ln.strip()]
+    return path, before
+
+
+def _canon(rec):
+    return json.dumps(rec, sort_keys=True)
+
+
+def test_archive_round_trip(firewall, rotated):
+    path, before = rotated
+    report = firewall.archive_chain(path)
+    assert len(report) == len(before)
+    for fp, recs in before.items():
+        arc = firewall.ChainArchive(fp + firewall.ARCHIVE_SUFFIX)
+        assert len(arc) == len(recs)
+        assert [_canon(r) for r in arc.records()] == [_canon(r) for r in recs]
+        assert _canon(arc.record(len(recs) - 1)) == _canon(recs[-1])
+    assert all(fp.endswith(firewall.ARCHIVE_SUFFIX) for fp in firewall.chain_segments(path)[:-1])
+    assert firewall.archive_chain(path) == []
+
+
+def test_verify_after_archive(firewall, rotated):
+    path, _ = rotated
+    want = firewall.verify_chain_report(path, workers=1)
+    assert want["ok"]
+    firewall.archive_chain(path)
+    assert firewall.verify_chain_report(path, workers=1) == want
+    assert firewall.verify_chain_report(path, workers=2) == want
+
+
+def test_scan_column_reads_archived_values(firewall, rotated):
+    path, before = rotated
+    firewall.archive_chain(path)
+    recs = [r for recs in before.values() for r in recs]
+    scores = [r["payload"]["score"] for r in recs if r["kind"] == "event"]
+    assert scores
+    assert list(firewall.scan_column(path, "payload.score", kind="event")) == scores
+    ts = sorted(r["payload"]["ts"] for r in recs if r["kind"] == "event")
+    lo, hi = ts[len(ts) // 4], ts[3 * len(ts) // 4]
+    assert list(firewall.scan_column(path, "payload.score", kind="event", start=lo, end=hi)) == \
+        [r["payload"]["score"] for r in recs if r["kind"] == "event" and lo <= r["payload"]["ts"] < hi]
+
+
+def test_index_follows_records_into_archives(firewall, rotated):
+    path, before = rotated
+    # no index passed: the sidecar must still move with the segments
+    firewall.archive_chain(path)
+    idx = firewall.ChainIndex(path)
+    try:
+        for recs in before.values():
+            events = [r for r in recs if r["kind"] == "event"]
+            for rec in (events[0], events[-1]):
+                locs = idx.find(rec["payload"]["event_id"])
+                # the event itself first, then any resolution that names it
+                assert locs and locs[0][0].endswith(firewall.ARCHIVE_SUFFIX)
+                assert _canon(idx.read(locs[0][0], locs[0][1])) == _canon(rec)
+    finally:
+        idx.close()
+
+
+def test_single_segment_archive_keeps_the_sidecar_index(firewall, rotated):
+    path, before = rotated
+    fp = next(iter(before))
+    event = next(r for r in before[fp] if r["kind"] == "event")
+    firewall.archive_segment(fp)
+    idx = firewall.ChainIndex(path)
+    try:
+        seg, off, _ = idx.find(event["payload"]["event_id"])[0]
+        assert seg == os.path.basename(fp) + firewall.ARCHIVE_SUFFIX
+        assert _canon(idx.read(seg, off)) == _canon(event)
+    finally:
+        idx.close()
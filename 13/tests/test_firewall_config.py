@@ -0,0 +1,51 @@
+import itertools
+import threading
+
+
+def test_concurrent_refresh_publishes_config_with_its_thresholds(firewall, tmp_path, monkeypatch):
+    monkeypatch.setattr(firewall, "THRESH_HI", firewall.THRESH_HI)
+    monkeypatch.setattr(firewall, "THRESH_LO", firewall.THRESH_LO)
+    counter = itertools.count()
+    fetch_lock = threading.Lock()
+
+    def source():
+        with fetch_lock:
+            n = next(counter)
+        return {"n": n, "thresholds": {"hi": 0.70 + (n % 20) / 100, "lo": 0.40 + (n % 20) / 100}}
+
+    fw = firewall.TernaryServerFirewall(seed=1, chain_path=str(tmp_path / "chain.jsonl"), config_source=source)
+    stop = threading.Event()
+    seen = []
+
+    def reader():
+        while not stop.is_set():
+            with firewall._THRESH_LOCK:
+                snap = fw.applied_config()
+                pair = (firewall.THRESH_HI, firewall.THRESH_LO)
+            seen.append((snap, pair))
+
+    def refresher():
+        for _ in range(100):
+            fw.refresh_config()
+
+    r = threading.Thread(target=reader)
+    r.start()
+    ts = [threading.Thread(target=refresher) for _ in range(4)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    stop.set()
+    r.join()
+    fw.close()
+
+    status = fw.config_status()
+    assert status["errors"] == 0
+    assert status["applied"] + status["unchanged"] == status["polls"]
+    snap = fw.applied_config()
+    assert fw.config is snap.config and status["version"] == snap.version
+    for snap, pair in seen:
+        if snap.version is None:
+            continue
+        th = snap.config["thresholds"]
+        assert pair == (snap.hi, snap.lo) == (th["hi"], th["lo"])
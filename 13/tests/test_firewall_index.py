@@ -0,0 +1,131 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def indexed(firewall, monkeypatch):
+    monkeypatch.setattr(firewall, "CHAIN_INDEX", True)
+
+
+def _records(firewall, path):
+    out = []
+    for fp in firewall.chain_segments(path):
+        with open(fp, encoding="utf-8") as f:
+            out.extend((os.path.basename(fp), json.loads(ln)) for ln in f if ln.strip())
+    return out
+
+
+def _committed_rows(path):
+    # a second connection only sees what the index committed
+    db = sqlite3.connect(os.path.abspath(path) + ".idx.sqlite")
+    try:
+        return db.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+    finally:
+        db.close()
+
+
+def _feed(fw, n):
+    for i in range(n):
+        fw.process_packet({"signal_a": 0.01 * (i % 100), "signal_b": 0.4, "signal_c": 0.3})
+
+
+def test_rows_are_written_as_the_chain_grows(firewall, tmp_path, indexed):
+    path = str(tmp_path / "c.jsonl")
+    fw = firewall.TernaryServerFirewall(seed=31, chain_path=path)
+    _feed(fw, 40)
+    # fewer rows than one commit batch: flush_chain must commit them
+    fw.flush_chain()
+    recs = _records(firewall, path)
+    assert len(recs) < 256 and _committed_rows(path) == len(recs)
+    for _, rec in recs[::5]:
+        ev = rec["payload"].get("event_id")
+        if ev is None:
+            continue
+        seg, off, _ = fw._index.find(ev)[0]
+        assert fw._index.read(seg, off) == rec
+    fw.close()
+
+
+def test_rotation_commits_and_renames_rows(firewall, tmp_path, monkeypatch, indexed):
+    monkeypatch.setattr(firewall, "CHAIN_MAX_MB", 0.01)
+    path = str(tmp_path / "c.jsonl")
+    fw = firewall.TernaryServerFirewall(seed=32, chain_path=path)
+    _feed(fw, 150)
+    recs = _records(firewall, path)
+    segs = {seg for seg, _ in recs}
+    assert len(segs) >= 3
+    # every rotated segment is committed under its new name before the organism closes
+    db = sqlite3.connect(os.path.abspath(path) + ".idx.sqlite")
+    try:
+        rows = dict(db.execute("SELECT segment, COUNT(*) FROM records GROUP BY segment").fetchall())
+    finally:
+        db.close()
+    for seg in segs - {os.path.basename(path)}:
+        assert rows[seg] == sum(1 for s, _ in recs if s == seg)
+    fw.close()
+    assert _committed_rows(path) == len(recs)
+    first_terminal = next(rec for _, rec in recs if rec["kind"] == "terminal")
+    idx = firewall.ChainIndex(path)
+    try:
+        # by_kind is newest first, so the first rotation's terminal comes last
+        seg, off, _ = idx.by_kind("terminal", limit=len(recs))[-1]
+        assert seg.endswith(".rotated") and idx.read(seg, off) == first_terminal
+    finally:
+        idx.close()
+
+
+def test_range_and_by_kind(firewall, tmp_path, indexed):
+    path = str(tmp_path / "c.jsonl")
+    fw = firewall.TernaryServerFirewall(seed=33, chain_path=path)
+    _feed(fw, 80)
+    fw.close()
+    recs = [rec for _, rec in _records(firewall, path)]
+    stamps = sorted(r["payload"]["ts"] for r in recs if "ts" in r["payload"])
+    lo, hi = stamps[10], stamps[50]
+    idx = firewall.ChainIndex(path)
+    try:
+        got = [idx.read(s, o) for s, o, _ in idx.range(lo, hi)]
+        assert got == [r for r in recs if lo <= r["payload"].get("ts", "") < hi]
+        events = [idx.read(s, o) for s, o, _ in idx.range(lo, hi, kind="event")]
+        assert events == [r for r in got if r["kind"] == "event"]
+        newest = [idx.read(s, o) for s, o, _ in idx.by_kind("event", limit=5)]
+        assert newest == [r for r in recs if r["kind"] == "event"][::-1][:5]
+        assert idx.by_kind("no-such-kind") == []
+    finally:
+        idx.close()
+
+
+def test_rebuild_matches_incremental_index(firewall, tmp_path, monkeypatch, indexed):
+    monkeypatch.setattr(firewall, "CHAIN_MAX_MB", 0.01)
+    path = str(tmp_path / "c.jsonl")
+    fw = firewall.TernaryServerFirewall(seed=34, chain_path=path)
+    _feed(fw, 120)
+    fw.close()
+    recs = _records(firewall, path)
+    idx = firewall.ChainIndex(path)
+    try:
+        span = ("0000", "9999")
+        before = idx.range(*span)
+        events = [r["payload"]["event_id"] for _, r in recs if r["kind"] == "event"]
+        found = [idx.find(ev) for ev in events[::9]]
+        assert idx.rebuild() == len(recs) == len(before)
+        assert idx.range(*span) == before
+        assert [idx.find(ev) for ev in events[::9]] == found
+    finally:
+        idx.close()
+
+
+def test_reopened_index_continues_the_live_segment(firewall, tmp_path, indexed):
+    path = str(tmp_path / "c.jsonl")
+    fw = firewall.TernaryServerFirewall(seed=35, chain_path=path)
+    _feed(fw, 10)
+    fw.close()
+    n = _committed_rows(path)
+    idx = firewall.ChainIndex(path)
+    try:
+        assert idx._seq == n
+    finally:
+        idx.close()
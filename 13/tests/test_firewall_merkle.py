@@ -0,0 +1,90 @@
+import copy
+import json
+import shutil
+
+import pytest
+
+
+@pytest.fixture
+def merkle_chain(firewall, tmp_path, monkeypatch):
+    monkeypatch.setattr(firewall, "CHAIN_MODE", "merkle")
+    monkeypatch.setattr(firewall, "MERKLE_BLOCK", 8)
+    path = str(tmp_path / "chain.jsonl")
+    fw = firewall.TernaryServerFirewall(seed=4, chain_path=path)
+    for i in range(40):
+        fw.process_packet({"signal_a": 0.02 * i, "signal_b": 0.3, "signal_c": 0.2})
+    fw.close()
+    with open(path, encoding="utf-8") as f:
+        events = [r["payload"]["event_id"] for r in map(json.loads, f) if r.get("kind") == "event"]
+    return path, events
+
+
+def test_proof_verifies_for_every_event(firewall, merkle_chain):
+    path, events = merkle_chain
+    assert len(events) == 40
+    for ev in events[::7]:
+        proof = firewall.merkle_proof(path, ev)
+        assert proof["record"]["payload"]["event_id"] == ev
+        assert firewall.verify_merkle_proof(proof)
+    assert firewall.merkle_proof(path, "no-such-id") is None
+
+
+def test_tampered_leaf_or_path_is_rejected(firewall, merkle_chain):
+    path, events = merkle_chain
+    proof = firewall.merkle_proof(path, events[5])
+    assert proof["path"]
+
+    bad = copy.deepcopy(proof)
+    bad["record"]["payload"]["score"] += 0.5
+    assert not firewall.verify_merkle_proof(bad)
+
+    bad = copy.deepcopy(proof)
+    bad["leaf"] = firewall.leaf_hash("event", bad["record"]["payload"] | {"score": 9.0})
+    assert not firewall.verify_merkle_proof(bad)
+
+    bad = copy.deepcopy(proof)
+    side, sib = bad["path"][0]
+    bad["path"][0] = [side, "0" * len(sib)]
+    assert not firewall.verify_merkle_proof(bad)
+
+    bad = copy.deepcopy(proof)
+    bad["path"][0] = ["R" if side == "L" else "L", sib]
+    assert not firewall.verify_merkle_proof(bad)
+
+
+def test_block_signature_needs_the_key(firewall, merkle_chain):
+    path, events = merkle_chain
+    proof = firewall.merkle_proof(path, events[0])
+    forged = copy.deepcopy(proof)
+    forged["block"]["digest"] = "0" * 64
+    assert not firewall.verify_merkle_proof(forged)
+    # without a key only inclusion under the root is shown
+    assert firewall.verify_merkle_proof(forged, key=None)
+    assert not firewall.verify_merkle_proof(proof, key=b"another key")
+
+
+def test_open_block_has_no_proof(firewall, tmp_path, monkeypatch):
+    monkeypatch.setattr(firewall, "CHAIN_MODE", "merkle")
+    monkeypatch.setattr(firewall, "MERKLE_BLOCK", 64)
+    path = str(tmp_path / "chain.jsonl")
+    fw = firewall.TernaryServerFirewall(seed=4, chain_path=path)
+    fw.process_packet({"signal_a": 0.1, "signal_b": 0.3, "signal_c": 0.2})
+    with open(path, encoding="utf-8") as f:
+        ev = next(r["payload"]["event_id"] for r in map(json.loads, f) if r.get("kind") == "event")
+    assert firewall.merkle_proof(path, ev) is None
+    fw.close()
+    assert firewall.verify_merkle_proof(firewall.merkle_proof(path, ev))
+
+
+def test_cli_proves_against_a_copied_chain(firewall, merkle_chain, tmp_path, capsys):
+    path, events = merkle_chain
+    copied = str(tmp_path / "audit" / "copy.jsonl")
+    (tmp_path / "audit").mkdir()
+    shutil.copy(path, copied)
+    assert firewall.main(["--prove", events[3], "--chain", copied]) == 0
+    proof = json.loads(capsys.readouterr().out)
+    assert proof["record"]["payload"]["event_id"] == events[3]
+    proof_file = tmp_path / "proof.json"
+    proof_file.write_text(json.dumps(proof), encoding="utf-8")
+    assert firewall.main(["--check-proof", str(proof_file)]) == 0
+    assert firewall.main(["--prove", "no-such-id", "--chain", copied]) == 1
@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+
+class _Clock:
+    def __init__(self, t=1000.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+
+@pytest.mark.parametrize("draw", [lambda r: r.random(), lambda r: r.expovariate(20.0),
+                                  lambda r: r.lognormvariate(0.0, 3.0)])
+def test_sketch_quantiles_within_alpha(firewall, draw):
+    r = random.Random(7)
+    xs = [draw(r) for _ in range(4000)]
+    sk = firewall.QuantileSketch(alpha=0.01)
+    for x in xs:
+        sk.add(x)
+    xs.sort()
+    for q in (0.0, 0.1, 0.5, 0.9, 0.95, 0.99, 1.0):
+        want = xs[int(q * (len(xs) - 1))]
+        assert sk.quantile(q) == pytest.approx(want, rel=0.0101)
+
+
+def test_sketch_ends_and_merge(firewall):
+    sk = firewall.QuantileSketch(max_value=10.0)
+    assert sk.quantile(0.5) == 0.0
+    for x in (0.0, -1.0, 1e9):
+        sk.add(x)
+    # at or below min_value reads as 0, past max_value lands in the top bucket
+    assert sk.quantile(0.0) == 0.0 and sk.quantile(0.5) == 0.0
+    assert sk.quantile(1.0) == pytest.approx(10.0, rel=0.0101)
+    sk.clear()
+    assert len(sk) == 0 and sk.quantile(0.5) == 0.0
+    a, b, whole = firewall.QuantileSketch(), firewall.QuantileSketch(), firewall.QuantileSketch()
+    for i in range(1, 501):
+        (a if i % 3 else b).add(i / 500)
+        whole.add(i / 500)
+    for q in (0.05, 0.5, 0.95):
+        assert firewall.QuantileSketch.merged_quantile([a, b], q) == whole.quantile(q)
+
+
+def test_score_window_forgets_old_load(firewall):
+    clock = _Clock()
+    w = firewall.ScoreWindow(window_s=10, windows=2, clock=clock)
+    assert w.horizon_s == 20
+    for _ in range(100):
+        w.add(0.9, firewall.FState.CRITICAL)
+    assert w.quantile(0.5) == pytest.approx(0.9, rel=0.0101)
+    # the next window still sees the previous one
+    clock.t += 10
+    for _ in range(100):
+        w.add(0.1, firewall.FState.SECURE)
+    assert w.totals() == {"secure": 100, "vulnerable": 0, "critical": 100}
+    assert w.quantile(0.95) == pytest.approx(0.9, rel=0.0101)
+    # two windows on, the critical burst has rotated out
+    clock.t += 10
+    w.add(0.1, firewall.FState.SECURE)
+    assert w.totals() == {"secure": 101, "vulnerable": 0, "critical": 0}
+    assert w.quantile(0.95) == pytest.approx(0.1, rel=0.0101)
+    # idle past the horizon reads empty without another add
+    clock.t += 30
+    assert w.totals() == {"secure": 0, "vulnerable": 0, "critical": 0}
+    assert w.quantile(0.5) == 0.0
+
+
+def test_metrics_percentiles_cover_recent_scores(firewall, tmp_path):
+    fw = firewall.TernaryServerFirewall(seed=3, chain_path=str(tmp_path / "chain.jsonl"))
+    clock = _Clock()
+    fw._score_window = firewall.ScoreWindow(window_s=60, clock=clock)
+    for _ in range(50):
+        fw.process_packet({"signal_a": 1.0, "signal_b": 1.0, "signal_c": 0.0})
+    high = fw.metrics()["score_p50"]
+    clock.t += 180
+    for _ in range(50):
+        fw.process_packet({"signal_a": 0.0, "signal_b": 0.0, "signal_c": 1.0})
+    fw.close()
+    m = fw.metrics()
+    assert m["score_p95"] < high
+    assert sum(m["window_totals"].values()) == 50
+    # totals still count the whole run
+    assert sum(m["totals"].values()) == 100
+    assert m["score_window_s"] == 120
@@ -0,0 +1,26 @@
+def _resolution(ev):
+    return {"kind": "resolution", "payload": {"source_event_id": ev, "decision": "OBJECT", "ts": "t"}}
+
+
+def test_alerted_ids_stay_bounded(firewall, tmp_path, monkeypatch):
+    monkeypatch.setattr(firewall, "REPLAY_ALERTED_MAX", 8)
+    rp = firewall.ChainReplay(str(tmp_path / "none.jsonl"))
+    for i in range(100):
+        rp.feed(_resolution(f"ev-{i}"))
+    assert len(rp._alerted) == 8
+    assert list(rp._alerted) == [f"ev-{i}" for i in range(92, 100)]
+
+
+def test_repeated_resolution_charges_one_alert(firewall, tmp_path, monkeypatch):
+    monkeypatch.setattr(firewall, "REPLAY_ALERTED_MAX", 4)
+    once = firewall.ChainReplay(str(tmp_path / "none.jsonl"))
+    once.feed(_resolution("ev-a"))
+    twice = firewall.ChainReplay(str(tmp_path / "none.jsonl"))
+    twice.feed(_resolution("ev-a"))
+    for i in range(3):
+        twice.feed(_resolution(f"ev-{i}"))
+        twice.feed(_resolution("ev-a"))
+    # ev-a stays recent, so only the three others add alert cost
+    alert = firewall.ENERGY_COSTS["alert"]
+    assert twice.state.decisions["OBJECT"] == 7
+    assert abs((once.state.energy - twice.state.energy) - 3 * alert) < 1e-9
@@ -0,0 +1,131 @@
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def small_pool(firewall, monkeypatch):
+    # one resolver, room for two queued jobs, quick re-polls
+    monkeypatch.setattr(firewall, "RESOLVER_WORKERS", 1)
+    monkeypatch.setattr(firewall, "RESOLVE_QUEUE_MAX", 2)
+    monkeypatch.setattr(firewall, "RESOLVER_POLL_S", 0.05)
+
+
+def _event(firewall, i):
+    return firewall.PacketEvent(event_id=f"ev-{i:03d}", ts_utc=firewall.iso_utc(), service_id="t",
+                                signals={}, score=1.0, state=firewall.FState.CRITICAL, context={})
+
+
+def _organism(firewall, tmp_path, resolver, sink=None):
+    fw = firewall.TernaryServerFirewall(seed=1, chain_path=str(tmp_path / "c.jsonl"), resolution_sink=sink)
+    fw._resolver = resolver
+    return fw
+
+
+def _wait(cond, timeout=5.0):
+    until = time.monotonic() + timeout
+    while not cond():
+        if time.monotonic() > until:
+            raise AssertionError("condition not reached")
+        time.sleep(0.01)
+
+
+def _busy(firewall, gate, taken):
+    def resolver(ev):
+        taken.set()
+        gate.wait(5.0)
+        return firewall.Ternary.OBJECT
+    return resolver
+
+
+def test_object_overflow_settles_off_the_caller(firewall, tmp_path, small_pool):
+    gate, taken = threading.Event(), threading.Event()
+    settled = []
+    fw = _organism(firewall, tmp_path, _busy(firewall, gate, taken),
+                   sink=lambda res: settled.append((res.source_event_id, res.resolver_source,
+                                                    threading.current_thread().name)))
+    fw._submit_resolution(_event(firewall, 0))
+    taken.wait(5.0)
+    for i in range(1, 6):
+        fw._submit_resolution(_event(firewall, i))
+    # two fit the queue, three overflow; none of them was written by this thread
+    _wait(lambda: len(settled) == 3)
+    assert {s[0] for s in settled} == {"ev-003", "ev-004", "ev-005"}
+    assert {s[1] for s in settled} == {"overflow_default_object"}
+    assert {s[2] for s in settled} == {"fw-settle"}
+    m = fw.metrics()["resolver"]
+    assert m["overflow"] == 3 and m["settled_inline"] == 0
+    gate.set()
+    fw.close()
+    assert len(settled) == 6
+    assert fw.metrics()["resolver"]["resolved"] == 6
+
+
+def test_full_settle_queue_settles_inline(firewall, tmp_path, small_pool, monkeypatch):
+    monkeypatch.setattr(firewall, "RESOLVE_SETTLE_MAX", 1)
+    gate, taken, settler_busy = threading.Event(), threading.Event(), threading.Event()
+    settled = []
+
+    def sink(res):
+        if threading.current_thread().name == "fw-settle":
+            settler_busy.set()
+            gate.wait(5.0)
+        settled.append((res.source_event_id, threading.current_thread().name))
+
+    fw = _organism(firewall, tmp_path, _busy(firewall, gate, taken), sink=sink)
+    fw._submit_resolution(_event(firewall, 0))
+    taken.wait(5.0)
+    for i in range(1, 4):
+        fw._submit_resolution(_event(firewall, i))
+    settler_busy.wait(5.0)
+    fw._submit_resolution(_event(firewall, 4))  # into the settle queue
+    fw._submit_resolution(_event(firewall, 5))  # nowhere left: this thread pays
+    assert settled == [("ev-005", threading.current_thread().name)]
+    assert fw.metrics()["resolver"]["settled_inline"] == 1
+    gate.set()
+    fw.close()
+    assert sorted(s[0] for s in settled) == [f"ev-{i:03d}" for i in range(6)]
+
+
+def test_spill_overflow_drains_back_into_the_pool(firewall, tmp_path, small_pool, monkeypatch):
+    monkeypatch.setattr(firewall, "RESOLVE_OVERFLOW", "spill")
+    gate, taken = threading.Event(), threading.Event()
+    settled = []
+    fw = _organism(firewall, tmp_path, _busy(firewall, gate, taken),
+                   sink=lambda res: settled.append((res.source_event_id, res.resolver_source)))
+    fw._submit_resolution(_event(firewall, 0))
+    taken.wait(5.0)
+    for i in range(1, 6):
+        fw._submit_resolution(_event(firewall, i))
+    with open(fw._spill_path, encoding="utf-8") as f:
+        assert len(f.read().splitlines()) == 3
+    assert fw.metrics()["resolver"]["spilled"] == 3 and settled == []
+    gate.set()
+    _wait(lambda: len(settled) == 6)
+    # every spilled job came back and was resolved by the resolver, not defaulted
+    assert "overflow_default_object" not in {s[1] for s in settled}
+    assert fw.metrics()["resolver"]["spilled"] == 0
+    fw.close()
+
+
+def test_observe_until_deadline_defaults_to_object(firewall, tmp_path, small_pool, monkeypatch):
+    monkeypatch.setattr(firewall, "RESOLVER_TIMEOUT_S", 0.2)
+    polls = []
+    settled = []
+
+    def undecided(ev):
+        polls.append(time.monotonic())
+        return firewall.Ternary.OBSERVE
+
+    fw = _organism(firewall, tmp_path, undecided, sink=lambda res: settled.append(res))
+    t0 = time.monotonic()
+    fw._submit_resolution(_event(firewall, 0))
+    _wait(lambda: settled)
+    assert settled[0].decision == firewall.Ternary.OBJECT
+    assert time.monotonic() - t0 >= 0.2
+    # re-polled while waiting, not once per deadline
+    assert len(polls) >= 3
+    m = fw.metrics()["resolver"]
+    assert m["timeouts"] == 1 and m["waiting"] == 0
+    fw.close()
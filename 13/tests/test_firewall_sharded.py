@@ -0,0 +1,86 @@
+import json
+import threading
+import time
+
+import pytest
+
+
+def _packets(n, start=0):
+    return [{"signal_a": 0.01 * ((i + start) % 100), "signal_b": 0.4, "signal_c": 0.3,
+             "service_id": f"svc{(i + start) % 5}"} for i in range(n)]
+
+
+def _seals(path):
+    with open(path, encoding="utf-8") as f:
+        return [r for r in map(json.loads, f) if r["kind"] == "shard_seal"]
+
+
+@pytest.fixture
+def ring(firewall, tmp_path, monkeypatch):
+    monkeypatch.setattr(firewall, "RING_LOG_PATH", str(tmp_path / "fw.ring"))
+
+
+@pytest.mark.parametrize("mode", ["linked", "merkle"])
+def test_restarted_shards_continue_their_chains(firewall, tmp_path, monkeypatch, ring, mode):
+    monkeypatch.setattr(firewall, "CHAIN_MODE", mode)
+    path = str(tmp_path / "chain.jsonl")
+    for run in range(2):
+        sh = firewall.ShardedFirewall(shards=2, chain_path=path, seal_every_s=0, batch=16)
+        sh.submit_many(_packets(120, start=run * 120))
+        sh.close()
+    ok, n = firewall.verify_sharded_chain(path, workers=1)
+    assert ok and n > 240
+    seals = _seals(path)
+    assert len(seals) >= 2
+    # the seals of the second run commit to packet counts of that run only, on top of the first run's heads
+    last = seals[-1]["payload"]["shards"]
+    assert sum(s["packets"] for s in last) == 120
+    for i in range(2):
+        chain = firewall.shard_chain_path(path, i)
+        assert firewall.verify_chain(chain, workers=1)[0]
+        with open(chain, encoding="utf-8") as f:
+            digests = {json.loads(ln).get("digest") for ln in f}
+        assert all(seal["payload"]["shards"][i]["head"] in digests for seal in seals)
+
+
+def test_tampered_shard_chain_fails_sharded_verify(firewall, tmp_path, ring):
+    path = str(tmp_path / "chain.jsonl")
+    sh = firewall.ShardedFirewall(shards=2, chain_path=path, seal_every_s=0, batch=8)
+    sh.submit_many(_packets(60))
+    sh.close()
+    assert firewall.verify_sharded_chain(path, workers=1)[0]
+    assert firewall.main(["--verify-sharded", path, "--workers", "1"]) == 0
+    chain = firewall.shard_chain_path(path, 1)
+    with open(chain, encoding="utf-8") as f:
+        lines = f.readlines()
+    lines[3] = lines[3].replace('"signal_b":0.4', '"signal_b":0.5', 1)
+    with open(chain, "w", encoding="utf-8") as f:
+        f.writelines(lines)
+    assert not firewall.verify_sharded_chain(path, workers=1)[0]
+    assert firewall.main(["--verify-sharded", path, "--workers", "1"]) == 1
+
+
+def test_submit_does_not_wait_for_seal_replies(firewall, tmp_path, ring):
+    path = str(tmp_path / "chain.jsonl")
+    sh = firewall.ShardedFirewall(shards=2, chain_path=path, seal_every_s=0, batch=4)
+    get = sh._outbox.get
+    replying = threading.Event()
+
+    def slow_get(*a, **kw):
+        # shards answer the seal only once the ingress below has gone through
+        replying.wait(5.0)
+        return get(*a, **kw)
+
+    sh._outbox.get = slow_get
+    sealer = threading.Thread(target=sh.seal)
+    sealer.start()
+    time.sleep(0.1)
+    t = time.monotonic()
+    sh.submit_many(_packets(40))
+    assert time.monotonic() - t < 2.0
+    replying.set()
+    sealer.join()
+    sh._outbox.get = get
+    sh.close()
+    assert firewall.verify_sharded_chain(path, workers=1)[0]
+    assert sum(s["packets"] for s in _seals(path)[-1]["payload"]["shards"]) == 40
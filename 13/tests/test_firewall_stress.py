@@ -0,0 +1,98 @@
+import json
+import random
+import threading
+
+import pytest
+
+
+@pytest.mark.parametrize("mode", ["linked", "merkle"])
+@pytest.mark.parametrize("batch", [0, 25])
+def test_concurrent_ingress_keeps_one_chain(firewall, tmp_path, monkeypatch, mode, batch):
+    monkeypatch.setattr(firewall, "CHAIN_MODE", mode)
+    monkeypatch.setattr(firewall, "MERKLE_BLOCK", 16)
+    path = str(tmp_path / "chain.jsonl")
+    fw = firewall.TernaryServerFirewall(seed=3, chain_path=path)
+    threads, packets = 6, 150
+    gate = threading.Barrier(threads)
+    errors = []
+
+    def ingress(n):
+        rng = random.Random(n)
+        pkts = [{k: rng.uniform(0.1, 1.9) for k in ("signal_a", "signal_b", "signal_c")} for _ in range(packets)]
+        gate.wait()
+        try:
+            if batch:
+                for i in range(0, packets, batch):
+                    part = pkts[i:i + batch]
+                    fw.process_packets({k: [p[k] for p in part] for k in ("signal_a", "signal_b", "signal_c")})
+            else:
+                for p in pkts:
+                    fw.process_packet(p)
+        except Exception as e:  # surfaced below with the thread's traceback text
+            errors.append(repr(e))
+
+    ts = [threading.Thread(target=ingress, args=(n,)) for n in range(threads)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    head = fw.close()
+
+    assert errors == []
+    rep = firewall.verify_chain_report(path, workers=1, checkpoint=False)
+    assert rep["ok"], rep["fail"]
+    assert rep["open_leaves"] == 0
+    last, records = fw.chain_head()
+    assert last == head
+    assert rep["records"] == records
+    m = fw.metrics()
+    assert sum(m["totals"].values()) == threads * packets
+    assert m["malformed"] == 0
+    assert m["resolver"]["queue_depth"] == 0 and m["resolver"]["waiting"] == 0
+
+
+def test_run_stress_reports_ok(firewall):
+    rep = firewall.run_stress(threads=4, packets=200, batch=20)
+    assert rep["ok"], rep
+    assert rep["records_match"] and rep["totals_match"]
+
+
+def test_bench_leaves_the_global_rng_alone(firewall, tmp_path):
+    random.seed(99)
+    state = random.getstate()
+    runs = [firewall.run_bench(packets=300, seed=5, batch=b, chain_path=str(tmp_path / f"b{i}.jsonl"))
+            for i, b in enumerate((0, 0, 30, 30))]
+    assert random.getstate() == state
+    # the same seed and batch size send the same traffic
+    for a, b in (runs[:2], runs[2:]):
+        assert a["totals"] == b["totals"] and a["red_queen"] == b["red_queen"]
+
+
+def test_tampered_record_fails_verification(firewall, tmp_path):
+    path = str(tmp_path / "chain.jsonl")
+    fw = firewall.TernaryServerFirewall(seed=5, chain_path=path)
+    for i in range(20):
+        fw.process_packet({"signal_a": 0.2, "signal_b": 0.3, "signal_c": 0.1 * i})
+    fw.close()
+    assert firewall.verify_chain(path, workers=1, checkpoint=False)[0]
+    with open(path, encoding="utf-8") as f:
+        lines = f.readlines()
+    lines[5] = lines[5].replace('"signal_c"', '"signal_x"', 1)
+    assert '"signal_x"' in lines[5]
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(lines)
+    assert not firewall.verify_chain(path, workers=1, checkpoint=False)[0]
+
+
+def test_burst_stamps_stay_unique_and_increasing(firewall, tmp_path):
+    path = str(tmp_path / "chain.jsonl")
+    fw = firewall.TernaryServerFirewall(seed=9, chain_path=path)
+    for i in range(20):
+        fw.process_packet({"signal_a": 0.3, "signal_b": 0.2, "signal_c": 0.1})
+        fw.process_packets({"signal_a": [0.3] * 5, "signal_b": [0.2] * 5, "signal_c": [0.1] * 5,
+                            "ts": [0.0] * 5})
+    fw.close()
+    with open(path, encoding="utf-8") as f:
+        stamps = [r["payload"]["ts"] for r in map(json.loads, f) if r["kind"] == "event"]
+    assert len(stamps) == 120
+    assert all(a < b for a, b in zip(stamps, stamps[1:]))
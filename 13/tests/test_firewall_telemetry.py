@@ -0,0 +1,49 @@
+import pytest
+
+
+def _samples(text):
+    out = {}
+    for ln in text.splitlines():
+        if ln and not ln.startswith("#"):
+            key, val = ln.rsplit(" ", 1)
+            out[key] = val
+    return out
+
+
+def test_openmetrics_values_are_exact(firewall):
+    text = firewall.openmetrics_text([
+        ("c", "counter", "big counter", [({"k": "a"}, 1234567), ({"k": "b"}, 2 ** 53 + 1), ({"k": "c"}, True)]),
+        ("g", "gauge", "gauges", [({"k": "a"}, 0.1), ({"k": "b"}, 1234567.891), ({"k": "c"}, float("inf"))]),
+    ])
+    s = _samples(text)
+    assert s['c_total{k="a"}'] == "1234567"
+    assert s['c_total{k="b"}'] == str(2 ** 53 + 1)
+    assert s['c_total{k="c"}'] == "1"
+    assert s['g{k="a"}'] == "0.1"
+    assert float(s['g{k="b"}']) == 1234567.891
+    assert s['g{k="c"}'] == "+Inf"
+    assert text.endswith("# EOF\n")
+
+
+def test_organism_scrape_round_trips(firewall, tmp_path):
+    fw = firewall.TernaryServerFirewall(seed=2, chain_path=str(tmp_path / "chain.jsonl"))
+    for i in range(30):
+        fw.process_packet({"signal_a": 0.05 * i, "signal_b": 0.4, "signal_c": 0.2})
+    fw.close()
+    m = fw.metrics()
+    s = _samples(fw.openmetrics())
+    org = fw._id
+    for state, n in m["totals"].items():
+        assert s[f'firewall_packets_total{{organism="{org}",state="{state}"}}'] == str(n)
+    assert float(s[f'firewall_energy{{organism="{org}"}}']) == m["energy"]
+
+
+@pytest.mark.parametrize("raw", ["", " , ", "0", "1,-5", "nan", "fast"])
+def test_bad_telemetry_horizons_fail_at_import(firewall, raw):
+    with pytest.raises(ValueError, match="FIREWALL_TELEMETRY_HORIZONS"):
+        firewall._telemetry_horizons(raw)
+
+
+def test_telemetry_horizons_parse(firewall):
+    assert firewall._telemetry_horizons("1, 10,60,") == (1.0, 10.0, 60.0)
+    assert firewall._telemetry_horizons("0.5") == (0.5,)
@@ -0,0 +1,96 @@
+import json
+import os
+
+
+def _feed(fw, packets, seed=0):
+    for i in range(packets):
+        fw.process_packet({"signal_a": 0.01 * ((i + seed) % 100), "signal_b": 0.4, "signal_c": 0.3})
+
+
+def _rotated_chain(firewall, tmp_path, monkeypatch, packets=400):
+    # a chain small enough to rotate every few dozen records
+    monkeypatch.setattr(firewall, "CHAIN_MAX_MB", 0.01)
+    path = str(tmp_path / "c.jsonl")
+    fw = firewall.TernaryServerFirewall(seed=11, chain_path=path)
+    _feed(fw, packets)
+    fw.close()
+    return path
+
+
+def _tamper(fp):
+    with open(fp, encoding="utf-8") as f:
+        lines = f.readlines()
+    for k, line in enumerate(lines):
+        rec = json.loads(line)
+        if "score" in (rec.get("payload") or {}):
+            rec["payload"]["score"] += 1.0
+            lines[k] = json.dumps(rec, separators=(",", ":")) + "\n"
+            break
+    else:
+        raise AssertionError("no scored record in " + fp)
+    with open(fp, "w", encoding="utf-8") as f:
+        f.writelines(lines)
+
+
+def test_process_pool_matches_serial_across_rotations(firewall, tmp_path, monkeypatch):
+    path = _rotated_chain(firewall, tmp_path, monkeypatch)
+    segs = firewall.chain_segments(path)
+    assert len(segs) >= 4
+    serial = firewall.verify_chain_report(path, workers=1)
+    pooled = firewall.verify_chain_report(path, workers=3)
+    assert serial["ok"] and serial == pooled
+    _tamper(segs[1])
+    assert firewall.verify_chain_report(path, workers=3)["fail"] == "digest mismatch"
+
+
+def test_verify_from_genesis_by_default(firewall, tmp_path, monkeypatch):
+    path = _rotated_chain(firewall, tmp_path, monkeypatch)
+    assert firewall.verify_chain(path, workers=1, checkpoint=True)[0]
+    assert firewall.load_checkpoint(path) is not None
+    _tamper(firewall.chain_segments(path)[0])
+    # the plain call ignores the checkpoint and sees the edit behind it
+    assert not firewall.verify_chain(path, workers=1)[0]
+
+
+def test_incremental_verify_resumes_from_checkpoint(firewall, tmp_path, monkeypatch):
+    monkeypatch.setattr(firewall, "CHAIN_MAX_MB", 0.01)
+    path = str(tmp_path / "c.jsonl")
+    fw = firewall.TernaryServerFirewall(seed=11, chain_path=path)
+    _feed(fw, 300)
+    fw.flush_chain()
+    first = firewall.verify_chain_report(path, workers=1, checkpoint=True)
+    assert first == firewall.verify_chain_report(path, workers=1)
+    ck = firewall.load_checkpoint(path)
+    assert ck["count"] == first["records"]
+
+    _feed(fw, 100, seed=7)
+    fw.close()
+    again = firewall.verify_chain_report(path, workers=2, checkpoint=True)
+    assert again == firewall.verify_chain_report(path, workers=1)
+    assert again["records"] > first["records"]
+    assert firewall.load_checkpoint(path)["count"] == again["records"]
+    # one checkpoint kept, not one per run
+    with open(path + ".checkpoints.jsonl", encoding="utf-8") as f:
+        assert len(f.read().splitlines()) == 1
+
+
+def test_checkpoint_off_a_record_boundary_is_ignored(firewall, tmp_path, monkeypatch):
+    path = _rotated_chain(firewall, tmp_path, monkeypatch, packets=60)
+    assert firewall.verify_chain(path, workers=1, checkpoint=True)[0]
+    ck = firewall.load_checkpoint(path)
+    seg = next(fp for fp in firewall.chain_segments(path)
+               if firewall._segment_head(fp) == ck["segment_head"])
+    assert not firewall._on_boundary(seg, ck["offset"] - 1)
+    bad = dict(ck, offset=ck["offset"] - 1, digest="0" * 64)
+    assert firewall.write_checkpoint(path, bad)
+    # a checkpoint that no longer sits after a record falls back to genesis
+    rep = firewall.verify_chain_report(path, workers=1, checkpoint=True)
+    assert rep["ok"] and rep["records"] == ck["count"]
+
+
+def test_unwritable_checkpoint_leaves_the_verify_result(firewall, tmp_path, monkeypatch):
+    path = _rotated_chain(firewall, tmp_path, monkeypatch, packets=60)
+    # a directory where the checkpoint file is staged: every write fails with OSError
+    os.mkdir(path + ".checkpoints.jsonl.tmp")
+    assert firewall.verify_chain(path, workers=1, checkpoint=True)[0]
+    assert firewall.load_checkpoint(path) is None
@@ -0,0 +1,97 @@
+import json
+
+import pytest
+
+import introspection_false_positive as ifp
+
+HOUR = 3600
+
+
+def _ts(t):
+    return ifp._iso(t)
+
+
+def _pair(i, t, decision="OBJECT"):
+    ev = {"kind": "event", "digest": f"e{i}", "payload": {
+        "event_id": f"ev-{i}", "ts": _ts(t), "state": "CRITICAL", "score": 0.8, "hi": 0.75, "lo": 0.65,
+        "signals": {"signal_a": 0.3, "signal_b": 1.2}}}
+    res = {"kind": "resolution", "digest": f"r{i}", "payload": {
+        "source_event_id": f"ev-{i}", "ts": _ts(t + 1), "decision": decision, "resolver_source": "ops"}}
+    return [ev, res]
+
+
+def _write(path, recs, mode="w"):
+    with open(path, mode, encoding="utf-8") as f:
+        for r in recs:
+            f.write(json.dumps(r) + "\n")
+
+
+def _rows(sc):
+    return len(sc.columns()["sig"])
+
+
+@pytest.fixture(params=["jsonl", "firewall"])
+def follow(request, monkeypatch):
+    if request.param == "firewall":
+        fw = request.getfixturevalue("firewall")
+        monkeypatch.setattr(ifp, "follow_chain", fw.follow_chain)
+        monkeypatch.setattr(ifp, "_HAS_FIREWALL", True)
+    else:
+        monkeypatch.setattr(ifp, "_HAS_FIREWALL", False)
+    return request.param
+
+
+def _scanner(path, **kw):
+    sc = ifp.FalsePositiveScanner(str(path), **kw)
+    sc.load()
+    sc.update()
+    sc.save()
+    return sc
+
+
+def test_incremental_runs_read_only_new_records(follow, tmp_path):
+    path = tmp_path / "chain.jsonl"
+    t0 = 1_700_000_000 - 1_700_000_000 % HOUR
+    _write(path, [r for i in range(10) for r in _pair(i, t0 + i)])
+    assert _rows(_scanner(path)) == 10
+    _write(path, [r for i in range(10, 15) for r in _pair(i, t0 + i)], mode="a")
+    sc = _scanner(path)
+    assert _rows(sc) == 15
+    assert sc.stats["records"] == 30 and sc.stats["restarts"] == 0
+
+
+def test_lost_segment_restarts_without_double_counting(follow, tmp_path):
+    path = tmp_path / "chain.jsonl"
+    t0 = 1_700_000_000 - 1_700_000_000 % HOUR
+    _write(path, [r for i in range(10) for r in _pair(i, t0 + i)])
+    assert _rows(_scanner(path)) == 10
+    # a new genesis: the cursor's segment is gone
+    _write(path, [r for i in range(100, 106) for r in _pair(i, t0 + i)])
+    sc = _scanner(path)
+    assert sc.stats["restarts"] == 1
+    assert _rows(sc) == 6
+
+
+def test_cursor_off_a_record_boundary_restarts(follow, tmp_path):
+    path = tmp_path / "chain.jsonl"
+    t0 = 1_700_000_000 - 1_700_000_000 % HOUR
+    recs = [r for i in range(10) for r in _pair(i, t0 + i)]
+    _write(path, recs)
+    assert _rows(_scanner(path)) == 10
+    # same first record, but the old offset now falls inside a longer line
+    recs[1]["payload"]["notes"] = "x" * 64
+    _write(path, recs[:12])
+    sc = _scanner(path)
+    assert sc.stats["restarts"] == 1
+    assert _rows(sc) == 6
+
+
+def test_lookback_is_a_time_horizon(follow, tmp_path):
+    path = tmp_path / "chain.jsonl"
+    t0 = 1_700_000_000 - 1_700_000_000 % HOUR
+    recs = _pair(0, t0) + _pair(1, t0 + HOUR) + _pair(2, t0 + 100 * HOUR) + _pair(3, t0 + 101 * HOUR)
+    _write(path, recs)
+    sc = _scanner(path, lookback=3)
+    # the last three window keys would reach back 100 hours; only the last 3 hours count
+    assert sorted(sc.windows) == [t0 + 100 * HOUR, t0 + 101 * HOUR]
+    assert _rows(sc) == 2
@@ -0,0 +1,114 @@
+import hashlib
+import hmac
+import json
+import threading
+
+KEY = b"test-key"
+
+
+def _records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(ln) for ln in f if ln.strip()]
+
+
+def _check_links(recs):
+    prev = None
+    for r in recs:
+        assert r["prev"] == prev
+        body = json.dumps({"prev": prev, "payload": r["payload"]}, sort_keys=True, separators=(",", ":"))
+        assert r["digest"] == hmac.new(KEY, body.encode("utf-8"), hashlib.sha256).hexdigest()
+        prev = r["digest"]
+
+
+def test_failed_write_does_not_move_the_head(json_logger, tmp_path, monkeypatch):
+    path = str(tmp_path / "log.jsonl")
+    lg = json_logger.JsonLogger(path, signer_key=KEY)
+    assert lg.append("a", {"n": 1})
+    real = lg._write_lines
+    fail = threading.Event()
+    fail.set()
+
+    def flaky(lines):
+        if fail.is_set() and lines:
+            fail.clear()
+            raise OSError("disk full")
+        real(lines)
+
+    monkeypatch.setattr(lg, "_write_lines", flaky)
+    assert lg.append("b", {"n": 2}) == ""
+    assert lg.append("c", {"n": 3})
+    lg.stop()
+    recs = _records(path)
+    assert [r["payload"]["n"] for r in recs] == [1, 3]
+    _check_links(recs)
+    assert lg.stats()["write_errors"] == 1 and lg.stats()["written"] == 2
+
+
+def test_failed_rotation_releases_every_ticket(json_logger, tmp_path, monkeypatch):
+    path = str(tmp_path / "log.jsonl")
+    lg = json_logger.JsonLogger(path, signer_key=KEY, rotate_mb=0)
+
+    def broken():
+        raise OSError("cannot rotate")
+
+    monkeypatch.setattr(lg, "_rotate", broken)
+    got = []
+    ts = [threading.Thread(target=lambda i=i: got.append(lg.append("x", {"n": i}, timeout=5))) for i in range(4)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join(10)
+    assert not any(t.is_alive() for t in ts)
+    lg.stop()
+    assert got == ["", "", "", ""]
+
+
+def test_drop_oldest_never_evicts_append_records(json_logger, tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    lg = json_logger.JsonLogger(path, signer_key=KEY, queue_size=2, block_timeout_s=5.0)
+    gate = threading.Event()
+    real = lg._drain
+
+    def held(first):
+        gate.wait(10)
+        return real(first)
+
+    lg._drain = held
+    lg.info("in the writer")
+    # the writer is parked on its first record; fill the queue with appends
+    res = []
+    ts = [threading.Thread(target=lambda i=i: res.append(lg.append("keep", {"n": i}))) for i in range(2)]
+    for t in ts:
+        t.start()
+    while lg._q.qsize() < 2:
+        pass
+    for _ in range(5):
+        lg.info("overflow")
+    gate.set()
+    for t in ts:
+        t.join(10)
+    lg.stop()
+    assert all(res) and len(res) == 2
+    recs = _records(path)
+    assert sorted(r["payload"]["n"] for r in recs if r["kind"] == "keep") == [0, 1]
+    assert lg.stats()["dropped"]["info"] == 5
+    _check_links(recs)
+
+
+def test_concurrent_producers_keep_one_chain(json_logger, tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    lg = json_logger.JsonLogger(path, signer_key=KEY, overflow="block", block_timeout_s=5.0, queue_size=64)
+
+    def produce(k):
+        for i in range(300):
+            lg.info("m", k=k, i=i)
+
+    ts = [threading.Thread(target=produce, args=(k,)) for k in range(4)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    lg.stop()
+    recs = _records(path)
+    assert len(recs) == 1200
+    _check_links(recs)
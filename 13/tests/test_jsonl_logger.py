@@ -0,0 +1,81 @@
+import json
+import threading
+import time
+
+import pytest
+
+from utils.jsonl_logger import AsyncSpill, JSONLLogger
+
+
+def _lines(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def test_unserializable_entry_leaves_no_partial_line(tmp_path):
+    lg = JSONLLogger(str(tmp_path), run_id="t")
+    lg.write({"a": 1})
+    with pytest.raises(TypeError):
+        lg.write({"b": 2, "bad": object()})
+    lg.write({"c": 3})
+    lg.close()
+    assert [json.loads(ln) for ln in _lines(lg.path)] == [{"a": 1}, {"c": 3}]
+
+
+class _FlakyLogger:
+    def __init__(self):
+        self.rows = []
+        self.closed = False
+
+    def write(self, entry):
+        if entry.get("fail"):
+            raise OSError(28, "No space left on device")
+        self.rows.append(entry)
+
+    def close(self):
+        self.closed = True
+
+
+def test_disk_errors_are_counted_and_the_writer_keeps_going():
+    lg = _FlakyLogger()
+    sp = AsyncSpill(lg, max_pending=4)
+    for i in range(20):
+        sp.submit({"i": i, "fail": i % 5 == 0})
+    sp.flush()
+    assert sp.errors == 4 and sp.written == 16
+    assert [r["i"] for r in lg.rows] == [i for i in range(20) if i % 5]
+    sp.close()
+    assert lg.closed
+
+
+# the writer thread is killed on purpose
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_submit_fails_fast_once_the_writer_is_gone():
+    gate = threading.Event()
+
+    class _Stuck(_FlakyLogger):
+        def write(self, entry):
+            gate.wait(10)
+            raise MemoryError  # not an error the writer handles: the thread dies
+
+    sp = AsyncSpill(_Stuck(), max_pending=1)
+    sp.submit({"i": 0})
+    sp.submit({"i": 1})
+    t0 = time.monotonic()
+    done = threading.Event()
+    outcome = []
+
+    def blocked():
+        try:
+            sp.submit({"i": 2})
+        except RuntimeError as e:
+            outcome.append(str(e))
+        done.set()
+
+    threading.Thread(target=blocked, daemon=True).start()
+    gate.set()
+    assert done.wait(5)
+    assert outcome and "not running" in outcome[0]
+    assert time.monotonic() - t0 < 5
+    with pytest.raises(RuntimeError):
+        sp.submit({"i": 3})
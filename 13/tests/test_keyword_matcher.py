@@ -0,0 +1,54 @@
+import random
+
+from utils.keyword_matcher import KeywordAutomaton
+
+
+def _naive(sets, text):
+    hits = {}
+    for tag, words in sets.items():
+        for w in words:
+            if w and w in text:
+                hits.setdefault(tag, []).append(w)
+    return hits
+
+
+def _norm(hits):
+    return {tag: sorted(words) for tag, words in hits.items()}
+
+
+def test_matches_substring_check_on_random_text():
+    rng = random.Random(7)
+    alphabet = "abc"
+    sets = {("t", i): ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(5)]
+            for i in range(6)}
+    ac = KeywordAutomaton(sets)
+    for _ in range(300):
+        text = "".join(rng.choice(alphabet + " ") for _ in range(rng.randint(0, 30)))
+        assert _norm(ac.scan(text)) == _norm(_naive(sets, text))
+
+
+def test_overlaps_suffixes_and_duplicates():
+    sets = {"a": ["he", "she", "hers", "he"], "b": ["his", "she"], "c": [""]}
+    ac = KeywordAutomaton(sets)
+    assert len(ac) == 4
+    hits = ac.scan("ushers")
+    assert sorted(hits["a"]) == ["he", "he", "hers", "she"]
+    assert hits["b"] == ["she"]
+    assert "c" not in hits
+    assert ac.scan("") == {}
+
+
+def test_from_master_docs_tags_by_stage():
+    docs = {
+        "stage_02": {"rules": {"signal": ["pattern", "fractal"], "noise": ["random"]}},
+        "stage_04": {"rules": {"is_natural": ["fractal", "weather"]}},
+        "stage_08": {"non_negotiables": ["ecosystem_collapse"]},
+    }
+    ac = KeywordAutomaton.from_master_docs(docs, extra={("harm", "words"): ["hazard"]})
+    hits = ac.scan("a fractal weather hazard near ecosystem_collapse")
+    assert hits == {
+        ("stage_02", "signal"): ["fractal"],
+        ("stage_04", "is_natural"): ["fractal", "weather"],
+        ("stage_08", "non_negotiables"): ["ecosystem_collapse"],
+        ("harm", "words"): ["hazard"],
+    }
@@ -0,0 +1,81 @@
+import json
+import pickle
+from types import MappingProxyType
+
+import pytest
+
+from utils.log_ring import FrozenDict, LogRing, LogView, freeze
+
+
+def test_full_ring_spills_oldest_and_keeps_seq():
+    spilled = []
+    ring = LogRing(3, spill=spilled.append)
+    for i in range(5):
+        ring.append(i)
+    assert spilled == [0, 1]
+    assert list(ring) == [2, 3, 4]
+    assert ring.first_seq == 2 and ring.total == 5
+    assert ring.entry(4) == 4 and ring[-1] == 4 and ring[0:2] == [2, 3]
+    with pytest.raises(IndexError):
+        ring.entry(1)
+    with pytest.raises(ValueError):
+        LogRing(0)
+
+
+def test_view_is_stable_until_eviction():
+    ring = LogRing(4)
+    for i in range(3):
+        ring.append(i)
+    view = LogView(ring)
+    ring.append(3)
+    assert len(view) == 3 and list(view) == [0, 1, 2] and view[-1] == 2
+    assert view[1:] == (1, 2)
+    ring.append(4)
+    with pytest.raises(IndexError):
+        view[0]
+    assert view[2] == 2
+
+
+def test_view_over_a_list():
+    log = ["a", "b"]
+    view = LogView(log)
+    log.append("c")
+    assert list(view) == ["a", "b"]
+
+
+def test_drain_spills_in_order_and_resets():
+    spilled = []
+    ring = LogRing(3, spill=spilled.append)
+    for i in range(4):
+        ring.append(i)
+    ring.drain()
+    assert spilled == [0, 1, 2, 3]
+    assert len(ring) == 0 and ring.total == 0
+    ring.append("x")
+    assert list(ring) == ["x"]
+
+
+def test_frozen_entries_are_read_only_all_the_way_down():
+    raw = {"sensor": {"temp": 25, "tags": ["a", "b"]}, "ids": {1, 2}}
+    ring = LogRing(4)
+    ring.append(MappingProxyType({"stage": "Stage 1 - Ingress", "data": freeze(raw)}))
+    view = LogView(ring)
+    raw["sensor"]["temp"] = 99
+    raw["sensor"]["tags"].append("c")
+    data = view[0]["data"]
+    assert data["sensor"]["temp"] == 25 and data["sensor"]["tags"] == ("a", "b")
+    assert data["ids"] == frozenset({1, 2})
+    with pytest.raises(TypeError):
+        data["sensor"]["x"] = 1
+    with pytest.raises(TypeError):
+        data.update(x=1)
+    with pytest.raises(TypeError):
+        view[0]["data"] = {}
+
+
+def test_frozen_data_still_serializes():
+    data = freeze({"a": {"b": [1, 2.5, None]}, "c": "d"})
+    assert json.loads(json.dumps(dict(MappingProxyType({"data": data})))) == {"data": {"a": {"b": [1, 2.5, None]}, "c": "d"}}
+    back = pickle.loads(pickle.dumps(data))
+    assert isinstance(back, FrozenDict) and back == data
+    assert freeze(data) is data
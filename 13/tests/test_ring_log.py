@@ -0,0 +1,133 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+import ring_log
+from ring_log import RingLog, RingReader, drain
+
+
+def _chain(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(ln) for ln in f if ln.strip()]
+
+
+def test_threads_get_unique_seqs_and_drain_in_order(tmp_path):
+    ring = str(tmp_path / "r.ring")
+    log = RingLog(ring, slots=4096)
+    kind = log.register("packet", ("score", "hi", "lo"))
+    seqs = []
+    lock = threading.Lock()
+
+    def produce(n):
+        mine = [log.log(kind, 20, float(n), float(i), 0.5, n=3) for i in range(500)]
+        with lock:
+            seqs.extend(mine)
+
+    ts = [threading.Thread(target=produce, args=(n,)) for n in range(4)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    log.close()
+    assert sorted(seqs) == list(range(2000))
+
+    out = str(tmp_path / "chain.jsonl")
+    rep = drain(ring, out)
+    assert rep == {"written": 2000, "next_seq": 2000, "lost": 0, "skipped": 0}
+    recs = _chain(out)
+    assert [r["payload"]["seq"] for r in recs] == list(range(2000))
+    assert recs[0]["kind"] == "packet"
+    assert set(recs[0]["payload"]["fields"]) == {"score", "hi", "lo"}
+    prev = None
+    for r in recs:
+        assert r["prev"] == prev
+        assert r["digest"] == ring_log.signed_digest(prev, r["payload"])
+        prev = r["digest"]
+
+
+def test_drain_resumes_and_reopen_continues_seq(tmp_path):
+    ring = str(tmp_path / "r.ring")
+    out = str(tmp_path / "chain.jsonl")
+    log = RingLog(ring, slots=64)
+    k = log.register("tick")
+    for i in range(10):
+        log.log(k, 20, float(i))
+    log.close()
+    assert drain(ring, out)["written"] == 10
+
+    log = RingLog(ring, slots=64)
+    assert log.register("tick") == k
+    assert log.log(k, 20, 99.0) == 10
+    log.close()
+    rep = drain(ring, out)
+    assert rep["written"] == 1 and rep["next_seq"] == 11
+    recs = _chain(out)
+    assert [r["payload"]["seq"] for r in recs] == list(range(11))
+    assert recs[10]["prev"] == recs[9]["digest"]
+
+
+def test_lapped_reader_counts_lost_records(tmp_path):
+    ring = str(tmp_path / "r.ring")
+    log = RingLog(ring, slots=8)
+    k = log.register("tick")
+    for i in range(20):
+        log.log(k, 20, float(i))
+    log.close()
+    rd = RingReader(ring)
+    try:
+        got = [seq for seq, _ in rd.read(0)]
+    finally:
+        rd.close()
+    assert got == list(range(12, 20))
+    assert rd.lost == 12
+
+
+def test_one_producer_per_ring(tmp_path):
+    ring = str(tmp_path / "r.ring")
+    log = ring_log.open_ring(ring, slots=64)
+    assert ring_log.open_ring(ring) is log
+    with pytest.raises(RuntimeError):
+        RingLog(ring, slots=64)
+    other = subprocess.run([sys.executable, "-c", f"import ring_log; ring_log.RingLog({ring!r})"],
+                           cwd=os.path.dirname(ring_log.__file__), capture_output=True, text=True)
+    assert other.returncode != 0 and "already has a producer" in other.stderr
+    log.close()
+    again = ring_log.open_ring(ring)
+    assert again is not log
+    again.close()
+
+
+def test_organisms_in_one_process_share_the_ring(firewall, tmp_path):
+    ring = str(tmp_path / "fw.ring")
+    fws = [firewall.TernaryServerFirewall(seed=i, chain_path=str(tmp_path / f"c{i}.jsonl"), ring_path=ring)
+           for i in range(2)]
+    assert fws[0]._ring is fws[1]._ring
+    for i in range(50):
+        for fw in fws:
+            fw.process_packet({"signal_a": 0.1 * (i % 10), "signal_b": 0.5, "signal_c": 0.2})
+    for fw in fws:
+        fw.close()
+    fws[0]._ring.close()
+    rep = drain(ring, str(tmp_path / "ring.chain.jsonl"))
+    assert rep["written"] == 100 and rep["lost"] == 0
+
+
+def test_shards_log_to_their_own_rings(firewall, tmp_path, monkeypatch):
+    ring = str(tmp_path / "fw.ring")
+    monkeypatch.setattr(firewall, "RING_LOG_PATH", ring)
+    sh = firewall.ShardedFirewall(shards=2, chain_path=str(tmp_path / "chain.jsonl"), seal_every_s=0, batch=16)
+    for i in range(200):
+        sh.submit({"signal_a": 0.01 * (i % 100), "signal_b": 0.4, "signal_c": 0.3, "service_id": f"svc{i % 7}"})
+    metrics = sh.close()
+    written = 0
+    for i in range(2):
+        path = firewall.shard_chain_path(ring, i)
+        rep = drain(path, str(tmp_path / f"ring{i}.chain.jsonl"))
+        recs = _chain(str(tmp_path / f"ring{i}.chain.jsonl"))
+        assert [r["payload"]["seq"] for r in recs] == list(range(rep["written"]))
+        written += rep["written"]
+    assert written == 200 == sum(sum(m["totals"].values()) for m in metrics)
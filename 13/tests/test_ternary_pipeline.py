@@ -0,0 +1,119 @@
+import random
+import threading
+
+import numpy as np
+import pytest
+
+import ternary
+from ternary import Pipeline, Stage, Ternary
+
+PIPES = [ternary.COOKIE_PIPE, ternary.FOREST_PIPE, ternary.SLEEP_PIPE, ternary.ICECREAM_PIPE]
+FLOATS = ("bio_risk", "bio_mitigation", "immediate_need", "health_impact", "health_certainty",
+          "timing", "regen_strength", "tomorrow_load", "creative_flow", "glycemic_load")
+FLAGS = ("is_last_one", "shared_space", "stop_on_guard")
+
+
+def _ctxs(n, seed=1):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        row = {k: round(rng.random(), 2) for k in FLOATS}
+        row.update({k: rng.random() < 0.5 for k in FLAGS})
+        rows.append(row)
+    return rows
+
+
+def _columns(rows):
+    return {k: np.array([r[k] for r in rows]) for k in rows[0]}
+
+
+@pytest.mark.parametrize("pipe", PIPES, ids=lambda p: p.name)
+def test_run_batch_matches_run(pipe):
+    rows = _ctxs(300)
+    initial = np.array([random.Random(i).choice((-1, 0, 1)) for i in range(len(rows))], dtype=np.int8)
+    out = pipe.run_batch(_columns(rows), initial=initial, trace=True)
+    for i, row in enumerate(rows):
+        ref = pipe.run(row, initial=Ternary(int(initial[i])), narration=False)
+        assert int(out["final"][i]) == ref["final"]
+        ran = [e for e in out["trace"] if e["ran"][i]]
+        assert [(e["stage"], int(e["prior"][i]), int(e["after"][i])) for e in ran] == \
+            [(t["stage"], t["prior"], t["after"]) for t in ref["trace"]]
+
+
+def test_stage_without_vector_twin_falls_back_row_by_row():
+    def st_opaque(ctx, prior):
+        return ternary.ternary_merge(prior, 1 if ctx.get("timing", 0) > 0.5 else -1), "opaque"
+
+    pipe = Pipeline("/opaque", [Stage("guard_biosphere", ternary.st_guard_biosphere, non_negotiable=True),
+                                Stage("opaque", st_opaque)], cache_size=0)
+    rows = _ctxs(50, seed=2)
+    out = pipe.run_batch(_columns(rows))
+    assert [int(v) for v in out["final"]] == [pipe.run(r)["final"] for r in rows]
+
+
+@pytest.mark.parametrize("pipe", PIPES, ids=lambda p: p.name)
+def test_cache_does_not_change_results(pipe):
+    rows = _ctxs(200, seed=3) * 2
+    plain = Pipeline(pipe.name, pipe.stages, cache_size=0)
+    cached = Pipeline(pipe.name, pipe.stages, cache_size=64)
+    for row in rows:
+        assert cached.run(row) == plain.run(row)
+        assert cached.run(row, narration=False) == plain.run(row, narration=False)
+    info = cached.cache_info()
+    assert info.hits > 0 and info.currsize <= 64
+    assert plain.cache_info().currsize == 0
+
+
+def test_equal_values_of_another_kind_do_not_share_entries():
+    row = _ctxs(1)[0]
+    cached = Pipeline("/sleep", ternary.SLEEP_PIPE.stages, cache_size=64)
+    plain = Pipeline("/sleep", ternary.SLEEP_PIPE.stages)
+    for flow in (0.0, -0.0, 0, False):
+        ctx = dict(row, creative_flow=flow)
+        assert cached.run(ctx) == plain.run(ctx)
+
+    def echo(ctx, prior):
+        return Ternary.AFFIRM, f"saw {ctx['x']!r}"
+
+    cached = Pipeline("/echo", [Stage("echo", echo)], cache_size=8)
+    for x in (1, True, 1.0, 0.0, -0.0):
+        assert cached.run({"x": x})["trace"][0].endswith(f"saw {x!r}")
+    assert cached.cache_info().hits == 0
+
+
+def test_cached_result_is_not_shared_with_caller():
+    pipe = Pipeline("/cookie", ternary.COOKIE_PIPE.stages, cache_size=16)
+    row = _ctxs(1)[0]
+    first = pipe.run(row)
+    first["trace"].append("tampered")
+    assert pipe.run(row)["trace"] == Pipeline("/cookie", pipe.stages, cache_size=0).run(row)["trace"]
+
+
+def test_module_pipelines_do_not_cache():
+    for pipe in PIPES:
+        assert pipe.cache_size == 0
+        pipe.run(_ctxs(1)[0])
+        assert pipe.cache_info().currsize == 0
+
+
+def test_cache_shared_between_threads():
+    pipe = Pipeline("/cookie", ternary.COOKIE_PIPE.stages, cache_size=32)
+    plain = Pipeline("/cookie", pipe.stages)
+    rows = _ctxs(100, seed=4)
+    want = [plain.run(r) for r in rows]
+    errors = []
+
+    def worker(n):
+        for i in range(400):
+            k = (i * 7 + n) % len(rows)
+            if pipe.run(rows[k]) != want[k]:
+                errors.append(k)
+
+    ts = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    assert errors == []
+    info = pipe.cache_info()
+    assert info.hits + info.misses >= 8 * 400 and info.currsize <= 32
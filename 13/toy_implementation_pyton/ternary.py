@@ -1,3 +1,4 @@
+from __future__ import annotations
 from enum import IntEnum
 
 # Define ternary values
@@ -27,10 +28,21 @@ new_stance = stage_check_hunger(packet_stance, hungry=None)
 
 print("Initial stance:", packet_stance.name)
 print("After stage:", new_stance.name)
-from __future__ import annotations
+import ast
+import inspect
+import textwrap
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from enum import IntEnum
-from typing import Callable, Dict, List, Optional, Tuple, Any
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Any, Union
+
+try:
+    import numpy as np
+    _HAS_NUMPY = True
+except ImportError:  # run() works without it; run_batch() needs it
+    np = None
+    _HAS_NUMPY = False
 
 # -----------------------------
 # /core: ternary primitives
@@ -63,21 +75,245 @@ class TraceEntry:
 # Stage function signature: (ctx, prior) -> Tuple[Ternary, str]
 StageFn = Callable[[Dict[str, Any], Ternary], Tuple[Ternary, str]]
 
+# Vectorized stage signature: (cols, prior) -> stances, all rows at once.
+# prior and the result are int8 arrays holding -1/0/+1; no reasons.
+VecStageFn = Callable[["Columns", "np.ndarray"], "np.ndarray"]
+
+# scalar stage fn -> vectorized twin, filled by @vectorizes below
+VECTORIZED: Dict[StageFn, VecStageFn] = {}
+
+
+def detect_reads(fn: StageFn) -> Optional[Tuple[str, ...]]:
+    """
+    Find the ctx keys a stage fn reads by looking at its source: every use of
+    the ctx parameter must be ctx.get("literal", ...) or ctx["literal"].
+    Returns None when that can't be established (no source, ctx passed on,
+    computed keys), which leaves the stage uncached.
+    """
+    try:
+        tree = ast.parse(textwrap.dedent(inspect.getsource(fn)))
+    except (OSError, TypeError, SyntaxError):
+        return None
+    func = tree.body[0] if tree.body else None
+    if not isinstance(func, (ast.FunctionDef, ast.AsyncFunctionDef)) or not func.args.args:
+        return None
+    ctx_name = func.args.args[0].arg
+    parents = {child: node for node in ast.walk(func) for child in ast.iter_child_nodes(node)}
+    keys: List[str] = []
+    for node in ast.walk(func):
+        if not (isinstance(node, ast.Name) and node.id == ctx_name):
+            continue
+        up = parents.get(node)
+        if isinstance(up, ast.Subscript) and isinstance(up.slice, ast.Constant):
+            key = up.slice.value
+        elif (isinstance(up, ast.Attribute) and up.attr == "get"
+              and isinstance(parents.get(up), ast.Call) and parents[up].args
+              and isinstance(parents[up].args[0], ast.Constant)):
+            key = parents[up].args[0].value
+        else:
+            return None
+        if not isinstance(key, str):
+            return None
+        if key not in keys:
+            keys.append(key)
+    return tuple(keys)
+
 
 @dataclass
 class Stage:
     name: str
     fn: StageFn
     non_negotiable: bool = False  # ecocentric safeguards, cannot be skipped
+    vec: Optional[VecStageFn] = None  # batch version; defaults to VECTORIZED[fn]
+    # ctx keys fn depends on; None = detect from source, still None = don't cache
+    reads: Optional[Tuple[str, ...]] = None
+
+    def __post_init__(self):
+        if self.reads is None:
+            self.reads = detect_reads(self.fn)
+        else:
+            self.reads = tuple(self.reads)
+
+
+def _copy_result(res: Dict[str, Any]) -> Dict[str, Any]:
+    # cached results are handed out as copies so callers can't edit the cache
+    out = dict(res)
+    if "trace" in out:
+        out["trace"] = [dict(t) if isinstance(t, dict) else t for t in out["trace"]]
+    return out
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+_MISSING = object()
+
+
+def _cache_key(values: Tuple[Any, ...]) -> Tuple[Any, ...]:
+    # equal is not enough: 1 == True == 1.0 and 0.0 == -0.0 narrate differently,
+    # so tag each value with its type and keep the sign of a zero float
+    return tuple([
+        (float, repr(v)) if type(v) is float and v == 0.0 else (type(v), v)
+        for v in values
+    ])
+
+
+class Columns:
+    """
+    Column view over a batch of scenarios for vectorized stages.
+    Accepts a dict of arrays/lists/scalars or a pandas DataFrame. Missing
+    columns read as the same default the scalar stage uses with ctx.get().
+    """
+
+    def __init__(self, data: Any):
+        if not _HAS_NUMPY:
+            raise RuntimeError("batch evaluation needs numpy")
+        if hasattr(data, "columns") and hasattr(data, "to_numpy"):  # pandas DataFrame
+            self._data = {str(c): data[c].to_numpy() for c in data.columns}
+            self.n = len(data)
+        else:
+            self._data = dict(data)
+            lengths = {len(v) for v in self._data.values() if np.ndim(v) > 0}
+            if len(lengths) > 1:
+                raise ValueError(f"columns have different lengths: {sorted(lengths)}")
+            self.n = lengths.pop() if lengths else 1
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def _get(self, key: str, default: Any, dtype) -> "np.ndarray":
+        if key not in self._data:
+            return np.full(self.n, default, dtype=dtype)
+        return np.broadcast_to(np.asarray(self._data[key], dtype=dtype), (self.n,))
+
+    def num(self, key: str, default: float) -> "np.ndarray":
+        return self._get(key, default, np.float64)
+
+    def flag(self, key: str, default: bool) -> "np.ndarray":
+        return self._get(key, default, bool)
+
+    def row(self, i: int) -> Dict[str, Any]:
+        """ctx dict for row i, for stages that have no vectorized twin."""
+        out = {}
+        for k, v in self._data.items():
+            v = v[i] if np.ndim(v) > 0 else v
+            out[k] = v.item() if hasattr(v, "item") else v
+        return out
+
+
+def _rowwise(fn: StageFn) -> VecStageFn:
+    # slow path: call the scalar stage once per row
+    def vec(cols: Columns, prior: "np.ndarray") -> "np.ndarray":
+        return np.fromiter(
+            (int(fn(cols.row(i), Ternary(int(p)))[0]) for i, p in enumerate(prior)),
+            dtype=np.int8, count=len(prior),
+        )
+    return vec
 
 
 class Pipeline:
-    def __init__(self, name: str, stages: List[Stage]):
+    def __init__(
+        self,
+        name: str,
+        stages: List[Stage],
+        cache_size: int = 0,
+        quantize: Union[None, float, Dict[str, float]] = None,
+    ):
+        """
+        - cache_size: LRU entries keyed on (stage fn, prior, values of stage.reads,
+          each with its type, so 1 and True or 0.0 and -0.0 never share an entry);
+          0 (the default) disables. Opt in only when every stage is pure: reads
+          only says which ctx keys a stage looks at, so a stage that also
+          consults globals, time or randomness gets stale answers from the
+          cache. Stages whose reads are unknown always execute. The cache is
+          locked, so a cached pipeline can be shared between threads.
+        - quantize: bucket width for float inputs, one for all (float) or per key
+          (dict, "*" as fallback). Applies to cached stages only: values are
+          snapped to their bucket before the stage sees them, so a hit and a
+          miss for the same bucket always agree.
+        """
         # Always sort so non-negotiables run first while preserving relative order otherwise
         nn = [s for s in stages if s.non_negotiable]
         rest = [s for s in stages if not s.non_negotiable]
         self.name = name
         self.stages = nn + rest
+        self.cache_size = cache_size
+        self.quantize = {"*": quantize} if isinstance(quantize, (int, float)) else dict(quantize or {})
+        self._cache: "OrderedDict[Any, Any]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        # every key any stage reads, plus the guard switch; None if any stage is opaque
+        reads = [s.reads for s in self.stages]
+        self._run_reads: Optional[Tuple[str, ...]] = None
+        if all(r is not None for r in reads):
+            self._run_reads = tuple(dict.fromkeys([k for r in reads for k in r] + ["stop_on_guard"]))
+
+    def cache_info(self) -> CacheInfo:
+        with self._cache_lock:
+            return CacheInfo(self._hits, self._misses, self.cache_size, len(self._cache))
+
+    def cache_clear(self) -> None:
+        with self._cache_lock:
+            self._cache.clear()
+            self._hits = self._misses = 0
+
+    def _bucket(self, key: str, value: Any) -> Any:
+        step = self.quantize.get(key, self.quantize.get("*"))
+        if not step or not isinstance(value, float):
+            return value
+        # round twice so 3 * 0.1 comes back as 0.3, not 0.30000000000000004
+        return round(round(value / step) * step, 12)
+
+    def _values(self, reads: Tuple[str, ...], ctx: Dict[str, Any]) -> Tuple[Any, ...]:
+        if not self.quantize:
+            return tuple([ctx.get(k, _MISSING) for k in reads])
+        return tuple([self._bucket(k, ctx.get(k, _MISSING)) for k in reads])
+
+    def _lookup(self, key: Any) -> Any:
+        with self._cache_lock:
+            try:
+                hit = self._cache.get(key)
+            except TypeError:  # unhashable ctx value: treat as uncacheable
+                return _MISSING
+            if hit is None:
+                self._misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self._hits += 1
+            return hit
+
+    def _store(self, key: Any, value: Any) -> None:
+        # stages run outside the lock, so two threads may store the same key
+        with self._cache_lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _call(self, stage: Stage, ctx: Dict[str, Any], prior: Ternary) -> Tuple[Ternary, str]:
+        if not self.cache_size or stage.reads is None:
+            return stage.fn(ctx, prior)
+        values = self._values(stage.reads, ctx)
+        key = (stage.fn, int(prior), _cache_key(values))
+        hit = self._lookup(key)
+        if hit is _MISSING:
+            return stage.fn(ctx, prior)
+        if hit is not None:
+            return hit
+        if self.quantize:
+            ctx = dict(ctx)
+            ctx.update((k, v) for k, v in zip(stage.reads, values) if v is not _MISSING)
+        out = stage.fn(ctx, prior)
+        self._store(key, out)
+        return out
 
     def run(
         self,
@@ -85,6 +321,7 @@ class Pipeline:
         initial: Ternary = Ternary.HOLD,
         narration: bool = True,
         subset: Optional[List[str]] = None,
+        trace: bool = True,
     ) -> Dict[str, Any]:
         """
         Run a packet (ctx) through the pipeline.
@@ -92,34 +329,53 @@ class Pipeline:
         - initial: starting stance (-1/0/+1).
         - narration: include textual reasons.
         - subset: optional list of stage names to run (non-negotiables will run regardless).
+        - trace: False skips building the trace; only the final stance is returned.
         Returns dict with final stance and trace (narrated or raw).
+        A repeated scenario (same initial, options and values of every key the
+        stages read) is answered from the cache without running any stage.
         """
-        trace: List[TraceEntry] = []
-
-        # Respect dynamic subsetting but ensure non-negotiables are always included
-        active: List[Stage] = []
-        if subset is not None:
-            wanted = set(subset)
-            for s in self.stages:
-                if s.non_negotiable or s.name in wanted:
-                    active.append(s)
-        else:
-            active = list(self.stages)
+        run_key = None
+        if self.cache_size and self._run_reads is not None:
+            run_key = ("run", int(initial), narration, trace,
+                       tuple(subset) if subset is not None else None,
+                       _cache_key(self._values(self._run_reads, ctx)))
+            hit = self._lookup(run_key)
+            if hit is _MISSING:
+                run_key = None
+            elif hit is not None:
+                return _copy_result(hit)
+        out = self._run(ctx, initial, narration, subset, trace)
+        if run_key is not None:
+            self._store(run_key, _copy_result(out))
+        return out
+
+    def _run(
+        self,
+        ctx: Dict[str, Any],
+        initial: Ternary,
+        narration: bool,
+        subset: Optional[List[str]],
+        trace: bool,
+    ) -> Dict[str, Any]:
+        entries: List[TraceEntry] = []
 
         stance = initial
-        for stage in active:
+        for stage in self._active(subset):
             prior = stance
-            stance, why = stage.fn(ctx, prior)
-            trace.append(TraceEntry(stage=stage.name, prior=prior, after=stance, reason=why))
+            stance, why = self._call(stage, ctx, prior)
+            if trace:
+                entries.append(TraceEntry(stage=stage.name, prior=prior, after=stance, reason=why))
 
             # Short-circuit: if a non-negotiable drives NEG hard and ctx forbids override, we can stop
             if stage.non_negotiable and stance == Ternary.NEG and ctx.get("stop_on_guard", True):
                 break
 
+        if not trace:
+            return {"pipeline": self.name, "final": int(stance), "final_str": str(stance)}
         if narration:
             narrated = [
                 f"{i+1:02d}. {t.stage}: {t.prior}->{t.after} :: {t.reason}"
-                for i, t in enumerate(trace)
+                for i, t in enumerate(entries)
             ]
             return {
                 "pipeline": self.name,
@@ -134,7 +390,7 @@ class Pipeline:
                     "prior": int(t.prior),
                     "after": int(t.after),
                 }
-                for t in trace
+                for t in entries
             ]
             return {
                 "pipeline": self.name,
@@ -142,18 +398,72 @@ class Pipeline:
                 "trace": raw,
             }
 
+    def _active(self, subset: Optional[List[str]]) -> List[Stage]:
+        # Respect dynamic subsetting but ensure non-negotiables are always included
+        if subset is None:
+            return list(self.stages)
+        wanted = set(subset)
+        return [s for s in self.stages if s.non_negotiable or s.name in wanted]
+
+    def run_batch(
+        self,
+        ctxs: Any,
+        initial: Any = Ternary.HOLD,
+        subset: Optional[List[str]] = None,
+        trace: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Run many scenarios at once, one column per ctx key.
+        - ctxs: dict of equal-length arrays (or scalars) or a pandas DataFrame.
+        - initial: starting stance, scalar or one per row.
+        - subset: as in run().
+        - trace: also return per-stage prior/after arrays; off by default.
+        Stages run as vectorized functions (Stage.vec / VECTORIZED); a stage with
+        no twin falls back to its scalar fn row by row. stop_on_guard becomes a
+        row mask: once a non-negotiable drives a row to NEG, later stages leave
+        that row alone, exactly like the break in run().
+        Returns {"pipeline", "final": int8 array, "trace": [...] if trace}.
+        """
+        cols = ctxs if isinstance(ctxs, Columns) else Columns(ctxs)
+        stance = np.array(np.broadcast_to(np.asarray(initial, dtype=np.int8), (cols.n,)))
+        stop_on_guard = cols.flag("stop_on_guard", True)
+        live = np.ones(cols.n, dtype=bool)
+        entries: List[Dict[str, Any]] = []
+
+        for stage in self._active(subset):
+            vec = stage.vec or VECTORIZED.get(stage.fn) or _rowwise(stage.fn)
+            prior = stance
+            stance = np.where(live, vec(cols, prior), prior).astype(np.int8)
+            if trace:
+                entries.append({"stage": stage.name, "prior": prior, "after": stance, "ran": live})
+            if stage.non_negotiable:
+                live = live & ~((stance == Ternary.NEG) & stop_on_guard)
+                if not live.any():
+                    break
+
+        out: Dict[str, Any] = {"pipeline": self.name, "final": stance}
+        if trace:
+            out["trace"] = entries
+        return out
+
 
 # ---------------------------------
 # /util: tiny helpers for stage fns
 # ---------------------------------
 
 def ternary_merge(prior: Ternary, delta: int) -> Ternary:
-    """Shift prior stance by delta (-1, 0, +1) and clamp to ternary."""
+    """Shift prior stance by delta (-1, 0, +1) and clamp to ternary.
+    Works elementwise when prior is an array."""
+    if _HAS_NUMPY and isinstance(prior, np.ndarray):
+        return np.clip(prior.astype(np.int8) + np.int8(delta), -1, 1).astype(np.int8)
     return clamp_ternary(int(prior) + int(delta))
 
 
 def prefer_hold_on_uncertainty(prior: Ternary, certainty: float, threshold: float = 0.6) -> Ternary:
-    """If certainty is low, drift toward HOLD regardless of direction."""
+    """If certainty is low, drift toward HOLD regardless of direction.
+    Works elementwise when prior is an array (certainty may be one too)."""
+    if _HAS_NUMPY and isinstance(prior, np.ndarray):
+        return np.where(np.asarray(certainty) < threshold, np.int8(Ternary.HOLD), prior).astype(np.int8)
     if certainty < threshold:
         if prior == Ternary.AFFIRM:
             return Ternary.HOLD
@@ -250,6 +560,85 @@ def st_sugar_spike(ctx: Dict[str, Any], prior: Ternary) -> Tuple[Ternary, str]:
     return (prefer_hold_on_uncertainty(prior, certainty=0.4), "Spike uncertain: prefer HOLD.")
 
 
+# ---------------------------------------------------
+# /stages (vectorized): same rules over whole columns
+# ---------------------------------------------------
+
+def vectorizes(fn: StageFn) -> Callable[[VecStageFn], VecStageFn]:
+    """Register a batch twin for a scalar stage fn."""
+    def register(vec: VecStageFn) -> VecStageFn:
+        VECTORIZED[fn] = vec
+        return vec
+    return register
+
+
+def _pick(conds: List[Any], choices: List[Any], default: Any) -> "np.ndarray":
+    # first matching branch wins, like the if/elif chains in the scalar stages
+    return np.select(conds, choices, default).astype(np.int8)
+
+
+@vectorizes(st_guard_biosphere)
+def vst_guard_biosphere(cols: Columns, prior: "np.ndarray") -> "np.ndarray":
+    net = cols.num("bio_risk", 0.0) - 0.7 * cols.num("bio_mitigation", 0.0)
+    return _pick([net >= 0.5, net > 0.2], [Ternary.NEG, Ternary.HOLD], prior)
+
+
+@vectorizes(st_immediate_need)
+def vst_immediate_need(cols: Columns, prior: "np.ndarray") -> "np.ndarray":
+    need = cols.num("immediate_need", 0.0)
+    return _pick([need >= 0.7, need <= 0.2],
+                 [ternary_merge(prior, +1), ternary_merge(prior, -1)],
+                 np.where(prior == Ternary.AFFIRM, Ternary.HOLD, prior))
+
+
+@vectorizes(st_social_context)
+def vst_social_context(cols: Columns, prior: "np.ndarray") -> "np.ndarray":
+    crowded = cols.flag("is_last_one", False) & cols.flag("shared_space", True)
+    return np.where(crowded, ternary_merge(prior, -1), prior).astype(np.int8)
+
+
+@vectorizes(st_long_term_health)
+def vst_long_term_health(cols: Columns, prior: "np.ndarray") -> "np.ndarray":
+    impact = cols.num("health_impact", 0.0)
+    return _pick([impact >= 0.5, impact <= -0.3],
+                 [ternary_merge(prior, -1), ternary_merge(prior, +1)],
+                 prefer_hold_on_uncertainty(prior, certainty=cols.num("health_certainty", 0.5)))
+
+
+@vectorizes(st_timing_window)
+def vst_timing_window(cols: Columns, prior: "np.ndarray") -> "np.ndarray":
+    window = cols.num("timing", 0.5)
+    return _pick([window >= 0.8, window <= 0.2],
+                 [ternary_merge(prior, +1), ternary_merge(prior, -1)],
+                 np.where(prior != Ternary.NEG, Ternary.HOLD, prior))
+
+
+@vectorizes(st_regeneration_plan)
+def vst_regeneration_plan(cols: Columns, prior: "np.ndarray") -> "np.ndarray":
+    plan = cols.num("regen_strength", 0.0)
+    return _pick([plan >= 0.7, plan <= 0.2], [ternary_merge(prior, +1), ternary_merge(prior, -1)], prior)
+
+
+@vectorizes(st_commitment_next_day)
+def vst_commitment_next_day(cols: Columns, prior: "np.ndarray") -> "np.ndarray":
+    load = cols.num("tomorrow_load", 0.5)
+    return _pick([load >= 0.7, load <= 0.3], [ternary_merge(prior, -1), ternary_merge(prior, +1)], Ternary.HOLD)
+
+
+@vectorizes(st_creative_flow)
+def vst_creative_flow(cols: Columns, prior: "np.ndarray") -> "np.ndarray":
+    flow = cols.num("creative_flow", 0.0)
+    return _pick([flow >= 0.75, flow <= 0.25], [ternary_merge(prior, +1), ternary_merge(prior, -1)], prior)
+
+
+@vectorizes(st_sugar_spike)
+def vst_sugar_spike(cols: Columns, prior: "np.ndarray") -> "np.ndarray":
+    spike = cols.num("glycemic_load", 0.5)
+    return _pick([spike >= 0.7, spike <= 0.3],
+                 [ternary_merge(prior, -1), ternary_merge(prior, +1)],
+                 prefer_hold_on_uncertainty(prior, certainty=0.4))
+
+
 # ---------------------------------------------------
 # /pipelines: a handful of named mini pipelines (4x)
 # ---------------------------------------------------
@@ -1,7 +1,9 @@
 # utils/jsonl_logger.py
 import json
 import os
-from typing import Optional
+import queue
+import threading
+from typing import Any, Mapping, Optional
 from uuid import uuid4
 
 class JSONLLogger:
@@ -31,8 +33,9 @@ class JSONLLogger:
         self._line_count = 0
 
     def write(self, entry: dict):
-        json.dump(entry, self._fh, ensure_ascii=False, separators=(",", ":"))
-        self._fh.write("\n")
+        # serialize before touching the file, so a bad entry never leaves half a line
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+        self._fh.write(line + "\n")
         self._fh.flush()
         self._line_count += 1
         if self._line_count >= self.rotate_every:
@@ -43,3 +46,61 @@ class JSONLLogger:
         if self._fh:
             self._fh.close()
             self._fh = None
+
+
+class AsyncSpill:
+    """
+    hands entries to a JSONLLogger on a background thread so the caller never
+    waits on disk. the queue is bounded (max_pending): when the writer falls
+    behind, submit() blocks, which keeps memory flat instead of buffering
+    without limit. entries are serialized on the writer thread; one that fails
+    to serialize or to reach the disk (OSError) is counted in `errors` and
+    skipped. submit() raises RuntimeError once the writer thread is gone instead
+    of waiting on a queue nobody drains.
+    """
+
+    _STOP = object()
+    # how often a submit blocked on a full queue checks that the writer is still alive
+    _LIVENESS_S = 0.5
+
+    def __init__(self, logger: JSONLLogger, max_pending: int = 4096):
+        self.logger = logger
+        self.written = 0
+        self.errors = 0
+        self._q: "queue.Queue[Any]" = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="jsonl-spill", daemon=True)
+        self._thread.start()
+
+    def submit(self, entry: Mapping[str, Any]):
+        while True:
+            if not self._thread.is_alive():
+                raise RuntimeError("jsonl spill writer is not running")
+            try:
+                self._q.put(entry, timeout=self._LIVENESS_S)
+                return
+            except queue.Full:
+                continue
+
+    def _run(self):
+        while True:
+            entry = self._q.get()
+            try:
+                if entry is self._STOP:
+                    return
+                try:
+                    self.logger.write(dict(entry))
+                    self.written += 1
+                except (TypeError, ValueError, RuntimeError, OSError):
+                    self.errors += 1
+            finally:
+                self._q.task_done()
+
+    def flush(self):
+        """wait until every submitted entry has been written."""
+        self._q.join()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._q.put(self._STOP)
+            self._thread.join()
+        self.logger.close()
@@ -0,0 +1,114 @@
+# utils/keyword_matcher.py
+from collections import deque
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, Tuple
+
+Tag = Hashable
+Hits = Dict[Tag, List[str]]
+
+
+class KeywordAutomaton:
+    """
+    aho-corasick matcher over tagged keyword sets.
+    one pass over the text reports every keyword that occurs as a substring
+    (same answer as `kw in text` per keyword), grouped by the tag it was added
+    under. the same keyword may live under several tags; listing it twice under
+    one tag reports it twice, so counts match a loop over the config lists.
+    scan cost is linear in the text plus hits, independent of keyword count.
+    """
+
+    def __init__(self, keyword_sets: Mapping[Tag, Iterable[str]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._words: List[str] = []
+        # per pattern: the tags it was configured under (duplicates kept)
+        self._tags: List[List[Tag]] = []
+        # per node: pattern ids ending here, including those reached by suffix links
+        self._out: List[Tuple[int, ...]] = [()]
+        term: Dict[int, int] = {}
+        for tag, words in keyword_sets.items():
+            for w in words:
+                w = str(w)
+                if not w:
+                    continue
+                node = self._insert(w)
+                pid = term.get(node)
+                if pid is None:
+                    pid = term[node] = len(self._words)
+                    self._words.append(w)
+                    self._tags.append([])
+                self._tags[pid].append(tag)
+        self._link(term)
+
+    def _insert(self, word: str) -> int:
+        node = 0
+        for ch in word:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._out.append(())
+            node = nxt
+        return node
+
+    def _link(self, term: Dict[int, int]) -> None:
+        # bfs: fail links, merged outputs, then fold fail transitions into goto
+        # so scanning is a single dict lookup per character
+        fail = [0] * len(self._goto)
+        for node, pid in term.items():
+            self._out[node] = (pid,)
+        order = []
+        # depth-1 nodes keep fail = root
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for ch, nxt in self._goto[node].items():
+                f = fail[node]
+                while f and ch not in self._goto[f]:
+                    f = fail[f]
+                fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[fail[nxt]]
+                queue.append(nxt)
+        for node in order:
+            inherited = self._goto[fail[node]]
+            own = self._goto[node]
+            for ch, nxt in inherited.items():
+                own.setdefault(ch, nxt)
+
+    @classmethod
+    def from_master_docs(cls, master_docs: Mapping[str, Any],
+                         extra: Mapping[Tag, Iterable[str]] = ()) -> "KeywordAutomaton":
+        """
+        tags are (stage, category): stage_02 triage buckets, stage_04 intent
+        flags and stage_08 non_negotiables from the config, plus any `extra`
+        sets the caller keeps in code (weight hints, harm words).
+        """
+        sets: Dict[Tag, Iterable[str]] = {}
+        for cat, words in master_docs["stage_02"]["rules"].items():
+            sets[("stage_02", cat)] = words
+        for cat, words in master_docs["stage_04"]["rules"].items():
+            sets[("stage_04", cat)] = words
+        sets[("stage_08", "non_negotiables")] = master_docs["stage_08"]["non_negotiables"]
+        sets.update(dict(extra))
+        return cls(sets)
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def scan(self, text: str) -> Hits:
+        """text is matched as given; lowercase it first for the stage heuristics."""
+        goto, out = self._goto, self._out
+        found = set()
+        node = 0
+        for ch in text:
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+                if len(found) == len(self._words):
+                    break
+        hits: Hits = {}
+        for pid in sorted(found):
+            w = self._words[pid]
+            for tag in self._tags[pid]:
+                hits.setdefault(tag, []).append(w)
+        return hits
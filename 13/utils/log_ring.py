@@ -0,0 +1,126 @@
+# utils/log_ring.py
+from collections.abc import Mapping, Sequence
+from typing import Any, Callable, List, Optional
+
+
+class FrozenDict(dict):
+    """Dict that refuses changes after construction.
+
+    A dict subclass rather than a mapping proxy, so entries holding it still
+    serialize with json.dumps when they are spilled.
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("log entries are read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+def freeze(value: Any) -> Any:
+    """Deep read-only copy of value.
+
+    Mappings become FrozenDict, lists and tuples tuples, sets frozensets; other
+    values are kept as they are. Nothing in the result is shared with value.
+    """
+    if isinstance(value, FrozenDict):
+        return value
+    if isinstance(value, Mapping):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(v) for v in value)
+    return value
+
+
+class LogRing(Sequence):
+    """Fixed-size ring holding the newest log entries.
+
+    Appending to a full ring evicts the oldest entry into `spill` (if given).
+    Entries keep a global sequence number so views taken earlier stay valid
+    until the entries they cover are evicted.
+    """
+
+    def __init__(self, capacity: int, spill: Optional[Callable[[Any], None]] = None):
+        if capacity < 1:
+            raise ValueError("log capacity must be >= 1")
+        self.capacity = capacity
+        self.spill = spill
+        self.total = 0
+        self._buf: List[Any] = []
+
+    def append(self, entry: Any) -> None:
+        if len(self._buf) < self.capacity:
+            self._buf.append(entry)
+        else:
+            slot = self.total % self.capacity
+            if self.spill is not None:
+                self.spill(self._buf[slot])
+            self._buf[slot] = entry
+        self.total += 1
+
+    @property
+    def first_seq(self) -> int:
+        return self.total - len(self._buf)
+
+    def entry(self, seq: int) -> Any:
+        if not self.first_seq <= seq < self.total:
+            raise IndexError(f"log entry {seq} is no longer in the ring")
+        return self._buf[seq % self.capacity]
+
+    def __len__(self) -> int:
+        return len(self._buf)
+
+    def __getitem__(self, i):
+        n = len(self._buf)
+        if isinstance(i, slice):
+            return [self.entry(self.first_seq + j) for j in range(*i.indices(n))]
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("log index out of range")
+        return self.entry(self.first_seq + i)
+
+    def drain(self) -> None:
+        """Spill every retained entry, oldest first, and empty the ring."""
+        if self.spill is not None:
+            for seq in range(self.first_seq, self.total):
+                self.spill(self.entry(seq))
+        self._buf = []
+        self.total = 0
+
+
+class LogView(Sequence):
+    """Read-only window over the log entries present when it was created.
+
+    Returned by the compiled pipeline instead of deepcopy(self.log): creating it
+    is O(1) and later packets do not change what it shows. The compiled pipeline
+    freezes each entry's data when it is logged, so nothing reachable from the
+    view can be changed either. Over a LogRing, entries evicted after the view
+    was taken raise IndexError.
+    """
+    __slots__ = ("_get", "_lo", "_n")
+
+    def __init__(self, log: Sequence):
+        self._get = getattr(log, "entry", log.__getitem__)
+        self._lo = getattr(log, "first_seq", 0)
+        self._n = len(log)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return tuple(self._get(self._lo + j) for j in range(*i.indices(self._n)))
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("log view index out of range")
+        return self._get(self._lo + i)
+
+    def __repr__(self) -> str:
+        return f"LogView({self._n} entries)"
@@ -1,37 +1,435 @@
-from introspection_false_positive import propose_and_simulate
-
-# inside the hourly loop
-finding, sim = propose_and_simulate(CFG_CHAIN_PATH)
-if finding:
-    self._append("introspection_finding", {
-        "window": {"start": finding.window_start, "end": finding.window_end},
-        "sig_key": finding.sig_key,
-        "total_alerts": finding.total_alerts,
-        "overruled": finding.overruled,
-        "overrule_rate": round(finding.overrule_rate,4),
-        "proposal_delta_lo": finding.proposal_delta_lo,
-        "evidence": finding.evidence_digests,
-    })
-    self._append("introspection_simulation", {
-        "window": {"start": sim.window_start, "end": sim.window_end},
-        "delta_lo": sim.delta_lo,
-        "overrides_before": sim.overrides_before,
-        "overrides_after": sim.overrides_after,
-        "improvement_pct": sim.improvement_pct,
-        "potential_missed_affirms": sim.potential_missed_affirms,
-        "missed_affirms_pct": sim.missed_affirms_pct,
-        "decision": sim.decision,
-        "notes": sim.notes,
-    })
-    if sim.decision == "approve":
-        # canary apply: record it, then set overlay param
-        self._append("introspection_apply", {
-            "target": "CFG_LO",
-            "delta": finding.proposal_delta_lo,
-            "mode": "canary",
-            "fraction": 0.1,
-            "duration_min": 60,
-            "sig_key": finding.sig_key,
-        })
-        # example overlay setter; you already have ParamOverlay in your code sketch
-        PARAMS.set("CFG_LO", PARAMS.get("CFG_LO", CFG_LO) + finding.proposal_delta_lo)
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+introspection_false_positive.py
+
+false-positive loop detector (D2 in introspection_agent.md) over a firewall chain.
+
+alerts are joined to their human resolutions by source_event_id, folded into
+signature windows (hour x masked signal band) and checked for signatures that
+humans keep overruling. a finding proposes raising lo by delta_lo; the
+simulator re-classifies every resolved alert in the lookback under the new lo
+and counts overrides removed against affirms that would be missed.
+
+runs are incremental: the chain cursor, the open join table and the lookback
+windows persist in a state file next to the chain, so each hourly run only
+reads records written since the last one.
+
+inside the hourly loop:
+
+    finding, sim = propose_and_simulate(CFG_CHAIN_PATH)
+    if finding:
+        self._append("introspection_finding", asdict(finding))
+        self._append("introspection_simulation", asdict(sim))
+        if sim.decision == "approve":
+            PARAMS.set("CFG_LO", PARAMS.get("CFG_LO", CFG_LO) + finding.proposal_delta_lo)
+
+note on style: comments and prose avoid em dashes by design.
+"""
+
+from __future__ import annotations
+import os
+import sys
+import json
+import argparse
+from collections import OrderedDict
+from dataclasses import dataclass, asdict, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# optional vectorized re-classification
+try:
+    import numpy as np
+    _HAS_NUMPY = True
+except Exception:
+    np = None
+    _HAS_NUMPY = False
+
+# the firewall reader follows rotations and archives; plain jsonl otherwise
+try:
+    from ternary_server_firewall import follow_chain, VULN_MARGIN
+    _HAS_FIREWALL = True
+except Exception:
+    follow_chain = None
+    VULN_MARGIN = float(os.getenv("FIREWALL_VULNERABLE_MARGIN", "0.10"))
+    _HAS_FIREWALL = False
+
+# --------------- configuration ---------------
+
+WINDOW_S = int(os.getenv("INTROSPECT_WINDOW_S", "3600"))
+# lookback horizon in windows, counted back from the newest record read
+LOOKBACK_WINDOWS = int(os.getenv("INTROSPECT_LOOKBACK_WINDOWS", "24"))
+# alerts waiting for their resolution; the oldest are dropped past this
+JOIN_MAX = int(os.getenv("INTROSPECT_JOIN_MAX", "50000"))
+MIN_ALERTS = int(os.getenv("INTROSPECT_MIN_ALERTS", "5"))
+OVERRULE_RATE = float(os.getenv("INTROSPECT_OVERRULE_RATE", "0.70"))
+DELTA_LO = float(os.getenv("INTROSPECT_DELTA_LO", "0.01"))
+# guardrail: approve only with this many fewer overrides and at most this many missed affirms
+MIN_IMPROVEMENT_PCT = float(os.getenv("INTROSPECT_MIN_IMPROVEMENT_PCT", "20"))
+MAX_MISSED_PCT = float(os.getenv("INTROSPECT_MAX_MISSED_PCT", "5"))
+EVIDENCE_MAX = 8
+
+_ALERT_STATES = ("VULNERABLE", "CRITICAL")
+# settled by the overflow path, not by a human
+_NOT_HUMAN = ("overflow_default_object",)
+
+# --------------- schemas ---------------
+
+@dataclass
+class Finding:
+    window_start: str
+    window_end: str
+    sig_key: str
+    total_alerts: int
+    overruled: int
+    overrule_rate: float
+    proposal_delta_lo: float
+    evidence_digests: List[str] = field(default_factory=list)
+
+@dataclass
+class Simulation:
+    window_start: str
+    window_end: str
+    delta_lo: float
+    overrides_before: int
+    overrides_after: int
+    improvement_pct: float
+    potential_missed_affirms: int
+    missed_affirms_pct: float
+    decision: str  # approve | reject | needs_human
+    notes: str = ""
+
+# --------------- helpers ---------------
+
+def _epoch(ts: str) -> float:
+    return datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp()
+
+def _iso(t: float) -> str:
+    return datetime.fromtimestamp(t, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+def _band(x: float) -> str:
+    # the same coarse bins the firewall masks signals with, so no raw values leak
+    if x < 0.25: return "<0.25"
+    if x < 0.5:  return "0.25-0.5"
+    if x < 1.0:  return "0.5-1.0"
+    if x < 1.5:  return "1.0-1.5"
+    return ">=1.5"
+
+def signature_key(signals: Dict[str, Any]) -> str:
+    return "|".join(f"{k[-1]}:{_band(float(v))}" for k, v in sorted(signals.items()))
+
+def _jsonl_head(fp: str) -> Optional[str]:
+    with open(fp, "rb") as f:
+        first = f.readline()
+    if not first.strip():
+        return None
+    rec = json.loads(first)
+    return rec.get("digest") or rec.get("leaf")
+
+def _jsonl_boundary(fp: str, offset: int) -> bool:
+    # a cursor offset must still sit right after a record
+    if offset == 0:
+        return True
+    if os.path.getsize(fp) < offset:
+        return False
+    with open(fp, "rb") as f:
+        f.seek(offset - 1)
+        return f.read(1) == b"\n"
+
+def _follow_jsonl(chain_path: str, cursor: Optional[Dict[str, Any]],
+                  on_restart: Optional[Callable[[], None]] = None
+                  ) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    # fallback reader without the firewall module: rotated jsonl then the live
+    # file, cursor by first digest and byte offset. archives are not readable
+    # here. a cursor that does not resume restarts from genesis, as follow_chain
+    import glob
+    base = os.path.abspath(chain_path)
+    segs = [fp for fp in sorted(glob.glob(base + ".*.rotated")) + [base] if os.path.exists(fp)]
+    first, start, done = 0, 0, 0
+    if cursor:
+        resumed = False
+        for i, fp in enumerate(segs):
+            if _jsonl_head(fp) != cursor.get("segment_head"):
+                continue
+            pos = int(cursor.get("offset", 0))
+            if _jsonl_boundary(fp, pos):
+                first, start, done = i, pos, int(cursor.get("segment_records", 0))
+                resumed = True
+            break
+        if not resumed and on_restart is not None:
+            on_restart()
+    for i in range(first, len(segs)):
+        fp = segs[i]
+        head = _jsonl_head(fp)
+        off, n = (start, done) if i == first else (0, 0)
+        with open(fp, "rb") as f:
+            f.seek(off)
+            for line in f:
+                off += len(line)
+                if not line.strip():
+                    continue
+                n += 1
+                yield json.loads(line), {"segment_head": head, "offset": off, "segment_records": n}
+
+# --------------- scanner ---------------
+
+class FalsePositiveScanner:
+    """
+    streaming, windowed aggregation of resolved alerts per signature.
+
+    events in an alert state wait in a bounded join table keyed by event id.
+    the matching resolution moves them into their window as one row of
+    (signature, score, hi, lo, overruled). windows that start more than
+    lookback windows before the newest record are dropped, so memory is bounded
+    by the join table and the lookback alone. when the chain cursor no longer
+    resumes, the follow starts over from genesis and everything built from the
+    earlier passes is dropped first, so no alert is counted twice.
+    """
+    def __init__(self, chain_path: str, state_path: Optional[str] = None,
+                 window_s: int = WINDOW_S, lookback: int = LOOKBACK_WINDOWS, join_max: int = JOIN_MAX):
+        self.chain_path = chain_path
+        self.state_path = state_path or os.path.abspath(chain_path) + ".introspection.json"
+        self.window_s = max(1, int(window_s))
+        self.lookback = max(1, int(lookback))
+        self.join_max = max(1, int(join_max))
+        self.cursor: Optional[Dict[str, Any]] = None
+        # event id -> [window, sig, score, hi, lo, digest]
+        self.pending: "OrderedDict[str, List[Any]]" = OrderedDict()
+        # window start -> columns of resolved alerts
+        self.windows: Dict[int, Dict[str, List[Any]]] = {}
+        # window of the newest record read, the lookback counts back from it
+        self.latest: Optional[int] = None
+        self.stats = {"records": 0, "alerts": 0, "joined": 0, "evicted": 0, "unmatched": 0, "runs": 0,
+                      "restarts": 0}
+
+    # state
+
+    def load(self) -> bool:
+        """restore state from the state file; False when there is none or it does not match."""
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                st = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if st.get("window_s") != self.window_s:
+            return False
+        self.cursor = st.get("cursor")
+        self.pending = OrderedDict((k, v) for k, v in st.get("pending", []))
+        self.windows = {int(k): v for k, v in st.get("windows", {}).items()}
+        self.latest = st.get("latest", max(self.windows) if self.windows else None)
+        self.stats.update(st.get("stats", {}))
+        return True
+
+    def save(self) -> None:
+        st = {"window_s": self.window_s, "cursor": self.cursor, "pending": list(self.pending.items()),
+              "windows": {str(k): v for k, v in self.windows.items()}, "latest": self.latest, "stats": self.stats}
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(st, f, separators=(",",":"))
+        os.replace(tmp, self.state_path)
+
+    # ingest
+
+    def _window(self, ts: str) -> int:
+        t = int(_epoch(ts))
+        return t - t % self.window_s
+
+    def _restart(self) -> None:
+        # the follow starts over from genesis: forget the joins and windows of
+        # the earlier passes, they are rebuilt from the records read again
+        self.cursor = None
+        self.pending.clear()
+        self.windows = {}
+        self.latest = None
+        self.stats["restarts"] += 1
+
+    def _prune(self) -> None:
+        if self.latest is None:
+            return
+        horizon = self.latest - (self.lookback - 1) * self.window_s
+        self.windows = {w: cols for w, cols in self.windows.items() if w >= horizon}
+
+    def _event(self, rec: Dict[str, Any]) -> None:
+        p = rec["payload"]
+        if p.get("state") not in _ALERT_STATES or "event_id" not in p:
+            return
+        self.stats["alerts"] += 1
+        self.pending[p["event_id"]] = [self._window(p["ts"]), signature_key(p.get("signals") or {}),
+                                       float(p["score"]), float(p.get("hi", 0.0)), float(p.get("lo", 0.0)),
+                                       rec.get("digest") or rec.get("leaf")]
+        while len(self.pending) > self.join_max:
+            self.pending.popitem(last=False)
+            self.stats["evicted"] += 1
+
+    def _resolution(self, rec: Dict[str, Any]) -> None:
+        p = rec["payload"]
+        row = self.pending.pop(p.get("source_event_id"), None)
+        if row is None:
+            self.stats["unmatched"] += 1
+            return
+        if p.get("resolver_source") in _NOT_HUMAN or p.get("decision") not in ("AFFIRM", "OBJECT"):
+            return
+        win, sig, score, hi, lo, digest = row
+        cols = self.windows.get(win)
+        if cols is None:
+            cols = self.windows[win] = {"sig": [], "score": [], "hi": [], "lo": [], "overruled": [], "digest": []}
+        cols["sig"].append(sig); cols["score"].append(score)
+        cols["hi"].append(hi); cols["lo"].append(lo)
+        cols["overruled"].append(1 if p["decision"] == "OBJECT" else 0)
+        cols["digest"].append(digest)
+        self.stats["joined"] += 1
+
+    def update(self) -> int:
+        """read the records written since the last run; returns how many."""
+        follow = follow_chain if _HAS_FIREWALL else _follow_jsonl
+        n = 0
+        for rec, cur in follow(self.chain_path, self.cursor, on_restart=self._restart):
+            ts = (rec.get("payload") or {}).get("ts")
+            if ts:
+                win = self._window(ts)
+                if self.latest is None or win > self.latest:
+                    self.latest = win
+            kind = rec.get("kind")
+            if kind == "event":
+                self._event(rec)
+            elif kind == "resolution":
+                self._resolution(rec)
+            self.cursor = cur
+            n += 1
+        self.stats["records"] += n
+        self.stats["runs"] += 1
+        self._prune()
+        return n
+
+    # aggregates
+
+    def span(self) -> Tuple[str, str]:
+        ws = sorted(self.windows)
+        return _iso(ws[0]), _iso(ws[-1] + self.window_s)
+
+    def overrule_rates(self) -> List[Dict[str, Any]]:
+        """one row per signature window with alerts, overruled count and rate."""
+        out = []
+        for win in sorted(self.windows):
+            cols = self.windows[win]
+            agg: Dict[str, List[int]] = {}
+            for sig, o in zip(cols["sig"], cols["overruled"]):
+                a = agg.setdefault(sig, [0, 0])
+                a[0] += 1
+                a[1] += o
+            for sig, (n, o) in sorted(agg.items()):
+                out.append({"window_start": _iso(win), "sig_key": sig, "alerts": n, "overruled": o,
+                            "overrule_rate": round(o / n, 4)})
+        return out
+
+    def columns(self) -> Dict[str, List[Any]]:
+        """every resolved alert in the lookback as flat columns."""
+        out: Dict[str, List[Any]] = {"sig": [], "score": [], "hi": [], "lo": [], "overruled": [], "digest": []}
+        for win in sorted(self.windows):
+            for k, v in self.windows[win].items():
+                out[k].extend(v)
+        return out
+
+# --------------- detector and simulator ---------------
+
+def detect(scanner: FalsePositiveScanner, min_alerts: int = MIN_ALERTS, rate: float = OVERRULE_RATE,
+           delta_lo: float = DELTA_LO) -> Optional[Finding]:
+    """the signature humans overrule most over the lookback, if it clears the bars."""
+    cols = scanner.columns()
+    agg: Dict[str, List[Any]] = {}
+    for sig, o, d in zip(cols["sig"], cols["overruled"], cols["digest"]):
+        a = agg.setdefault(sig, [0, 0, []])
+        a[0] += 1
+        a[1] += o
+        if o and d and len(a[2]) < EVIDENCE_MAX:
+            a[2].append(d)
+    hits = [(o, n, sig, ev) for sig, (n, o, ev) in agg.items() if n >= min_alerts and o / n >= rate]
+    if not hits:
+        return None
+    o, n, sig, ev = max(hits)
+    start, end = scanner.span()
+    return Finding(window_start=start, window_end=end, sig_key=sig, total_alerts=n, overruled=o,
+                   overrule_rate=o / n, proposal_delta_lo=delta_lo, evidence_digests=ev)
+
+def _still_alerts(score: Sequence[float], hi: Sequence[float], lo: Sequence[float],
+                  deltas: Sequence[float]) -> Any:
+    # rows: deltas, columns: alerts. an alert survives while score >= max(lo + d, hi - margin)
+    margin = min(max(VULN_MARGIN, 0.02), 0.5)
+    if _HAS_NUMPY:
+        s, h, l = (np.asarray(x, dtype=float) for x in (score, hi, lo))
+        d = np.asarray(deltas, dtype=float)[:, None]
+        band = np.maximum(l[None, :] + d, (h - margin)[None, :])
+        return (s[None, :] >= np.minimum(band, h[None, :])).tolist()
+    return [[x >= min(max(y + d, z - margin), z) for x, y, z in zip(score, lo, hi)] for d in deltas]
+
+def simulate(scanner: FalsePositiveScanner, deltas: Sequence[float] = (DELTA_LO,)) -> List[Simulation]:
+    """
+    re-classify every resolved alert in the lookback under lo + delta, for each
+    delta at once. an override is an overruled alert that still fires; a
+    potential miss is an affirmed alert that would no longer fire.
+    """
+    cols = scanner.columns()
+    start, end = scanner.span() if scanner.windows else ("", "")
+    over = cols["overruled"]
+    before = sum(over)
+    affirms = len(over) - before
+    out = []
+    for d, alive in zip(deltas, _still_alerts(cols["score"], cols["hi"], cols["lo"], list(deltas))):
+        after = sum(1 for a, o in zip(alive, over) if a and o)
+        missed = sum(1 for a, o in zip(alive, over) if not a and not o)
+        imp = 100.0 * (before - after) / before if before else 0.0
+        miss_pct = 100.0 * missed / affirms if affirms else 0.0
+        if imp >= MIN_IMPROVEMENT_PCT and miss_pct <= MAX_MISSED_PCT:
+            decision = "approve"
+        elif imp >= MIN_IMPROVEMENT_PCT:
+            decision = "needs_human"
+        else:
+            decision = "reject"
+        out.append(Simulation(window_start=start, window_end=end, delta_lo=d, overrides_before=before,
+                              overrides_after=after, improvement_pct=round(imp, 2),
+                              potential_missed_affirms=missed, missed_affirms_pct=round(miss_pct, 2),
+                              decision=decision,
+                              notes=f"{len(over)} resolved alerts over {len(scanner.windows)} windows"))
+    return out
+
+def propose_and_simulate(chain_path: str, state_path: Optional[str] = None,
+                         deltas: Optional[Sequence[float]] = None
+                         ) -> Tuple[Optional[Finding], Optional[Simulation]]:
+    """
+    one incremental run: read new records, persist state, detect, and simulate
+    the finding's delta_lo. with several deltas the smallest approved one wins,
+    else the one with the largest improvement. (None, None) without a finding.
+    """
+    sc = FalsePositiveScanner(chain_path, state_path)
+    sc.load()
+    sc.update()
+    sc.save()
+    finding = detect(sc)
+    if finding is None:
+        return None, None
+    sims = simulate(sc, deltas or (finding.proposal_delta_lo,))
+    ok = [s for s in sims if s.decision == "approve"]
+    sim = min(ok, key=lambda s: s.delta_lo) if ok else max(sims, key=lambda s: s.improvement_pct)
+    finding.proposal_delta_lo = sim.delta_lo
+    return finding, sim
+
+# --------------- cli ---------------
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="false-positive introspection over a firewall chain")
+    ap.add_argument("chain", help="chain path, rotations and archives are followed")
+    ap.add_argument("--state", default=None, help="state file, default <chain>.introspection.json")
+    ap.add_argument("--delta", type=float, action="append", help="delta_lo to simulate, repeatable")
+    ap.add_argument("--rates", action="store_true", help="also print overrule rates per signature window")
+    args = ap.parse_args(argv)
+    finding, sim = propose_and_simulate(args.chain, args.state, args.delta)
+    out: Dict[str, Any] = {"finding": asdict(finding) if finding else None, "simulation": asdict(sim) if sim else None}
+    if args.rates:
+        sc = FalsePositiveScanner(args.chain, args.state)
+        sc.load()
+        out["rates"] = sc.overrule_rates()
+    print(json.dumps(out, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
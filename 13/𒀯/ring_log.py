@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ring_log.py
+
+memory mapped ring buffer sink for the firewall's highest rate paths.
+
+producers reserve a slot from a counter, pack one fixed size binary record
+(seq, ts, kind id, level, up to five float fields) straight into the mapping
+and commit it. no json, no dict, no queue handoff. the ring is a file backed
+shared mapping, so records already committed survive a crash of the producer
+process and are picked up by the drainer, which runs as its own process and
+turns them into the hmac-signed jsonl chain format that verify_chain reads.
+
+layout, little endian:
+  header  4096 bytes: magic, version, record size, slot count, ring id
+  slot    64 bytes:   commit u64, ts f64, kind u16, level u8, n u8, 4 pad, 5 x f64
+
+commit is seq + 1 once the record is complete and 0 while it is being
+written, so a reader that sees the same commit before and after copying the
+body has a whole record. a drainer lapped by the producer counts the
+overwritten records as lost and skips ahead.
+
+kind ids and their field names live in <ring>.kinds.json, written when a kind
+is registered, so the hot path only carries the id.
+
+seqs come from an in-process counter, so a ring has exactly one producing
+process: RingLog takes an exclusive lock on the ring file and a second process
+opening it fails instead of reusing seqs and overwriting slots. inside one
+process, open_ring hands every caller of the same path the same producer.
+
+usage:
+  python ring_log.py drain RING --out CHAIN [--follow]
+  python ring_log.py stat RING
+
+note on style: comments and prose avoid em dashes by design.
+"""
+
+from __future__ import annotations
+import os
+import json
+import hmac
+import mmap
+import time
+import uuid
+import struct
+import hashlib
+import argparse
+import itertools
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # no advisory locks, one producer per ring is up to the caller
+    fcntl = None
+
+# --------------- configuration ---------------
+
+RING_SLOTS = int(os.getenv("FIREWALL_RING_SLOTS", "65536"))
+# a reserved slot that stays uncommitted this long while later ones commit is a dead producer's
+RING_STALL_S = float(os.getenv("FIREWALL_RING_STALL_S", "1.0"))
+DRAIN_BATCH = int(os.getenv("FIREWALL_RING_DRAIN_BATCH", "4096"))
+HMAC_KEY = os.getenv("FIREWALL_HMAC_KEY", "dev-only-insecure").encode("utf-8")
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40, "critical": 50}
+_LEVEL_NAMES = {v: k for k, v in LEVELS.items()}
+
+MAGIC = b"TRING1\n\x00"
+HEADER_SIZE = 4096
+MAX_FIELDS = 5
+_HDR = struct.Struct("<8sIIQ16s")  # magic, version, record size, slots, ring id
+_COMMIT = struct.Struct("<Q")
+_BODY = struct.Struct("<dHBB4x5d")
+RECORD_SIZE = _COMMIT.size + _BODY.size
+
+# --------------- helpers ---------------
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(timespec="microseconds").replace("+00:00", "Z")
+
+def signed_digest(prev: Optional[str], payload: Dict[str, Any], key: bytes = HMAC_KEY) -> str:
+    # same construction as the firewall chain
+    body = {"prev": prev, "payload": payload}
+    s = json.dumps(body, sort_keys=True, separators=(",",":")).encode("utf-8")
+    return hmac.new(key, s, hashlib.sha256).hexdigest()
+
+def _kinds_path(path: str) -> str:
+    return path + ".kinds.json"
+
+def _load_kinds(path: str) -> Dict[str, Any]:
+    try:
+        with open(_kinds_path(path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"names": [], "fields": []}
+
+def _open_map(path: str, slots: int, create: bool) -> Tuple[Any, mmap.mmap, int, str]:
+    size = HEADER_SIZE + slots * RECORD_SIZE
+    exists = os.path.exists(path) and os.path.getsize(path) >= HEADER_SIZE
+    if not exists and not create:
+        raise FileNotFoundError(path)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    f = os.fdopen(fd, "r+b")
+    if exists:
+        magic, _ver, rsize, n, rid = _HDR.unpack(f.read(_HDR.size))
+        if magic != MAGIC or rsize != RECORD_SIZE:
+            f.close()
+            raise ValueError(f"{path} is not a ring log")
+        slots, size = n, HEADER_SIZE + n * RECORD_SIZE
+        ring_id = rid.hex()
+    else:
+        ring_id = uuid.uuid4().hex
+        f.truncate(size)
+        f.write(_HDR.pack(MAGIC, 1, RECORD_SIZE, slots, bytes.fromhex(ring_id)))
+        f.flush()
+    mm = mmap.mmap(f.fileno(), size)
+    return f, mm, slots, ring_id
+
+def _lock_producer(path: str, f: Any) -> None:
+    # held until the file is closed; a second producer would hand out the same seqs
+    if fcntl is None:
+        return
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        f.close()
+        raise RuntimeError(f"{path} already has a producer, give each process its own ring") from None
+
+# --------------- producer ---------------
+
+class RingLog:
+    """
+    producer side. reserve, pack, commit; nothing else on the hot path. safe
+    across threads of one process: the slot counter hands out each seq once.
+    reopening an existing ring continues after its highest committed seq, so a
+    restarted producer neither rewinds nor reuses sequence numbers. one
+    producer per ring file: a second one, in this process or another, raises
+    RuntimeError. use open_ring to share the producer inside a process.
+    """
+    def __init__(self, path: str, slots: int = RING_SLOTS):
+        self.path = path
+        self._f, self._mm, self.slots, self.ring_id = _open_map(path, max(2, int(slots)), create=True)
+        try:
+            _lock_producer(path, self._f)
+        except RuntimeError:
+            self._mm.close()
+            raise
+        top = -1
+        for i in range(self.slots):
+            c = _COMMIT.unpack_from(self._mm, HEADER_SIZE + i * RECORD_SIZE)[0]
+            if c - 1 > top:
+                top = c - 1
+        self._seq = itertools.count(top + 1)
+        self._kinds = _load_kinds(path)
+        self._kinds_lock = threading.Lock()
+        # bound once, so log() does no attribute lookups past self
+        self._pack_body = _BODY.pack_into
+        self._pack_commit = _COMMIT.pack_into
+
+    def register(self, name: str, fields: Sequence[str] = ()) -> int:
+        """kind id for name, registered with up to five field names on first use."""
+        if len(fields) > MAX_FIELDS:
+            raise ValueError(f"at most {MAX_FIELDS} fields per kind")
+        with self._kinds_lock:
+            names = self._kinds["names"]
+            if name in names:
+                return names.index(name)
+            names.append(name)
+            self._kinds["fields"].append(list(fields))
+            tmp = _kinds_path(self.path) + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._kinds, f)
+            os.replace(tmp, _kinds_path(self.path))
+            return len(names) - 1
+
+    def log(self, kind: int, level: int, a: float = 0.0, b: float = 0.0, c: float = 0.0,
+            d: float = 0.0, e: float = 0.0, n: int = MAX_FIELDS) -> int:
+        """write one record; returns its seq."""
+        seq = next(self._seq)
+        off = HEADER_SIZE + (seq % self.slots) * RECORD_SIZE
+        mm = self._mm
+        self._pack_commit(mm, off, 0)
+        self._pack_body(mm, off + 8, time.time(), kind, level, n, a, b, c, d, e)
+        self._pack_commit(mm, off, seq + 1)
+        return seq
+
+    def flush(self) -> None:
+        """push dirty pages to the file; not needed to survive a process crash, only a host crash."""
+        self._mm.flush()
+
+    def close(self) -> None:
+        with _OPEN_LOCK:
+            if _OPEN.get(os.path.realpath(self.path)) is self:
+                del _OPEN[os.path.realpath(self.path)]
+        if self._mm.closed:
+            return
+        try:
+            self._mm.flush()
+            self._mm.close()
+        finally:
+            self._f.close()
+
+# producers opened through open_ring, by real path
+_OPEN: Dict[str, RingLog] = {}
+_OPEN_LOCK = threading.Lock()
+
+def open_ring(path: str, slots: int = RING_SLOTS) -> RingLog:
+    """the producer for path in this process, opened on first use and shared after."""
+    key = os.path.realpath(path)
+    with _OPEN_LOCK:
+        ring = _OPEN.get(key)
+        if ring is None:
+            ring = _OPEN[key] = RingLog(path, slots)
+        return ring
+
+# --------------- drainer ---------------
+
+class RingReader:
+    """
+    consumer side. read(next_seq) yields committed records in seq order from
+    next_seq on, stopping at the first slot that is not committed yet. lapped
+    records are counted in lost and skipped.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._f, self._mm, self.slots, self.ring_id = _open_map(path, 2, create=False)
+        self.lost = 0
+        self.skipped = 0
+        self._stall: Optional[Tuple[int, float]] = None
+
+    def _slot(self, seq: int) -> Tuple[int, Optional[Tuple[Any, ...]]]:
+        # (commit, body); body is None while the slot is being written or was
+        # rewritten under the read, commit 0 while it is being written
+        off = HEADER_SIZE + (seq % self.slots) * RECORD_SIZE
+        c1 = _COMMIT.unpack_from(self._mm, off)[0]
+        body = _BODY.unpack_from(self._mm, off + 8)
+        c2 = _COMMIT.unpack_from(self._mm, off)[0]
+        if c1 != c2 or c1 == 0:
+            return max(c1, c2), None
+        return c1, body
+
+    def head(self) -> int:
+        """highest committed seq + 1 seen in the ring, 0 when empty."""
+        top = 0
+        for i in range(self.slots):
+            top = max(top, _COMMIT.unpack_from(self._mm, HEADER_SIZE + i * RECORD_SIZE)[0])
+        return top
+
+    def read(self, next_seq: int, limit: int = DRAIN_BATCH) -> Iterator[Tuple[int, Tuple[Any, ...]]]:
+        seq = next_seq
+        while limit > 0:
+            commit, body = self._slot(seq)
+            if commit - 1 > seq:
+                # lapped: the slot already holds a later record, so everything up
+                # to one lap behind it is gone
+                oldest = commit - self.slots
+                self.lost += oldest - seq
+                seq = oldest
+                continue
+            if body is None and commit - 1 == seq:
+                continue  # rewritten under the read, look again
+            if commit - 1 < seq or body is None:
+                # not committed yet. a producer that died between reserve and
+                # commit leaves a hole; skip it once the next slot has held a
+                # commit for RING_STALL_S
+                nxt, nbody = self._slot(seq + 1)
+                if nxt - 1 == seq + 1 and nbody is not None:
+                    now = time.monotonic()
+                    if self._stall is None or self._stall[0] != seq:
+                        self._stall = (seq, now)
+                    elif now - self._stall[1] >= RING_STALL_S:
+                        self.skipped += 1
+                        self._stall = None
+                        seq += 1
+                        continue
+                return
+            self._stall = None
+            yield seq, body
+            seq += 1
+            limit -= 1
+
+    def close(self) -> None:
+        self._mm.close()
+        self._f.close()
+
+def _tail(chain_path: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    # last digest and payload of a jsonl chain, reading only its end
+    if not os.path.exists(chain_path) or os.path.getsize(chain_path) == 0:
+        return None, None
+    with open(chain_path, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        back = min(size, 65536)
+        while True:
+            f.seek(size - back)
+            lines = [ln for ln in f.read(back).splitlines() if ln.strip()]
+            if len(lines) > 1 or back == size:
+                break
+            back = min(size, back * 2)
+    rec = json.loads(lines[-1])
+    return rec.get("digest"), rec.get("payload")
+
+def drain(ring_path: str, chain_path: str, follow: bool = False, poll_s: float = 0.05,
+          key: bytes = HMAC_KEY, stop: Optional[threading.Event] = None) -> Dict[str, int]:
+    """
+    copy committed ring records into a signed jsonl chain, resuming after the
+    last ring record already in the chain. one write per batch. with follow the
+    drain keeps polling until stop is set (or forever).
+    """
+    rd = RingReader(ring_path)
+    prev, last = _tail(chain_path)
+    next_seq = 0
+    if last and last.get("ring") == rd.ring_id[:16] and "seq" in last:
+        next_seq = int(last["seq"]) + 1
+    kinds = _load_kinds(ring_path)
+    written = 0
+    try:
+        with open(chain_path, "a", encoding="utf-8") as out:
+            while True:
+                lines: List[str] = []
+                for seq, (ts, kind, level, n, *vals) in rd.read(next_seq):
+                    if kind >= len(kinds["names"]):
+                        kinds = _load_kinds(ring_path)
+                    name = kinds["names"][kind] if kind < len(kinds["names"]) else f"kind_{kind}"
+                    names = kinds["fields"][kind] if kind < len(kinds["fields"]) else []
+                    fields = {(names[i] if i < len(names) else f"f{i}"): vals[i] for i in range(min(n, MAX_FIELDS))}
+                    payload = {"ts": _iso(ts), "ring": rd.ring_id[:16], "seq": seq,
+                               "level": _LEVEL_NAMES.get(level, level), "fields": fields}
+                    dg = signed_digest(prev, payload, key)
+                    lines.append(json.dumps({"kind": name, "digest": dg, "prev": prev, "payload": payload},
+                                            separators=(",",":")) + "\n")
+                    prev = dg
+                    next_seq = seq + 1
+                if lines:
+                    out.write("".join(lines))
+                    out.flush()
+                    written += len(lines)
+                    continue
+                if not follow or (stop is not None and stop.is_set()):
+                    break
+                time.sleep(poll_s)
+    finally:
+        rd.close()
+    return {"written": written, "next_seq": next_seq, "lost": rd.lost, "skipped": rd.skipped}
+
+# --------------- cli ---------------
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="memory mapped ring log: drain into a signed chain, or inspect")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    d = sub.add_parser("drain", help="copy committed records into a signed jsonl chain")
+    d.add_argument("ring")
+    d.add_argument("--out", required=True, help="chain path, resumed after its last ring record")
+    d.add_argument("--follow", action="store_true", help="keep draining until interrupted")
+    d.add_argument("--poll", type=float, default=0.05, help="with --follow: idle poll interval in seconds")
+    s = sub.add_parser("stat", help="slot count, ring id and highest committed seq")
+    s.add_argument("ring")
+    args = ap.parse_args(argv)
+    if args.cmd == "stat":
+        rd = RingReader(args.ring)
+        try:
+            print(json.dumps({"ring": rd.ring_id, "slots": rd.slots, "record_size": RECORD_SIZE,
+                              "committed": rd.head(), "kinds": _load_kinds(args.ring)["names"]}, indent=2))
+        finally:
+            rd.close()
+        return 0
+    try:
+        rep = drain(args.ring, args.out, follow=args.follow, poll_s=args.poll)
+    except KeyboardInterrupt:
+        return 0
+    print(json.dumps(rep, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
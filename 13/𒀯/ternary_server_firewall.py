@@ -49,6 +49,7 @@ note on style: comments and prose avoid em dashes by design.
 
 from __future__ import annotations
 import os
+import sys
 import json
 import time
 import math
@@ -63,10 +64,44 @@ import shutil
 import hashlib
 import random
 import threading
+import zlib
+import atexit
+import weakref
+import logging
+import logging.handlers
+import bisect
+import heapq
+import itertools
+from array import array
+from collections import OrderedDict
 from dataclasses import dataclass, asdict, field
-from typing import Any, Dict, Optional, Tuple, List, Callable
+from typing import Any, Dict, Optional, Tuple, List, Callable, Sequence, Iterator
 from datetime import datetime, timezone
 
+# optional vectorized scoring for burst ingress
+try:
+    import numpy as np
+    _HAS_NUMPY = True
+except Exception:
+    np = None
+    _HAS_NUMPY = False
+
+# optional zstd for segment archives, lzma from the stdlib otherwise
+try:
+    import zstandard as zstd
+    _HAS_ZSTD = True
+except Exception:
+    zstd = None
+    _HAS_ZSTD = False
+
+# optional mmap ring sink for per-packet records, see ring_log.py
+try:
+    from ring_log import open_ring
+    _HAS_RING = True
+except Exception:
+    open_ring = None
+    _HAS_RING = False
+
 # --------------- configuration ---------------
 
 # creed birthright: override via env if needed
@@ -84,11 +119,27 @@ if ENV in ("prod", "production") and len(HMAC_KEY) < 16:
 CHAIN_PATH = os.getenv("FIREWALL_CHAIN_PATH", "/mnt/data/firewall.chain.jsonl")
 CHAIN_FSYNC = os.getenv("FIREWALL_CHAIN_FSYNC", "0").lower() in ("1", "true", "yes")
 CHAIN_MAX_MB = float(os.getenv("FIREWALL_CHAIN_MAX_MB", "64"))
+# linked signs every record; merkle hashes records into leaves and signs one root per block
+CHAIN_MODE = os.getenv("FIREWALL_CHAIN_MODE", "linked").strip().lower()  # linked | merkle
+MERKLE_BLOCK = int(os.getenv("FIREWALL_MERKLE_BLOCK", "256"))
+# an open block older than this is closed on the next append
+MERKLE_FLUSH_S = float(os.getenv("FIREWALL_MERKLE_FLUSH_S", "5.0"))
+# sqlite offset index next to the chain, see ChainIndex
+CHAIN_INDEX = os.getenv("FIREWALL_CHAIN_INDEX", "0").lower() in ("1", "true", "yes")
+# convert rotated segments into columnar archives in the background, see archive_segment
+CHAIN_ARCHIVE = os.getenv("FIREWALL_CHAIN_ARCHIVE", "0").lower() in ("1", "true", "yes")
+ARCHIVE_LEVEL = int(os.getenv("FIREWALL_ARCHIVE_LEVEL", "10"))
+# records per archive block; a point read decodes one block
+ARCHIVE_BLOCK = max(1, int(os.getenv("FIREWALL_ARCHIVE_BLOCK", "1024")))
+# open archives ChainIndex.read keeps around
+INDEX_ARCHIVE_CACHE = max(1, int(os.getenv("FIREWALL_INDEX_ARCHIVE_CACHE", "8")))
 
 # thresholds
 THRESH_HI = float(os.getenv("FIREWALL_THRESHOLD_HI", "0.75"))
 THRESH_LO = float(os.getenv("FIREWALL_THRESHOLD_LO", "0.65"))
 VULN_MARGIN = float(os.getenv("FIREWALL_VULNERABLE_MARGIN", "0.10"))
+# THRESH_HI and THRESH_LO move together under this lock
+_THRESH_LOCK = threading.Lock()
 
 # debounce base windows
 DEBOUNCE_V_S = float(os.getenv("FIREWALL_DEBOUNCE_SEC_V", "5.0"))
@@ -97,6 +148,23 @@ DEBOUNCE_C_S = float(os.getenv("FIREWALL_DEBOUNCE_SEC_C", str(DEBOUNCE_V_S)))
 # resolver timeout
 RESOLVER_TIMEOUT_S = float(os.getenv("FIREWALL_RESOLVER_TIMEOUT_S", "30.0"))
 
+# resolver pool: width, re-poll interval while OBSERVE, bound on queued plus waiting resolutions
+# and what to do past it
+RESOLVER_WORKERS = int(os.getenv("FIREWALL_RESOLVER_WORKERS", "4"))
+RESOLVER_POLL_S = float(os.getenv("FIREWALL_RESOLVER_POLL_S", "1.0"))
+RESOLVE_QUEUE_MAX = int(os.getenv("FIREWALL_RESOLVE_QUEUE_MAX", "1024"))
+RESOLVE_OVERFLOW = os.getenv("FIREWALL_RESOLVE_OVERFLOW", "object").strip().lower()  # object | spill
+# object overflow: settlements queued for the settler thread; past this the caller settles itself
+RESOLVE_SETTLE_MAX = int(os.getenv("FIREWALL_RESOLVE_SETTLE_MAX", "4096"))
+
+# felt experience: notes are coalesced per window or count into one chain record
+FEEL_COALESCE_S = float(os.getenv("FIREWALL_FEEL_COALESCE_S", "1.0"))
+FEEL_COALESCE_N = int(os.getenv("FIREWALL_FEEL_COALESCE_N", "256"))
+FEEL_QUEUE_MAX = int(os.getenv("FIREWALL_FEEL_QUEUE_MAX", "8192"))
+# longest mood trail kept per coalesced record; older moods past it are dropped
+# and counted in mood_transitions_dropped, the first mood is kept apart
+FEEL_TRAIL_MAX = max(1, int(os.getenv("FIREWALL_FEEL_TRAIL_MAX", "64")))
+
 # allowlist for context keys, case insensitive
 ALLOW_CTX = {k.strip().lower() for k in os.getenv("FIREWALL_CONTEXT_ALLOWLIST", "source,reason").split(",")}
 
@@ -106,11 +174,38 @@ _DENY_CTX = {
     "password","pass","secret","bearer","authorization"
 }
 
+# logging: level, json or text lines, and the bound of the handoff queue to the writer thread
+LOG_LEVEL = os.getenv("FIREWALL_LOG_LEVEL", "INFO").strip().upper()
+LOG_FORMAT = os.getenv("FIREWALL_LOG_FORMAT", "json").strip().lower()  # json | text
+LOG_QUEUE_MAX = int(os.getenv("FIREWALL_LOG_QUEUE_MAX", "65536"))
+# packet rate telemetry: ewma horizons in seconds and the sliding window of one second buckets
+def _telemetry_horizons(raw: str) -> Tuple[float, ...]:
+    # checked at import: the ingress rate reads the middle horizon on every packet
+    try:
+        hs = tuple(float(x) for x in raw.split(",") if x.strip())
+    except ValueError:
+        raise ValueError(f"FIREWALL_TELEMETRY_HORIZONS must be comma separated seconds, got {raw!r}") from None
+    if not hs or not all(math.isfinite(h) and h > 0 for h in hs):
+        raise ValueError(f"FIREWALL_TELEMETRY_HORIZONS needs at least one positive horizon, got {raw!r}")
+    return hs
+
+TELEMETRY_HORIZONS = _telemetry_horizons(os.getenv("FIREWALL_TELEMETRY_HORIZONS", "1,10,60"))
+TELEMETRY_WINDOW_S = int(os.getenv("FIREWALL_TELEMETRY_WINDOW_S", "60"))
+# metrics() score percentiles and window_totals cover the current and the previous window of this many seconds
+METRICS_WINDOW_S = float(os.getenv("FIREWALL_METRICS_WINDOW_S", "300"))
+# per-packet binary records into an mmap ring, drained by `python ring_log.py drain`.
+# organisms in one process share the ring; each shard process gets its own,
+# see shard_chain_path
+RING_LOG_PATH = os.getenv("FIREWALL_RING_LOG", "").strip()
+
 # calendar tribes for time flavor
 TRIBES = ["Reuven","Shimon","Levi","Yehuda","Dan","Naftali","Gad","Asher","Issachar","Zevulun","Yosef","Binyamin","Ephraim"]
 
-# external config source
+# external config source, polled in the background; a file or dir path stands in for the service
 CONFIG_URL = os.getenv("FIREWALL_CONFIG_URL", "http://config.api/latest")
+CONFIG_PATH = os.getenv("FIREWALL_CONFIG_PATH", "").strip()
+CONFIG_POLL_S = float(os.getenv("FIREWALL_CONFIG_POLL_S", "60"))
+CONFIG_TIMEOUT_S = float(os.getenv("FIREWALL_CONFIG_TIMEOUT_S", "5.0"))
 
 # --------------- helpers ---------------
 
@@ -144,6 +239,82 @@ def sanitize_ctx(raw: Optional[Dict[str, Any]]) -> Dict[str, Any]:
             out[lk] = v
     return out
 
+# --------------- logging ---------------
+
+# nothing is written until configure_logging runs; the cli calls it, embedders
+# can call it or attach their own handlers to this logger
+log = logging.getLogger("ternary_firewall")
+log.addHandler(logging.NullHandler())
+
+_LOG_STD_ATTRS = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime", "taskName"}
+
+class JsonLogFormatter(logging.Formatter):
+    """one json object per line: ts, level, logger, msg, plus any extra= fields."""
+    def format(self, record: logging.LogRecord) -> str:
+        out: Dict[str, Any] = {"ts": iso_utc(record.created), "level": record.levelname.lower(),
+                               "logger": record.name, "thread": record.threadName, "msg": record.getMessage()}
+        for k, v in record.__dict__.items():
+            if k not in _LOG_STD_ATTRS and k not in out:
+                out[k] = v
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, separators=(",",":"), default=str)
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    # never blocks the caller: a full queue drops the record and counts it
+    def __init__(self, q: "queue.Queue[logging.LogRecord]"):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # formatting happens on the listener thread, not on the hot path
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_log_listener: Optional[logging.handlers.QueueListener] = None
+_log_handler: Optional[_DroppingQueueHandler] = None
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None, stream: Any = None) -> None:
+    """
+    route the module logger through a bounded queue to a listener thread that
+    writes to stream (stderr by default), so a slow sink never stalls a caller.
+    level and fmt default to FIREWALL_LOG_LEVEL and FIREWALL_LOG_FORMAT. calling
+    it again only changes the level.
+    """
+    global _log_listener, _log_handler
+    log.setLevel((level or LOG_LEVEL).upper())
+    if _log_listener is not None:
+        return
+    sink = logging.StreamHandler(stream or sys.stderr)
+    if (fmt or LOG_FORMAT) == "json":
+        sink.setFormatter(JsonLogFormatter())
+    else:
+        sink.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(threadName)s %(message)s"))
+    _log_handler = _DroppingQueueHandler(queue.Queue(maxsize=max(1, LOG_QUEUE_MAX)))
+    _log_listener = logging.handlers.QueueListener(_log_handler.queue, sink)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    log.addHandler(_log_handler)
+    log.propagate = False
+
+def _restart_logging(level: int) -> None:
+    # a forked child inherits the queue handler but not the listener thread,
+    # and a spawned one starts unconfigured
+    global _log_listener, _log_handler
+    if _log_handler is not None:
+        log.removeHandler(_log_handler)
+    _log_listener = _log_handler = None
+    configure_logging(logging.getLevelName(level))
+
+def log_dropped() -> int:
+    """records dropped because the log queue was full."""
+    return _log_handler.dropped if _log_handler else 0
+
 # --------------- enums ---------------
 
 class Ternary(enum.IntEnum):
@@ -176,15 +347,242 @@ class JsonlChain:
     def path(self) -> str:
         return self._path
 
-    def write(self, kind: str, payload: Dict[str, Any], digest: str, prev: Optional[str]) -> None:
+    def write(self, kind: str, payload: Dict[str, Any], digest: str, prev: Optional[str]) -> int:
+        # returns the byte offset the record starts at
         rec = {"kind": kind, "digest": digest, "prev": prev, "payload": payload}
-        line = json.dumps(rec, separators=(",",":")) + "\n"
+        line = (json.dumps(rec, separators=(",",":")) + "\n").encode("utf-8")
         with self._lock:
-            with open(self._path, "a", encoding="utf-8") as f:
+            with open(self._path, "ab") as f:
+                off = f.tell()
                 f.write(line)
                 if self._fsync:
                     f.flush()
                     os.fsync(f.fileno())
+        return off
+
+    def write_many(self, kind: str, records: List[Tuple[Dict[str, Any], str, Optional[str]]]) -> List[int]:
+        # records are (payload, digest, prev) in chain order; one open and one write per batch
+        return self.write_records([{"kind": kind, "digest": d, "prev": p, "payload": m} for m, d, p in records])
+
+    def write_records(self, records: List[Dict[str, Any]]) -> List[int]:
+        # whole records in chain order, for writers that mix record shapes
+        if not records:
+            return []
+        lines = [(json.dumps(rec, separators=(",",":")) + "\n").encode("utf-8") for rec in records]
+        with self._lock:
+            with open(self._path, "ab") as f:
+                off = f.tell()
+                f.write(b"".join(lines))
+                if self._fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+        offsets = []
+        for ln in lines:
+            offsets.append(off)
+            off += len(ln)
+        return offsets
+
+# --------------- merkle ---------------
+
+# leaves and inner nodes hash with distinct prefixes, and an odd node is
+# promoted rather than paired with itself, so no two trees share a root
+
+def leaf_hash(kind: str, payload: Dict[str, Any]) -> str:
+    s = json.dumps({"kind": kind, "payload": payload}, sort_keys=True, separators=(",",":")).encode("utf-8")
+    return hashlib.sha256(b"\x00" + s).hexdigest()
+
+def _node_hash(left: str, right: str) -> str:
+    return hashlib.sha256(b"\x01" + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+def merkle_levels(leaves: Sequence[str]) -> List[List[str]]:
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        cur = levels[-1]
+        nxt = [_node_hash(cur[i], cur[i + 1]) for i in range(0, len(cur) - 1, 2)]
+        if len(cur) % 2:
+            nxt.append(cur[-1])
+        levels.append(nxt)
+    return levels
+
+def merkle_root(leaves: Sequence[str]) -> Optional[str]:
+    return merkle_levels(leaves)[-1][0] if leaves else None
+
+def merkle_path(leaves: Sequence[str], index: int) -> List[Tuple[str, str]]:
+    """sibling hashes from leaf to root as (side, hash), side being where the sibling sits."""
+    path: List[Tuple[str, str]] = []
+    for level in merkle_levels(leaves)[:-1]:
+        if index % 2:
+            path.append(("L", level[index - 1]))
+        elif index + 1 < len(level):
+            path.append(("R", level[index + 1]))
+        index //= 2
+    return path
+
+def fold_merkle_path(leaf: str, path: Sequence[Sequence[str]]) -> str:
+    h = leaf
+    for side, sib in path:
+        h = _node_hash(sib, h) if side == "L" else _node_hash(h, sib)
+    return h
+
+# --------------- chain index ---------------
+
+# payload fields that name a record for --find
+_INDEX_ID_FIELDS = ("event_id", "source_event_id", "resolution_id", "handshake_id", "feel_id")
+
+class ChainIndex:
+    """
+    sqlite sidecar that maps ids, kinds and timestamps to (segment, offset).
+    rows are added as the chain is written and renamed with the segment on
+    rotation, so a lookup seeks straight to the record instead of scanning.
+    seq is the record ordinal inside its segment.
+    """
+    def __init__(self, chain_path: str, commit_every: int = 256):
+        import sqlite3
+        self._chain_path = os.path.abspath(chain_path)
+        self._dir = os.path.dirname(self._chain_path)
+        self._live = os.path.basename(self._chain_path)
+        self._commit_every = max(1, commit_every)
+        self._pending = 0
+        self._lock = threading.Lock()
+        # open archives by segment name, most recently read last; archives never change once written
+        self._archives: "OrderedDict[str, ChainArchive]" = OrderedDict()
+        mkdir_p(self._chain_path)
+        self._db = sqlite3.connect(self._chain_path + ".idx.sqlite", check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS records (
+                rid INTEGER PRIMARY KEY, segment TEXT, seq INTEGER, offset INTEGER,
+                kind TEXT, ts TEXT, digest TEXT);
+            CREATE TABLE IF NOT EXISTS ids (id TEXT, rid INTEGER);
+            CREATE INDEX IF NOT EXISTS ix_ids ON ids(id);
+            CREATE INDEX IF NOT EXISTS ix_ts ON records(ts);
+            CREATE INDEX IF NOT EXISTS ix_kind_ts ON records(kind, ts);
+            CREATE INDEX IF NOT EXISTS ix_seg ON records(segment, seq);
+        """)
+        row = self._db.execute("SELECT COALESCE(MAX(seq) + 1, 0) FROM records WHERE segment=?", (self._live,)).fetchone()
+        self._seq = int(row[0])
+
+    def _add(self, segment: str, seq: int, offset: int, kind: str, payload: Dict[str, Any], digest: Optional[str]) -> None:
+        cur = self._db.execute("INSERT INTO records (segment, seq, offset, kind, ts, digest) VALUES (?,?,?,?,?,?)",
+                               (segment, seq, offset, kind, payload.get("ts"), digest))
+        ids = {payload[k] for k in _INDEX_ID_FIELDS if isinstance(payload.get(k), str)}
+        if ids:
+            self._db.executemany("INSERT INTO ids (id, rid) VALUES (?,?)", [(i, cur.lastrowid) for i in ids])
+
+    def add(self, offset: int, kind: str, payload: Dict[str, Any], digest: Optional[str]) -> None:
+        self.add_many([(offset, kind, payload, digest)])
+
+    def add_many(self, rows: List[Tuple[int, str, Dict[str, Any], Optional[str]]]) -> None:
+        with self._lock:
+            for offset, kind, payload, digest in rows:
+                self._add(self._live, self._seq, offset, kind, payload, digest)
+                self._seq += 1
+            self._pending += len(rows)
+            if self._pending >= self._commit_every:
+                self._db.commit()
+                self._pending = 0
+
+    def rename_segment(self, rotated_path: str) -> None:
+        # the live file was renamed on rotation; its rows follow it
+        with self._lock:
+            self._db.execute("UPDATE records SET segment=? WHERE segment=?", (os.path.basename(rotated_path), self._live))
+            self._db.commit()
+            self._pending = 0
+            self._seq = 0
+
+    def archive_segment(self, rotated_path: str, archive_path: str) -> None:
+        # rows follow the segment into its archive, where a record is addressed by its ordinal
+        with self._lock:
+            self._db.execute("UPDATE records SET segment=?, offset=seq WHERE segment=?",
+                             (os.path.basename(archive_path), os.path.basename(rotated_path)))
+            self._db.commit()
+            self._pending = 0
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.commit()
+            self._pending = 0
+
+    def rebuild(self) -> int:
+        """drop all rows and index every segment from disk. returns the record count."""
+        with self._lock:
+            self._db.execute("DELETE FROM ids")
+            self._db.execute("DELETE FROM records")
+            n = 0
+            seq = 0
+            for fp in chain_segments(self._chain_path):
+                seg = os.path.basename(fp)
+                seq = 0
+                if fp.endswith(ARCHIVE_SUFFIX):
+                    for seq, rec in enumerate(ChainArchive(fp).records()):
+                        self._add(seg, seq, seq, rec.get("kind", ""), rec.get("payload") or {},
+                                  rec.get("digest") or rec.get("leaf"))
+                        n += 1
+                    seq = 0
+                    continue
+                with open(fp, "rb") as f:
+                    off = 0
+                    for line in f:
+                        if line.strip():
+                            rec = json.loads(line)
+                            self._add(seg, seq, off, rec.get("kind", ""), rec.get("payload") or {},
+                                      rec.get("digest") or rec.get("leaf"))
+                            seq += 1
+                            n += 1
+                        off += len(line)
+            self._db.commit()
+            self._pending = 0
+            self._seq = seq if os.path.exists(self._chain_path) else 0
+            return n
+
+    # --------------- queries ---------------
+
+    def _locations(self, sql: str, args: Tuple[Any, ...]) -> List[Tuple[str, int, int]]:
+        with self._lock:
+            return [(s, int(o), int(q)) for s, o, q in self._db.execute(sql, args).fetchall()]
+
+    def find(self, ident: str) -> List[Tuple[str, int, int]]:
+        """every record that carries ident in one of its id fields, in write order."""
+        return self._locations("SELECT r.segment, r.offset, r.seq FROM ids i JOIN records r ON r.rid = i.rid "
+                               "WHERE i.id=? ORDER BY r.rid", (ident,))
+
+    def range(self, start: str, end: str, kind: Optional[str] = None) -> List[Tuple[str, int, int]]:
+        """records with start <= ts < end, optionally of one kind. iso strings compare as text."""
+        if kind:
+            return self._locations("SELECT segment, offset, seq FROM records WHERE kind=? AND ts>=? AND ts<? ORDER BY rid",
+                                   (kind, start, end))
+        return self._locations("SELECT segment, offset, seq FROM records WHERE ts>=? AND ts<? ORDER BY rid", (start, end))
+
+    def by_kind(self, kind: str, limit: int = 100) -> List[Tuple[str, int, int]]:
+        """most recent records of one kind, newest first."""
+        return self._locations("SELECT segment, offset, seq FROM records WHERE kind=? ORDER BY rid DESC LIMIT ?",
+                               (kind, int(limit)))
+
+    def _archive(self, segment: str) -> "ChainArchive":
+        with self._lock:
+            arc = self._archives.pop(segment, None)
+            if arc is None:
+                arc = ChainArchive(os.path.join(self._dir, segment))
+            self._archives[segment] = arc
+            while len(self._archives) > INDEX_ARCHIVE_CACHE:
+                self._archives.popitem(last=False)
+            return arc
+
+    def read(self, segment: str, offset: int) -> Dict[str, Any]:
+        if segment.endswith(ARCHIVE_SUFFIX):
+            return self._archive(segment).record(offset)
+        with open(os.path.join(self._dir, segment), "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.commit()
+                self._db.close()
+                self._db = None
 
 # --------------- schemas ---------------
 
@@ -229,6 +627,13 @@ class HandshakeLog:
     version: str = "v2.0"
     digest: Optional[str] = None
 
+@dataclass
+class _PendingResolution:
+    event: PacketEvent
+    enqueued: float  # monotonic, for latency
+    deadline: Optional[float] = None  # set when the first poll starts
+    polls: int = 0
+
 @dataclass
 class AgentLog:
     ID: str
@@ -257,6 +662,283 @@ class FeltExperience:
     version: str = "v2.0"
     digest: Optional[str] = None
 
+# --------------- streaming stats ---------------
+
+class RingBuffer:
+    """
+    fixed size ring of float rows backed by array('d'). appends overwrite the
+    oldest row once full, so memory never grows with traffic.
+    """
+    def __init__(self, capacity: int, width: int = 1):
+        self._cap = max(1, int(capacity))
+        self._w = max(1, int(width))
+        self._buf = array("d", bytes(8 * self._cap * self._w))
+        self._n = 0  # total rows ever appended
+
+    def __len__(self) -> int:
+        return min(self._n, self._cap)
+
+    def append(self, *row: float) -> None:
+        base = (self._n % self._cap) * self._w
+        for i in range(self._w):
+            self._buf[base + i] = row[i]
+        self._n += 1
+
+    def _row(self, k: int) -> Any:
+        # k counts from the oldest retained row
+        base = ((self._n - len(self) + k) % self._cap) * self._w
+        return self._buf[base] if self._w == 1 else tuple(self._buf[base:base + self._w])
+
+    def first(self) -> Any:
+        return self._row(0) if self._n else None
+
+    def last(self) -> Any:
+        return self._row(len(self) - 1) if self._n else None
+
+    def tail(self, k: int) -> List[Any]:
+        """the newest k rows, oldest first."""
+        size = len(self)
+        return [self._row(i) for i in range(max(0, size - k), size)]
+
+class QuantileSketch:
+    """
+    ddsketch style quantile sketch. values fall into logarithmic buckets with
+    relative accuracy alpha between min_value and max_value; values past
+    either end count in the end bucket. the buckets are a fixed size fenwick
+    tree, so add and quantile are o(log buckets) whatever the stream length.
+    """
+    def __init__(self, alpha: float = 0.01, min_value: float = 1e-6, max_value: float = 1e6):
+        self._gamma = (1.0 + alpha) / (1.0 - alpha)
+        self._log_gamma = math.log(self._gamma)
+        self._min = min_value
+        self._k0 = math.ceil(math.log(min_value) / self._log_gamma)
+        self._size = max(1, math.ceil(math.log(max(max_value, min_value)) / self._log_gamma) - self._k0 + 1)
+        self._tree = [0] * (self._size + 1)  # 1-based fenwick tree over bucket counts
+        self._top = 1 << (self._size.bit_length() - 1)
+        self._low = 0  # values at or below min_value
+        self._n = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    def add(self, x: float) -> None:
+        self._n += 1
+        if x <= self._min:
+            self._low += 1
+            return
+        i = min(self._size, math.ceil(math.log(x) / self._log_gamma) - self._k0 + 1)
+        tree = self._tree
+        while i <= self._size:
+            tree[i] += 1
+            i += i & -i
+
+    def clear(self) -> None:
+        self._tree = [0] * (self._size + 1)
+        self._low = 0
+        self._n = 0
+
+    def quantile(self, q: float) -> float:
+        return QuantileSketch.merged_quantile((self,), q)
+
+    @staticmethod
+    def merged_quantile(sketches: Sequence["QuantileSketch"], q: float) -> float:
+        """quantile q over the union of sketches built with the same alpha and range."""
+        n = sum(sk._n for sk in sketches)
+        if not n:
+            return 0.0
+        rank = clamp(q, 0.0, 1.0) * (n - 1)
+        rank -= sum(sk._low for sk in sketches)
+        if rank < 0:
+            return 0.0
+        ref = sketches[0]
+        # descend the trees together to the first bucket whose running count passes rank
+        pos, step = 0, ref._top
+        while step:
+            nxt = pos + step
+            if nxt <= ref._size:
+                c = sum(sk._tree[nxt] for sk in sketches)
+                if c <= rank:
+                    pos = nxt
+                    rank -= c
+            step >>= 1
+        k = min(pos, ref._size - 1) + ref._k0
+        return 2.0 * ref._gamma ** k / (ref._gamma + 1.0)
+
+class ScoreWindow:
+    """
+    recent scores and state counts in rotating windows of window_s seconds:
+    the current window and windows - 1 before it, so reads cover between
+    (windows - 1) * window_s and windows * window_s seconds. no lock of its
+    own; the firewall holds _hist_lock around it.
+    """
+    def __init__(self, window_s: float = METRICS_WINDOW_S, windows: int = 2,
+                 clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._span = max(1e-3, float(window_s))
+        n = max(2, int(windows))
+        self._epoch = [-1] * n  # the window number each slot currently holds
+        self._sketches = [QuantileSketch() for _ in range(n)]
+        self._counts = [dict.fromkeys(FState, 0) for _ in range(n)]
+
+    @property
+    def horizon_s(self) -> float:
+        return self._span * len(self._epoch)
+
+    def _slot(self, now: float) -> int:
+        e = int(now // self._span)
+        i = e % len(self._epoch)
+        if self._epoch[i] != e:
+            self._epoch[i] = e
+            self._sketches[i].clear()
+            self._counts[i] = dict.fromkeys(FState, 0)
+        return i
+
+    def _live(self) -> List[int]:
+        e = int(self._clock() // self._span)
+        return [i for i, ei in enumerate(self._epoch) if e - len(self._epoch) < ei <= e]
+
+    def add(self, score: float, state: FState) -> None:
+        i = self._slot(self._clock())
+        self._sketches[i].add(score)
+        self._counts[i][state] += 1
+
+    def quantile(self, q: float) -> float:
+        return QuantileSketch.merged_quantile([self._sketches[i] for i in self._live()], q)
+
+    def totals(self) -> Dict[str, int]:
+        live = self._live()
+        return {f.value.lower(): sum(self._counts[i][f] for i in live) for f in FState}
+
+class Telemetry:
+    """
+    packet rate telemetry with o(1) updates. ewma event rates at fixed
+    horizons, per state counts in a ring of one second buckets, and alert
+    counters for issued and debounce suppressed alerts. one lock, held for a
+    handful of arithmetic steps per packet or burst.
+    """
+    # bucket columns: one per FState code, then alerts issued and suppressed
+    # for vulnerable and for critical
+    _COLS = ("secure", "vulnerable", "critical", "issued_vulnerable", "issued_critical",
+             "suppressed_vulnerable", "suppressed_critical")
+
+    def __init__(self, horizons: Sequence[float] = TELEMETRY_HORIZONS, window_s: int = TELEMETRY_WINDOW_S,
+                 clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._taus = tuple(max(1e-3, float(h)) for h in horizons)
+        self._rates = [0.0] * len(self._taus)
+        self._t: Optional[float] = None
+        self._win = max(1, int(window_s))
+        self._sec = [-1] * self._win  # the second each bucket currently holds
+        self._buckets = [[0] * len(self._COLS) for _ in range(self._win)]
+        self._totals = [0] * len(self._COLS)
+        self._lock = threading.Lock()
+
+    def _bucket(self, now: float) -> List[int]:
+        sec = int(now)
+        i = sec % self._win
+        if self._sec[i] != sec:
+            self._sec[i] = sec
+            row = self._buckets[i]
+            for k in range(len(row)):
+                row[k] = 0
+        return self._buckets[i]
+
+    def _decay(self, now: float) -> None:
+        if self._t is not None and now > self._t:
+            dt = now - self._t
+            for k, tau in enumerate(self._taus):
+                self._rates[k] *= math.exp(-dt / tau)
+        self._t = now if self._t is None else max(self._t, now)
+
+    def packets(self, secure: int = 0, vulnerable: int = 0, critical: int = 0) -> None:
+        """count scored packets by state; one call per packet or per burst."""
+        n = secure + vulnerable + critical
+        now = self._clock()
+        with self._lock:
+            self._decay(now)
+            for k, tau in enumerate(self._taus):
+                self._rates[k] += n / tau
+            row = self._bucket(now)
+            for k, c in ((0, secure), (1, vulnerable), (2, critical)):
+                row[k] += c
+                self._totals[k] += c
+
+    def alert(self, state: FState, suppressed: bool) -> None:
+        col = (5 if suppressed else 3) + (state is FState.CRITICAL)
+        now = self._clock()
+        with self._lock:
+            self._bucket(now)[col] += 1
+            self._totals[col] += 1
+
+    def rates(self) -> Dict[str, float]:
+        """packets per second at each horizon, decayed to now."""
+        now = self._clock()
+        with self._lock:
+            if self._t is None:
+                return {_horizon_label(h): 0.0 for h in self._taus}
+            dt = max(0.0, now - self._t)
+            return {_horizon_label(h): r * math.exp(-dt / h) for h, r in zip(self._taus, self._rates)}
+
+    def rate(self, horizon: float) -> float:
+        return self.rates().get(_horizon_label(horizon), 0.0)
+
+    def window(self) -> Dict[str, int]:
+        """counts over the last window_s seconds, the current second included."""
+        sec = int(self._clock())
+        out = [0] * len(self._COLS)
+        with self._lock:
+            for i in range(self._win):
+                if sec - self._win < self._sec[i] <= sec:
+                    for k, c in enumerate(self._buckets[i]):
+                        out[k] += c
+        return dict(zip(self._COLS, out))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            totals = dict(zip(self._COLS, self._totals))
+        w = self.window()
+        sup = w["suppressed_vulnerable"] + w["suppressed_critical"]
+        alerts = sup + w["issued_vulnerable"] + w["issued_critical"]
+        return {
+            "rates_hz": {k: round(v, 4) for k, v in self.rates().items()},
+            "window_s": self._win,
+            "window": w,
+            "suppression_ratio": round(sup / alerts, 4) if alerts else 0.0,
+            "totals": totals,
+        }
+
+def _horizon_label(h: float) -> str:
+    return f"{h:g}s"
+
+def _om_value(v: float) -> str:
+    # ints exactly, floats round trip; %g would turn counters past 999999 into 1.23457e+06
+    if isinstance(v, (bool, int)):
+        return str(int(v))
+    v = float(v)
+    if math.isnan(v):
+        return "NaN"
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(v)
+
+def openmetrics_text(families: Sequence[Tuple[str, str, str, Sequence[Tuple[Dict[str, str], float]]]]) -> str:
+    """
+    render (name, type, help, samples) families in the openmetrics text format.
+    counters get the _total suffix on their samples; the text ends with # EOF.
+    int samples are written exactly, float samples with repr.
+    """
+    out: List[str] = []
+    for name, kind, text, samples in families:
+        out.append(f"# TYPE {name} {kind}")
+        out.append(f"# HELP {name} {text}")
+        sample = name + "_total" if kind == "counter" else name
+        for labels, value in samples:
+            lab = ",".join(f'{k}="{v}"' for k, v in labels.items())
+            val = _om_value(value)
+            out.append(f"{sample}{{{lab}}} {val}" if lab else f"{sample} {val}")
+    out.append("# EOF")
+    return "\n".join(out) + "\n"
+
 # --------------- anomaly core ---------------
 
 class SimpleAnomalyCore:
@@ -275,6 +957,208 @@ class SimpleAnomalyCore:
             s = 1.0 if contrast > 0 else 0.0
         return float(clamp(s, 0.0, 1.0))
 
+    def score_many(self, a: Sequence[float], b: Sequence[float], c: Sequence[float]) -> List[float]:
+        """
+        columnar variant of score. uses numpy when present and falls back to
+        the scalar path otherwise. results match score element for element.
+        """
+        if not _HAS_NUMPY:
+            return [self.score(x, y, z) for x, y, z in zip(a, b, c)]
+        contrast = np.maximum(np.asarray(a, dtype=float), np.asarray(b, dtype=float)) - np.asarray(c, dtype=float) - 0.6
+        with np.errstate(over="ignore"):
+            s = 1.0 / (1.0 + np.exp(-contrast))
+        return np.clip(s, 0.0, 1.0).tolist()
+
+_FSTATE_BY_CODE = (FState.SECURE, FState.VULNERABLE, FState.CRITICAL)
+
+def classify_scores(scores: Sequence[float], hi: float, lo: float) -> List[FState]:
+    """vectorized twin of TernaryServerFirewall._classify for a column of scores."""
+    band_lo = max(lo, hi - clamp(VULN_MARGIN, 0.02, 0.5))
+    if not _HAS_NUMPY:
+        return [FState.CRITICAL if s >= hi else FState.VULNERABLE if s >= band_lo else FState.SECURE
+                for s in scores]
+    arr = np.asarray(scores, dtype=float)
+    codes = np.where(arr >= hi, 2, np.where(arr >= band_lo, 1, 0))
+    return [_FSTATE_BY_CODE[k] for k in codes.tolist()]
+
+def effective_thresholds(base_hi: float, base_lo: float, temperature: float) -> Tuple[float, float]:
+    """hi and lo after the temperature shift, as the organism applies them."""
+    delta = temperature * 0.10
+    hi = clamp(base_hi + delta, 0.05, 0.95)
+    lo = clamp(base_lo + delta, 0.05, 0.95)
+    eps = 0.02
+    if lo > hi - eps:
+        lo = max(0.05, hi - eps)
+    return hi, lo
+
+# energy drained per action, negative recovers; unknown kinds cost 0.1
+ENERGY_COSTS = {
+    "score": 0.05,
+    "alert": 0.5,
+    "resolve": 1.5,
+    "handshake": 1.0,
+    "actuator": 0.4,
+    "maintenance": 0.2,
+    "idle": -0.05,
+    "feel": 0.1,
+    "sync": 0.3
+}
+
+def distress_step(level: float, score: float, st: FState, prev: Optional[float], awareness: float) -> float:
+    """distress after one scored packet; prev is the score recorded just before it."""
+    # a high score or critical state increases distress
+    distress_factor = 0.0
+    if st is FState.CRITICAL:
+        distress_factor = 0.1
+    elif st is FState.VULNERABLE:
+        distress_factor = 0.05
+    # stress also increases with rate of change and score
+    change_rate = abs(score - prev) if prev is not None else 0.0
+    # but it decays over time
+    decay_rate = 0.01 + (awareness * 0.02)
+    return clamp(level + distress_factor + change_rate - decay_rate, 0.0, 100.0)
+
+# --------------- config sources ---------------
+
+# a config source has fetch() -> dict, or None when nothing changed since the
+# last fetch. sources are polled on the fw-config thread, never on the packet
+# path; a plain callable returning a dict still works as a source.
+
+class FileConfigSource:
+    """
+    local stand-in for the config service. a file holds one json object; a
+    directory contributes every *.json in name order, later files winning on
+    top level keys. unchanged stat results skip the read.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._stamp: Any = None
+
+    def _files(self) -> List[str]:
+        if os.path.isdir(self.path):
+            return sorted(glob.glob(os.path.join(self.path, "*.json")))
+        return [self.path]
+
+    def fetch(self) -> Optional[Dict[str, Any]]:
+        files = self._files()
+        stamp = []
+        for fp in files:
+            st = os.stat(fp)
+            stamp.append((fp, st.st_mtime_ns, st.st_size))
+        if stamp == self._stamp:
+            return None
+        cfg: Dict[str, Any] = {}
+        for fp in files:
+            with open(fp, "r", encoding="utf-8") as f:
+                cfg.update(json.load(f))
+        self._stamp = stamp
+        return cfg
+
+class HttpConfigSource:
+    """
+    config over http with conditional gets. the ETag and Last-Modified of the
+    last good response go back as If-None-Match and If-Modified-Since, so an
+    unchanged config costs one 304 and no body.
+    """
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+        self.etag: Optional[str] = None
+        self._modified: Optional[str] = None
+
+    def fetch(self) -> Optional[Dict[str, Any]]:
+        import urllib.request
+        import urllib.error
+        req = urllib.request.Request(self.url, headers={"Accept": "application/json"})
+        if self.etag:
+            req.add_header("If-None-Match", self.etag)
+        if self._modified:
+            req.add_header("If-Modified-Since", self._modified)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                body = resp.read()
+                etag, modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return None
+            raise
+        cfg = json.loads(body.decode("utf-8"))
+        self.etag, self._modified = etag, modified
+        return cfg
+
+def config_source_from_env() -> Optional[Any]:
+    """FIREWALL_CONFIG_PATH wins over an explicitly set FIREWALL_CONFIG_URL; neither means no source."""
+    if CONFIG_PATH:
+        return FileConfigSource(CONFIG_PATH)
+    if os.getenv("FIREWALL_CONFIG_URL"):
+        return HttpConfigSource(CONFIG_URL, timeout=CONFIG_TIMEOUT_S)
+    return None
+
+def _config_version(cfg: Dict[str, Any]) -> str:
+    s = json.dumps(cfg, sort_keys=True, separators=(",",":"), default=str).encode("utf-8")
+    return hashlib.sha256(s).hexdigest()[:16]
+
+@dataclass(frozen=True)
+class _AppliedConfig:
+    """one applied config: the snapshot, its version and the base thresholds it left in force."""
+    config: Dict[str, Any]
+    version: Optional[str]
+    hi: float
+    lo: float
+
+class _ConfigPoller:
+    """
+    background poll of one config source; apply gets each changed config. polls
+    from the thread and from poll() callers are serialized, so applies never overlap.
+    """
+    def __init__(self, source: Any, apply: Callable[[Dict[str, Any], str], None], every_s: float):
+        self._fetch = source.fetch if hasattr(source, "fetch") else source
+        self.source = type(source).__name__ if hasattr(source, "fetch") else "callable"
+        self._apply = apply
+        self._every = max(0.05, every_s)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self.version: Optional[str] = None
+        self.stats = {"polls": 0, "applied": 0, "unchanged": 0, "errors": 0}
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="fw-config", daemon=True)
+        self._thread.start()
+
+    def poll(self) -> bool:
+        """one fetch and apply in the calling thread; True when a new config was applied."""
+        with self._lock:
+            self.stats["polls"] += 1
+            try:
+                cfg = self._fetch()
+                ver = _config_version(cfg) if cfg is not None else None
+                if cfg is None or ver == self.version:
+                    self.stats["unchanged"] += 1
+                    return False
+                self._apply(cfg, ver)
+            except Exception as e:
+                self.stats["errors"] += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                log.error("config poll failed: %s", self.last_error)
+                return False
+            self.version = ver
+            self.stats["applied"] += 1
+            return True
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.poll()
+            self._wake.wait(self._every)
+            self._wake.clear()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+
 # --------------- organism ---------------
 
 class TernaryServerFirewall:
@@ -285,7 +1169,9 @@ class TernaryServerFirewall:
                  alert_sink: Optional[Callable[[PacketEvent], None]] = None,
                  resolution_sink: Optional[Callable[[IncidentResolution], None]] = None,
                  handshake_sink: Optional[Callable[[HandshakeLog], None]] = None,
-                 config_source: Optional[Callable[[], Dict[str,Any]]] = None,
+                 config_source: Optional[Any] = None,
+                 chain_path: Optional[str] = None,
+                 ring_path: Optional[str] = None,
                  ):
         self._id = str(uuid.uuid4())
         self._core = SimpleAnomalyCore()
@@ -294,10 +1180,29 @@ class TernaryServerFirewall:
         self._alert_sink = alert_sink or self._default_alert_sink
         self._resolution_sink = resolution_sink or self._default_resolution_sink
         self._handshake_sink = handshake_sink or self._default_handshake_sink
-        self._chain = JsonlChain(CHAIN_PATH, CHAIN_FSYNC)
+        chain_path = chain_path or CHAIN_PATH
+        self._chain = JsonlChain(chain_path, CHAIN_FSYNC)
+        self._index: Optional[ChainIndex] = ChainIndex(chain_path) if CHAIN_INDEX else None
+        # rows are committed in batches; whatever is still pending is committed
+        # when the organism is closed, collected or the interpreter exits
+        self._index_close = weakref.finalize(self, self._index.close) if self._index else None
         self._last_digest: Optional[str] = None
+        self._chain_records = 0
+        # merkle mode: leaf hashes of the open block, its number and when it opened
+        self._merkle = CHAIN_MODE == "merkle"
+        self._block_leaves: List[str] = []
+        self._block_no = 0
+        self._block_opened = 0.0
         self._ts_lock = threading.Lock()
         self._last_ts = 0.0
+        # lock stripes, never nested: vitals (energy, distress, temperature,
+        # awareness), history (rings, score window, totals), debounce, counters, applied
+        # config. the chain head, handshake bucket, resolver wait heap and spill
+        # file each keep their own lock below
+        self._state_lock = threading.Lock()
+        self._hist_lock = threading.Lock()
+        self._alert_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
         # thresholds and neurosymbolic temperature
         self._temperature: float = 0.0
         # energy budget 0..100 where costs drain and idle recovers
@@ -314,15 +1219,38 @@ class TernaryServerFirewall:
         # debounce
         self._last_alert = {FState.VULNERABLE: 0.0, FState.CRITICAL: 0.0}
         # history
-        self._scores: List[float] = []
-        self._ts_hist: List[float] = []
-        self._hi_lo_hist: List[Tuple[float,float,float]] = []
+        self._scores = RingBuffer(1024)
+        self._hi_lo_hist = RingBuffer(1024, width=3)
+        # rates, windowed state counts and debounce counters, behind its own lock
+        self._telemetry = Telemetry()
+        # recent score percentiles and state counts in rotating windows, and
+        # state counters over the whole run (reconciled against the chain)
+        self._score_window = ScoreWindow()
+        self._totals = {FState.SECURE: 0, FState.VULNERABLE: 0, FState.CRITICAL: 0}
         # handshake token bucket
+        self._hs_lock = threading.Lock()
         self._hs_tokens = 5
         self._hs_last = time.monotonic()
-        # queues for async tasks
-        self._resolve_q: "queue.Queue[PacketEvent]" = queue.Queue()
+        # chain head, shared by the caller and every worker thread
+        self._head_lock = threading.Lock()
+        # queues for async tasks: bounded intake, a due-time heap for re-polls, a spill file for overflow
+        self._resolve_q: "queue.Queue[Optional[_PendingResolution]]" = queue.Queue(maxsize=max(1, RESOLVE_QUEUE_MAX))
+        self._resolve_wait: List[Tuple[float, int, _PendingResolution]] = []
+        self._wait_lock = threading.Lock()
+        self._wait_seq = itertools.count()
+        self._spill_path = chain_path + ".resolve_spill.jsonl"
+        self._spill_lock = threading.Lock()
+        self._spilled = 0
+        self._resolve_latency = QuantileSketch()
+        self._resolve_stats = {"resolved": 0, "timeouts": 0, "overflow": 0, "settled_inline": 0}
+        # overflow settled as OBJECT off the ingress thread, see _settle_worker
+        self._settle_q: "queue.Queue[Optional[_PendingResolution]]" = queue.Queue(maxsize=max(1, RESOLVE_SETTLE_MAX))
+        self._workers_lock = threading.Lock()
         self._workers_started = False
+        # worker, feeling and archive threads, joined by close()
+        self._threads: List[threading.Thread] = []
+        self._closing = threading.Event()
+        self._closed = False
         # stats
         self._malformed = 0
         self._predict_errors = 0
@@ -330,148 +1258,319 @@ class TernaryServerFirewall:
         # emotional state and social bonds
         self._distress_level: float = 0.0
         self._bonds: Dict[str, float] = {} # peer_id -> bond_strength (0-1)
-        self._feel_q: "queue.Queue[Tuple[Optional[str], str]]" = queue.Queue()
-        self._config_source = config_source
-        self._last_config_check = 0.0
-        print(f"[{self._id}] firewall organism online, birthright={BIRTHRIGHT}")
+        # (event id, note, distress at the time) for the feeling worker, None stops it
+        self._feel_q: "queue.Queue[Optional[Tuple[Optional[str], str, float]]]" = queue.Queue(maxsize=max(1, FEEL_QUEUE_MAX))
+        self._feel_dropped = 0
+        # one ring record per scored packet: score, hi, lo, state code, temperature
+        ring_path = ring_path or RING_LOG_PATH
+        self._ring = open_ring(ring_path) if ring_path and _HAS_RING else None
+        self._ring_kind = self._ring.register("packet", ("score", "hi", "lo", "state", "temperature")) if self._ring else 0
+        # applied config, replaced whole under _THRESH_LOCK together with the
+        # thresholds it sets, never mutated
+        with _THRESH_LOCK:
+            self._applied = _AppliedConfig({}, None, THRESH_HI, THRESH_LO)
+        src = config_source if config_source is not None else config_source_from_env()
+        self._config_poller = _ConfigPoller(src, self._apply_config, CONFIG_POLL_S) if src is not None else None
+        log.info("[%s] firewall organism online, birthright=%s", self._id, BIRTHRIGHT,
+                 extra={"organism": self._id, "chain": chain_path})
 
     # --------------- time ---------------
 
     def _now(self) -> Tuple[float, str]:
         with self._ts_lock:
-            t = time.time()
-            if t <= self._last_ts:
-                t = self._last_ts + 1e-3
-            self._last_ts = t
+            us, last = time.time_ns() // 1000, round(self._last_ts * 1e6)
+            if us <= last:
+                us = last + 1000
+            t = self._last_ts = us / 1e6
             return t, iso_utc(t)
 
+    def _now_many(self, n: int) -> List[Tuple[float, str]]:
+        # one strictly increasing stamp per packet of a burst, a microsecond
+        # apart, starting at the current clock. counted in whole microseconds:
+        # t + 1e-6 in float seconds can round back onto the same iso stamp
+        with self._ts_lock:
+            us = max(time.time_ns() // 1000, round(self._last_ts * 1e6) + 1)
+            stamps = [(us + i) / 1e6 for i in range(n)]
+            self._last_ts = stamps[-1]
+        return [(x, iso_utc(x)) for x in stamps]
+
     # --------------- temperature ---------------
 
     def set_temperature(self, temp: float, alpha: float = 0.25) -> None:
         target = clamp(temp, -1.0, 1.0)
-        self._temperature = (1 - alpha) * self._temperature + alpha * target
-        print(f"[{self._id}] temperature set to {self._temperature:+.4f}")
+        with self._state_lock:
+            self._temperature = (1 - alpha) * self._temperature + alpha * target
+            temp_now = self._temperature
+        log.info("[%s] temperature set to %+.4f", self._id, temp_now)
 
     def _thresholds(self) -> Tuple[float, float]:
-        base_hi, base_lo = THRESH_HI, THRESH_LO
-        delta = self._temperature * 0.10
-        hi = clamp(base_hi + delta, 0.05, 0.95)
-        lo = clamp(base_lo + delta, 0.05, 0.95)
-        eps = 0.02
-        if lo > hi - eps:
-            lo = max(0.05, hi - eps)
-        return hi, lo
+        with _THRESH_LOCK:
+            base_hi, base_lo = THRESH_HI, THRESH_LO
+        return effective_thresholds(base_hi, base_lo, self._temperature)
 
     # --------------- energy ---------------
 
     def _energy_cost(self, kind: str) -> float:
-        table = {
-            "score": 0.05,
-            "alert": 0.5,
-            "resolve": 1.5,
-            "handshake": 1.0,
-            "actuator": 0.4,
-            "maintenance": 0.2,
-            "idle": -0.05,
-            "feel": 0.1,
-            "sync": 0.3
-        }
-        return table.get(kind, 0.1)
+        return ENERGY_COSTS.get(kind, 0.1)
 
     def _spend(self, kind: str) -> None:
-        self._energy = clamp(self._energy - self._energy_cost(kind), 0.0, 100.0)
+        cost = self._energy_cost(kind)
+        with self._state_lock:
+            self._energy = clamp(self._energy - cost, 0.0, 100.0)
 
     def _recover(self, kind: str) -> None:
-        self._energy = clamp(self._energy - self._energy_cost(kind), 0.0, 100.0)
+        cost = self._energy_cost(kind)
+        with self._state_lock:
+            self._energy = clamp(self._energy - cost, 0.0, 100.0)
 
     # --------------- temporal awareness ---------------
 
     def _temporal_snapshot(self) -> Dict[str, Any]:
         hi, lo = self._thresholds()
         sep = max(hi - lo, 1e-3)
-        rate = 0.0
-        if len(self._ts_hist) >= 2:
-            dt = self._ts_hist[-1] - self._ts_hist[0]
-            rate = len(self._ts_hist) / dt if dt > 0 else 0.0
+        rate = self._ingress_rate()
         sep_n = float(clamp((sep - 0.05) / (0.95 - 0.05), 0.0, 1.0))
         rate_n = float(clamp(rate / 25.0, 0.0, 1.0))
-        scalar = 0.5 * sep_n + 0.3 * (1.0 - abs(self._temperature)) + 0.2 * (1.0 - abs(0.5 - rate_n)*2.0)
-        self._temporal_awareness = float(clamp(scalar, 0.0, 1.0))
+        with self._state_lock:
+            temp = self._temperature
+            scalar = 0.5 * sep_n + 0.3 * (1.0 - abs(temp)) + 0.2 * (1.0 - abs(0.5 - rate_n)*2.0)
+            self._temporal_awareness = float(clamp(scalar, 0.0, 1.0))
+            aware = self._temporal_awareness
         return {
             "ts": iso_utc(),
-            "scalar": round(self._temporal_awareness, 4),
-            "temperature": round(self._temperature, 4),
+            "scalar": round(aware, 4),
+            "temperature": round(temp, 4),
             "hi": round(hi, 4),
             "lo": round(lo, 4),
             "ingress_rate_hz": round(rate, 4),
         }
 
+    def _ingress_rate(self) -> float:
+        # the middle ewma horizon, 10s by default
+        return self._telemetry.rate(TELEMETRY_HORIZONS[len(TELEMETRY_HORIZONS) // 2])
+
     # --------------- chain ---------------
 
     def _append_chain(self, kind: str, meta: Dict[str, Any]) -> str:
-        try:
-            self._maybe_rotate_chain()
-        except Exception as e:
-            print(f"[{self._id}] rotate failed: {e}")
-        prev = self._last_digest
-        dgst = signed_digest(prev, meta)
-        self._chain.write(kind, meta, dgst, prev)
+        # one critical section for rotate and the prev->digest handoff, so
+        # concurrent writers never fork the chain
+        with self._head_lock:
+            try:
+                self._maybe_rotate_chain()
+            except Exception:
+                log.exception("[%s] rotate failed", self._id)
+            if self._merkle:
+                return self._append_leaves(kind, [meta])[0]
+            prev = self._last_digest
+            dgst = signed_digest(prev, meta)
+            off = self._chain.write(kind, meta, dgst, prev)
+            if self._index:
+                self._index.add(off, kind, meta, dgst)
+            self._last_digest = dgst
+            self._chain_records += 1
+            return dgst
+
+    def _append_chain_many(self, kind: str, metas: List[Dict[str, Any]]) -> List[str]:
+        # same linkage as _append_chain, signed in order and written in one go
+        with self._head_lock:
+            try:
+                self._maybe_rotate_chain()
+            except Exception:
+                log.exception("[%s] rotate failed", self._id)
+            if self._merkle:
+                return self._append_leaves(kind, metas)
+            prev = self._last_digest
+            recs: List[Tuple[Dict[str, Any], str, Optional[str]]] = []
+            for meta in metas:
+                dgst = signed_digest(prev, meta)
+                recs.append((meta, dgst, prev))
+                prev = dgst
+            offsets = self._chain.write_many(kind, recs)
+            if self._index:
+                self._index.add_many([(o, kind, m, d) for o, (m, d, _) in zip(offsets, recs)])
+            self._last_digest = prev
+            self._chain_records += len(recs)
+            return [d for _, d, _ in recs]
+
+    def _append_leaves(self, kind: str, metas: List[Dict[str, Any]]) -> List[str]:
+        # merkle mode, caller holds self._head_lock. each record costs one sha256;
+        # a full or stale block is closed with one signed merkle_block record
+        recs: List[Dict[str, Any]] = []
+        leaves: List[str] = []
+        for meta in metas:
+            if not self._block_leaves:
+                self._block_opened = time.monotonic()
+            h = leaf_hash(kind, meta)
+            recs.append({"kind": kind, "leaf": h, "block": self._block_no, "payload": meta})
+            self._block_leaves.append(h)
+            leaves.append(h)
+            if len(self._block_leaves) >= max(1, MERKLE_BLOCK):
+                recs.append(self._seal_block())
+        if self._block_leaves and time.monotonic() - self._block_opened >= MERKLE_FLUSH_S:
+            recs.append(self._seal_block())
+        self._write_records(recs)
+        return leaves
+
+    def _seal_block(self) -> Dict[str, Any]:
+        # caller holds self._head_lock; returns the block record for the caller to write
+        payload = {"ts": iso_utc(), "block": self._block_no, "root": merkle_root(self._block_leaves),
+                   "count": len(self._block_leaves)}
+        dgst = signed_digest(self._last_digest, payload)
+        rec = {"kind": "merkle_block", "digest": dgst, "prev": self._last_digest, "payload": payload}
         self._last_digest = dgst
-        return dgst
+        self._block_leaves = []
+        self._block_no += 1
+        return rec
+
+    def _write_records(self, recs: List[Dict[str, Any]]) -> None:
+        offsets = self._chain.write_records(recs)
+        if self._index:
+            self._index.add_many([(o, r["kind"], r["payload"], r.get("digest") or r.get("leaf"))
+                                  for o, r in zip(offsets, recs)])
+        self._chain_records += len(recs)
+
+    def _close_block(self) -> None:
+        # caller holds self._head_lock
+        if self._block_leaves:
+            self._write_records([self._seal_block()])
+
+    def flush_chain(self) -> Optional[str]:
+        """close the open merkle block so every record so far is signed and indexed. returns the chain head."""
+        with self._head_lock:
+            self._close_block()
+            if self._index:
+                self._index.flush()
+            return self._last_digest
 
     def _maybe_rotate_chain(self) -> None:
         path = self._chain.path
         try:
             if os.path.exists(path) and os.path.getsize(path) > CHAIN_MAX_MB * 1024 * 1024:
-                ts = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+                # blocks never span segments
+                self._close_block()
+                ts = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
                 rotated = f"{path}.{ts}.rotated"
                 term = {"ts": iso_utc(), "terminal": True, "head": self._last_digest}
                 term_d = signed_digest(self._last_digest, term)
-                self._chain.write("terminal", term, term_d, self._last_digest)
+                off = self._chain.write("terminal", term, term_d, self._last_digest)
+                if self._index:
+                    self._index.add(off, "terminal", term, term_d)
                 os.replace(path, rotated)
+                if self._index:
+                    self._index.rename_segment(rotated)
                 cont = {"ts": iso_utc(), "continued_from": self._last_digest}
                 cont_d = signed_digest(self._last_digest, cont)
-                self._chain.write("continuation", cont, cont_d, self._last_digest)
+                off = self._chain.write("continuation", cont, cont_d, self._last_digest)
+                if self._index:
+                    self._index.add(off, "continuation", cont, cont_d)
+                    self._index.flush()
                 self._last_digest = cont_d
+                self._chain_records += 2
+                if CHAIN_ARCHIVE:
+                    t = threading.Thread(target=self._archive_rotated, args=(rotated,), name="fw-archive", daemon=True)
+                    t.start()
+                    with self._workers_lock:
+                        self._threads = [x for x in self._threads if x.is_alive()] + [t]
                 if CHAIN_FSYNC:
                     # best effort fsync the new file head
                     with open(path, "a", encoding="utf-8") as f:
                         f.flush()
                         os.fsync(f.fileno())
         except Exception as e:
-            print(f"[{self._id}] chain rotation error: {e}")
+            log.error("[%s] chain rotation error: %s", self._id, e)
+
+    def _archive_rotated(self, rotated: str) -> None:
+        try:
+            out = archive_segment(rotated, index=self._index)
+            log.info("[%s] archived %s -> %s", self._id, os.path.basename(rotated), os.path.basename(out))
+        except Exception as e:
+            log.error("[%s] archive failed for %s: %s", self._id, rotated, e)
+
+    def chain_head(self) -> Tuple[Optional[str], int]:
+        """current head digest and the number of records this instance has written."""
+        with self._head_lock:
+            return self._last_digest, self._chain_records
 
     # --------------- workers ---------------
 
     def _ensure_workers(self) -> None:
         if self._workers_started:
             return
-        t = threading.Thread(target=self._resolve_worker, name="fw-resolve", daemon=True)
-        t.start()
-        t2 = threading.Thread(target=self._feeling_worker, name="fw-feeling", daemon=True)
-        t2.start()
-        self._workers_started = True
+        with self._workers_lock:
+            if self._workers_started:
+                return
+            for i in range(max(1, RESOLVER_WORKERS)):
+                t = threading.Thread(target=self._resolve_worker, name=f"fw-resolve-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+            t2 = threading.Thread(target=self._feeling_worker, name="fw-feeling", daemon=True)
+            t2.start()
+            self._threads.append(t2)
+            t3 = threading.Thread(target=self._settle_worker, name="fw-settle", daemon=True)
+            t3.start()
+            self._threads.append(t3)
+            self._workers_started = True
 
     def _resolve_worker(self) -> None:
+        while not self._closing.is_set():
+            job = self._next_resolution()
+            if job is None:
+                return
+            try:
+                self._poll_resolution(job)
+            except Exception as e:
+                log.error("[%s] async resolve error: %s", self._id, e)
+
+    def _settle_worker(self) -> None:
+        # writes the OBJECT resolutions for overflow; None is the stop sentinel from close()
         while True:
-            ev = self._resolve_q.get()
+            job = self._settle_q.get()
             try:
-                self._resolve_and_handshake(ev)
+                if job is None:
+                    return
+                self._record_resolution(job.event, Ternary.OBJECT, job.enqueued, source="overflow_default_object")
             except Exception as e:
-                print(f"[{self._id}] async resolve error: {e}")
+                log.error("[%s] overflow settle error: %s", self._id, e)
             finally:
-                self._resolve_q.task_done()
-    
+                self._settle_q.task_done()
+
     def _feeling_worker(self) -> None:
+        # gather notes for up to FEEL_COALESCE_S or FEEL_COALESCE_N, then write one
+        # record. None is the stop sentinel from close(): the batch so far is written first
         while True:
-            ev_id, note = self._feel_q.get()
+            first = self._feel_q.get()
+            if first is None:
+                self._feel_q.task_done()
+                return
+            batch = [first]
+            stop = False
+            until = time.monotonic() + FEEL_COALESCE_S
+            while len(batch) < FEEL_COALESCE_N:
+                left = until - time.monotonic()
+                if left <= 0:
+                    break
+                try:
+                    item = self._feel_q.get(timeout=left)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._feel_q.task_done()
+                    stop = True
+                    break
+                batch.append(item)
             try:
-                self.feel_the_world(source_event_id=ev_id, notes=note)
+                if len(batch) == 1:
+                    ev_id, note, _ = batch[0]
+                    self.feel_the_world(source_event_id=ev_id, notes=note)
+                else:
+                    self._feel_coalesced(batch)
             except Exception as e:
-                print(f"[{self._id}] async feeling error: {e}")
+                log.error("[%s] async feeling error: %s", self._id, e)
             finally:
-                self._feel_q.task_done()
-
+                for _ in batch:
+                    self._feel_q.task_done()
+            if stop:
+                return
 
     # --------------- present ---------------
 
@@ -491,65 +1590,195 @@ class TernaryServerFirewall:
 
     def quarantine_host(self, reason: str) -> None:
         self._spend("actuator")
-        print(f"[{self._id}] actuator quarantine host - reason={reason}")
+        log.warning("[%s] actuator quarantine host - reason=%s", self._id, reason)
 
     def adjust_thresholds(self, hi: Optional[float] = None, lo: Optional[float] = None) -> None:
         global THRESH_HI, THRESH_LO
-        if hi is not None:
-            THRESH_HI = float(clamp(hi, 0.05, 0.95))
-        if lo is not None:
-            THRESH_LO = float(clamp(lo, 0.05, 0.95))
+        with _THRESH_LOCK:
+            if hi is not None:
+                THRESH_HI = float(clamp(hi, 0.05, 0.95))
+            if lo is not None:
+                THRESH_LO = float(clamp(lo, 0.05, 0.95))
+            new_hi, new_lo = THRESH_HI, THRESH_LO
         self._spend("actuator")
-        print(f"[{self._id}] thresholds adjusted - hi={THRESH_HI:.2f} lo={THRESH_LO:.2f}")
+        log.info("[%s] thresholds adjusted - hi=%.2f lo=%.2f", self._id, new_hi, new_lo)
 
     def schedule_retrain(self, tag: str) -> None:
         self._spend("actuator")
-        print(f"[{self._id}] retrain scheduled - tag={tag}")
+        log.info("[%s] retrain scheduled - tag=%s", self._id, tag)
 
     def rekey_hmac(self) -> None:
         self._spend("actuator")
-        print(f"[{self._id}] hmac rekey requested - manual step required")
+        log.warning("[%s] hmac rekey requested - manual step required", self._id)
 
     def request_peer_sync(self, peer_id: str) -> None:
         self._spend("sync")
-        print(f"[{self._id}] requesting sync from peer {peer_id[:8]}")
+        log.info("[%s] requesting sync from peer %s", self._id, peer_id[:8])
         # In a real implementation, this would send a network message.
         # We'll just log it for now.
 
     # --------------- ambiguity ---------------
 
     def _handshake_budget_ok(self) -> bool:
-        now = time.monotonic()
-        refill = int((now - self._hs_last) // 10)
-        if refill:
-            self._hs_tokens = min(5, self._hs_tokens + refill)
-            self._hs_last = now
-        if self._hs_tokens <= 0:
-            return False
-        self._hs_tokens -= 1
+        with self._hs_lock:
+            now = time.monotonic()
+            refill = int((now - self._hs_last) // 10)
+            if refill:
+                self._hs_tokens = min(5, self._hs_tokens + refill)
+                self._hs_last = now
+            if self._hs_tokens <= 0:
+                return False
+            self._hs_tokens -= 1
+            return True
+
+    def _resolve_room(self) -> int:
+        # RESOLVE_QUEUE_MAX bounds queued intake plus re-polls waiting in the heap
+        with self._wait_lock:
+            return RESOLVE_QUEUE_MAX - self._resolve_q.qsize() - len(self._resolve_wait)
+
+    def _admit_resolution(self, job: "_PendingResolution") -> bool:
+        # check and enqueue under the wait lock, so intake, spill drains and re-polls share one bound
+        with self._wait_lock:
+            if self._resolve_q.qsize() + len(self._resolve_wait) >= RESOLVE_QUEUE_MAX:
+                return False
+            try:
+                self._resolve_q.put_nowait(job)
+            except queue.Full:
+                return False
         return True
 
-    def _resolve_and_handshake(self, event: PacketEvent) -> None:
-        print(f"[{event.event_id[:8]}] ambiguity resolution begins")
-        start = time.monotonic()
-        decision = Ternary.OBSERVE
+    def _submit_resolution(self, event: PacketEvent) -> None:
+        if self._closing.is_set():
+            self._record_resolution(event, Ternary.OBJECT, time.monotonic(), source="shutdown_default_object")
+            return
+        self._ensure_workers()
+        job = _PendingResolution(event=event, enqueued=time.monotonic())
+        if not self._admit_resolution(job):
+            self._resolve_overflow(job)
+
+    def _resolve_overflow(self, job: "_PendingResolution") -> None:
+        # no room: spill to disk for later, or settle on OBJECT now
+        event = job.event
+        with self._wait_lock:
+            self._resolve_stats["overflow"] += 1
+        if RESOLVE_OVERFLOW == "spill":
+            row = asdict(event)
+            row["state"] = event.state.value
+            # monotonic clocks do not survive a restart: keep wall-clock times so
+            # latency and the poll deadline still count from the first enqueue
+            skew = time.time() - time.monotonic()
+            row["_enqueued_at"] = job.enqueued + skew
+            row["_deadline_at"] = None if job.deadline is None else job.deadline + skew
+            row["_polls"] = job.polls
+            line = json.dumps(row, separators=(",",":")) + "\n"
+            with self._spill_lock:
+                mkdir_p(self._spill_path)
+                with open(self._spill_path, "a", encoding="utf-8") as f:
+                    f.write(line)
+                self._spilled += 1
+            return
+        log.warning("[%s] resolve queue full - default OBJECT", event.event_id[:8])
+        # the chain writes and sinks run on the settler, not on the saturated caller,
+        # unless the settler is this far behind too: then the caller pays, as backpressure
+        try:
+            self._settle_q.put_nowait(job)
+            return
+        except queue.Full:
+            pass
+        with self._wait_lock:
+            self._resolve_stats["settled_inline"] += 1
+        self._record_resolution(event, Ternary.OBJECT, job.enqueued, source="overflow_default_object")
+
+    def _drain_spill(self, min_room: int = 1) -> None:
+        # refill the queue from the spill file while there is room under the bound
+        if not self._spilled or self._resolve_room() < max(1, min_room):
+            return
+        with self._spill_lock:
+            if not os.path.exists(self._spill_path):
+                self._spilled = 0
+                return
+            with open(self._spill_path, "r", encoding="utf-8") as f:
+                rows = [ln for ln in f.read().splitlines() if ln.strip()]
+            keep: List[str] = []
+            skew = time.time() - time.monotonic()
+            now = time.monotonic()
+            for i, line in enumerate(rows):
+                row = json.loads(line)
+                row["state"] = FState(row["state"])
+                enqueued_at = row.pop("_enqueued_at", None)
+                deadline_at = row.pop("_deadline_at", None)
+                polls = int(row.pop("_polls", 0) or 0)
+                job = _PendingResolution(event=PacketEvent(**row),
+                                         enqueued=now if enqueued_at is None else min(now, enqueued_at - skew),
+                                         deadline=None if deadline_at is None else deadline_at - skew,
+                                         polls=polls)
+                if not self._admit_resolution(job):
+                    keep = rows[i:]
+                    break
+            with open(self._spill_path, "w", encoding="utf-8") as f:
+                f.write("".join(ln + "\n" for ln in keep))
+            self._spilled = len(keep)
+
+    def _next_resolution(self) -> Optional["_PendingResolution"]:
+        # due re-polls first, then fresh events; never sleeps past the next due
+        # poll. None once close() has started
+        while not self._closing.is_set():
+            with self._wait_lock:
+                now = time.monotonic()
+                if self._resolve_wait and self._resolve_wait[0][0] <= now:
+                    return heapq.heappop(self._resolve_wait)[2]
+                wait = self._resolve_wait[0][0] - now if self._resolve_wait else RESOLVER_POLL_S
+            try:
+                job = self._resolve_q.get(timeout=clamp(wait, 0.01, RESOLVER_POLL_S))
+            except queue.Empty:
+                self._drain_spill()
+                continue
+            self._resolve_q.task_done()
+            if job is None:
+                return None
+            # keep the spill moving under sustained intake too, a quarter of the bound at a time
+            self._drain_spill(min_room=RESOLVE_QUEUE_MAX // 4)
+            return job
+        return None
+
+    def _poll_resolution(self, job: "_PendingResolution") -> None:
+        event = job.event
+        now = time.monotonic()
+        if job.deadline is None:
+            job.deadline = now + RESOLVER_TIMEOUT_S
+            log.debug("[%s] ambiguity resolution begins", event.event_id[:8])
+        if now > job.deadline:
+            with self._wait_lock:
+                self._resolve_stats["timeouts"] += 1
+            log.info("[%s] resolution timeout - default OBJECT", event.event_id[:8])
+            self._record_resolution(event, Ternary.OBJECT, job.enqueued)
+            return
+        decision = self._resolver(event)
+        job.polls += 1
+        if decision == Ternary.OBSERVE:
+            log.debug("[%s] waiting for resolution", event.event_id[:8])
+            due = min(now + RESOLVER_POLL_S, job.deadline + 1e-3)
+            with self._wait_lock:
+                if self._resolve_q.qsize() + len(self._resolve_wait) < RESOLVE_QUEUE_MAX:
+                    heapq.heappush(self._resolve_wait, (due, next(self._wait_seq), job))
+                    return
+            self._resolve_overflow(job)
+            return
+        self._record_resolution(event, decision, job.enqueued)
+
+    def _record_resolution(self, event: PacketEvent, decision: Ternary, enqueued: float,
+                           source: Optional[str] = None) -> None:
+        with self._wait_lock:
+            self._resolve_latency.add(time.monotonic() - enqueued)
+            self._resolve_stats["resolved"] += 1
         parties = {"ops_primary": "s.k", "ops_secondary": "r.f"}
-        while decision == Ternary.OBSERVE:
-            if time.monotonic() - start > RESOLVER_TIMEOUT_S:
-                decision = Ternary.OBJECT
-                print(f"[{event.event_id[:8]}] resolution timeout - default OBJECT")
-                break
-            time.sleep(1.0)
-            decision = self._resolver(event)
-            if decision == Ternary.OBSERVE:
-                print(f"[{event.event_id[:8]}] waiting for resolution")
         res_meta = {
             "resolution_id": str(uuid.uuid4()),
             "ts": iso_utc(),
             "source_event_id": event.event_id,
             "decision": decision.name,
             "participants": parties,
-            "resolver_source": self._resolver_source,
+            "resolver_source": source or self._resolver_source,
         }
         res_digest = self._append_chain("resolution", res_meta)
         res = IncidentResolution(
@@ -558,13 +1787,13 @@ class TernaryServerFirewall:
             source_event_id=event.event_id,
             decision=decision,
             participants=parties,
-            resolver_source=self._resolver_source,
+            resolver_source=res_meta["resolver_source"],
             context=event.context,
             digest=res_digest,
         )
         self._resolution_sink(res)
         if not self._handshake_budget_ok():
-            print(f"[{event.event_id[:8]}] handshake suppressed - budget exhausted")
+            log.info("[%s] handshake suppressed - budget exhausted", event.event_id[:8])
             return
         if decision == Ternary.AFFIRM:
             happened = f"critical or vulnerable flag confirmed. host quarantine executed."
@@ -598,7 +1827,7 @@ class TernaryServerFirewall:
             digest=hs_digest,
         )
         self._handshake_sink(hs)
-        self._feel_q.put((event.event_id, f"handshake completed with decision: {decision.name}"))
+        self._feel(event.event_id, f"handshake completed with decision: {decision.name}")
 
     # --------------- process ---------------
 
@@ -607,11 +1836,14 @@ class TernaryServerFirewall:
         base = DEBOUNCE_C_S if state is FState.CRITICAL else DEBOUNCE_V_S
         scale = 1.0 + (-0.4 * self._temperature)
         win = max(0.05, base / max(0.05, scale))
-        last_t = self._last_alert.get(state, 0.0)
-        if now - last_t < win:
-            return True
-        self._last_alert[state] = now
-        return False
+        # check and set in one step, so one alert per window across ingress threads
+        with self._alert_lock:
+            last_t = self._last_alert.get(state, 0.0)
+            hit = now - last_t < win
+            if not hit:
+                self._last_alert[state] = now
+        self._telemetry.alert(state, suppressed=hit)
+        return hit
 
     def _classify(self, score: float, hi: float, lo: float) -> FState:
         band_lo = max(lo, hi - clamp(VULN_MARGIN, 0.02, 0.5))
@@ -621,77 +1853,169 @@ class TernaryServerFirewall:
             return FState.VULNERABLE
         return FState.SECURE
 
-    def _update_distress(self, score: float, st: FState) -> None:
-        # a high score or critical state increases distress
-        distress_factor = 0.0
-        if st is FState.CRITICAL:
-            distress_factor = 0.1
-        elif st is FState.VULNERABLE:
-            distress_factor = 0.05
-        
-        # stress also increases with rate of change and score
-        change_rate = 0.0
-        if len(self._scores) > 1:
-            change_rate = abs(score - self._scores[-1])
-        
-        self._distress_level += (distress_factor + change_rate)
-        
-        # but it decays over time
-        decay_rate = 0.01 + (self._temporal_awareness * 0.02)
-        self._distress_level = clamp(self._distress_level - decay_rate, 0.0, 100.0)
+    def _update_distress(self, score: float, st: FState, prev: Optional[float]) -> None:
+        # prev is the score that was last in history when this one was recorded
+        with self._state_lock:
+            self._distress_level = distress_step(self._distress_level, score, st, prev, self._temporal_awareness)
+
+    def _record_history(self, scores: Sequence[float], states: Sequence[FState],
+                        hi: float, lo: float) -> List[Optional[float]]:
+        # one history critical section per packet or burst; returns, per score,
+        # the previous score for _update_distress
+        temp = self._temperature
+        prevs: List[Optional[float]] = []
+        with self._hist_lock:
+            before = dict(self._totals)
+            for s, st in zip(scores, states):
+                prevs.append(self._scores.last() if len(self._scores) > 1 else None)
+                self._scores.append(s)
+                self._hi_lo_hist.append(hi, lo, temp)
+                self._score_window.add(s, st)
+                self._totals[st] += 1
+            counts = [self._totals[f] - before[f] for f in _FSTATE_BY_CODE]
+        self._telemetry.packets(*counts)
+        return prevs
 
     def process_packet(self, data: Dict[str, Any]) -> FState:
-        # check for new config from source
-        now = time.monotonic()
-        if now - self._last_config_check > 60:
-            self._update_config_from_source()
-            self._last_config_check = now
-        
+        """score, chain and react to one packet. safe to call from many threads."""
         # energy idle recovery
         self._recover("idle")
         try:
             a = float(data["signal_a"]); b = float(data["signal_b"]); c = float(data["signal_c"])
         except Exception as e:
-            self._malformed += 1
-            print(f"[{self._id}] malformed packet: {e}")
-            self._feel_q.put((None, f"received malformed packet: {e}"))
+            with self._stats_lock:
+                self._malformed += 1
+            log.debug("[%s] malformed packet: %s", self._id, e)
+            self._feel(None, f"received malformed packet: {e}")
             return FState.SECURE
         ctx = sanitize_ctx(data.get("context", {}))
         self._spend("score")
         s = self._core.score(a, b, c)
         hi, lo = self._thresholds()
         st = self._classify(s, hi, lo)
+        if self._ring:
+            self._ring.log(self._ring_kind, 10, s, hi, lo, _FSTATE_BY_CODE.index(st), self._temperature)
         t, ts = self._now()
         meta = {"event_id": str(uuid.uuid4()), "ts": ts, "signals": {"signal_a": a, "signal_b": b, "signal_c": c},
                 "score": s, "state": st.value, "temperature": round(self._temperature,4), "hi": round(hi,4), "lo": round(lo,4)}
         digest = self._append_chain("event", meta)
         ev = PacketEvent(event_id=meta["event_id"], ts_utc=ts, service_id=self._id, signals=meta["signals"],
                          score=s, state=st, context=ctx, digest=digest)
-        self._update_distress(s, st)
-        masked = self._masked(ev.signals)
+        # metrics
+        prev = self._record_history((s,), (st,), hi, lo)[0]
+        self._update_distress(s, st, prev)
+        # masking is only worth doing for a line that will be written
+        masked = self._masked(ev.signals) if log.isEnabledFor(logging.DEBUG) else None
         if st in (FState.CRITICAL, FState.VULNERABLE):
             if self._debounced(st):
-                print(f"[{ev.event_id[:8]}] alert suppressed (debounce) score={s:.4f}")
+                log.debug("[%s] alert suppressed (debounce) score=%.4f", ev.event_id[:8], s)
             else:
                 self._spend("alert")
-                print(f"[{ev.event_id[:8]}] alert {st.value} score={s:.4f} hi={hi:.2f} lo={lo:.2f} payload={masked}")
+                log.debug("[%s] alert %s score=%.4f hi=%.2f lo=%.2f payload=%s", ev.event_id[:8], st.value, s, hi, lo, masked)
                 self._alert_sink(ev)
-                self._ensure_workers()
-                self._resolve_q.put(ev)
+                self._submit_resolution(ev)
         else:
-            print(f"[{ev.event_id[:8]}] secure score={s:.4f} payload={masked}")
-        
-        # metrics
-        self._scores.append(s); self._ts_hist.append(time.monotonic())
-        self._hi_lo_hist.append((hi, lo, self._temperature))
-        if len(self._scores) > 1024:
-            self._scores = self._scores[-1024:]
-            self._ts_hist = self._ts_hist[-1024:]
-            self._hi_lo_hist = self._hi_lo_hist[-1024:]
+            log.debug("[%s] secure score=%.4f payload=%s", ev.event_id[:8], s, masked)
         
-        self._feel_q.put((ev.event_id, f"processed packet with score: {s:.4f}"))
+        self._feel(ev.event_id, f"processed packet with score: {s:.4f}")
         return st
 
+    def _batch_column(self, col: Any, bad: set) -> List[float]:
+        try:
+            if _HAS_NUMPY:
+                return np.asarray(col, dtype=float).tolist()
+            return [float(v) for v in col]
+        except (TypeError, ValueError):
+            pass
+        out: List[float] = []
+        for i, v in enumerate(col):
+            try:
+                out.append(float(v))
+            except (TypeError, ValueError):
+                bad.add(i)
+                out.append(0.0)
+        return out
+
+    def process_packets(self, batch: Dict[str, Any]) -> List[FState]:
+        """
+        burst ingress in columnar form. batch holds equal length sequences (lists
+        or numpy arrays) under signal_a, signal_b and signal_c, plus an optional
+        context that is one dict for the whole burst or a list with one dict per
+        packet. each packet gets its own stamp, a microsecond apart and after
+        every stamp this organism handed out before. scoring and classification
+        run vectorized, debounce and distress run in a single pass, and the
+        event records land in one chain write. returns one state per packet, in
+        input order. safe to call from many threads.
+        """
+        try:
+            n = len(batch["signal_a"])
+            if len(batch["signal_b"]) != n or len(batch["signal_c"]) != n:
+                raise ValueError("signal columns differ in length")
+        except KeyError as e:
+            raise ValueError(f"batch missing column {e}") from None
+        if n == 0:
+            return []
+        bad: set = set()
+        a = self._batch_column(batch["signal_a"], bad)
+        b = self._batch_column(batch["signal_b"], bad)
+        c = self._batch_column(batch["signal_c"], bad)
+        raw_ctx = batch.get("context")
+        if isinstance(raw_ctx, (list, tuple)):
+            if len(raw_ctx) != n:
+                raise ValueError("context list differs in length from signal columns")
+            ctxs = [sanitize_ctx(x) for x in raw_ctx]
+        else:
+            shared = sanitize_ctx(raw_ctx)
+            ctxs = [shared] * n
+        stamps = [ts for _, ts in self._now_many(n)]
+
+        scores = self._core.score_many(a, b, c)
+        hi, lo = self._thresholds()
+        states = classify_scores(scores, hi, lo)
+        if self._ring:
+            ring, kind = self._ring.log, self._ring_kind
+            for s, st in zip(scores, states):
+                ring(kind, 10, s, hi, lo, _FSTATE_BY_CODE.index(st), self._temperature)
+        temp = round(self._temperature, 4)
+        hi_r, lo_r = round(hi, 4), round(lo, 4)
+
+        rows = [i for i in range(n) if i not in bad]
+        metas = [{"event_id": str(uuid.uuid4()), "ts": stamps[i],
+                  "signals": {"signal_a": a[i], "signal_b": b[i], "signal_c": c[i]},
+                  "score": scores[i], "state": states[i].value, "temperature": temp, "hi": hi_r, "lo": lo_r}
+                 for i in rows]
+        digests = self._append_chain_many("event", metas)
+
+        out: List[FState] = [FState.SECURE] * n
+        alerts = 0
+        for _ in bad:
+            self._recover("idle")
+        with self._stats_lock:
+            self._malformed += len(bad)
+        prevs = self._record_history([scores[i] for i in rows], [states[i] for i in rows], hi, lo)
+        for i, meta, digest, prev in zip(rows, metas, digests, prevs):
+            self._recover("idle")
+            self._spend("score")
+            s, st = scores[i], states[i]
+            self._update_distress(s, st, prev)
+            out[i] = st
+            if st is FState.SECURE or self._debounced(st):
+                continue
+            ev = PacketEvent(event_id=meta["event_id"], ts_utc=meta["ts"], service_id=self._id, signals=meta["signals"],
+                             score=s, state=st, context=ctxs[i], digest=digest)
+            self._spend("alert")
+            alerts += 1
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("[%s] alert %s score=%.4f hi=%.2f lo=%.2f payload=%s",
+                          ev.event_id[:8], st.value, s, hi, lo, self._masked(ev.signals))
+            self._alert_sink(ev)
+            self._submit_resolution(ev)
+
+        log.debug("[%s] batch processed n=%d alerts=%d malformed=%d", self._id, n, alerts, len(bad))
+        self._feel(metas[-1]["event_id"] if metas else None,
+                   f"processed batch of {n} packets with {alerts} alerts")
+        return out
+
     # --------------- logs and metrics ---------------
 
     def log_agent_reflection(self, summary: str, flags_reminders: str, milestones_events: str,
@@ -702,7 +2026,7 @@ class TernaryServerFirewall:
         weekday = datetime.fromtimestamp(t, tz=timezone.utc).strftime("%A")
         if not temporal_marker:
             temporal_marker = json.dumps(self._temporal_snapshot(), separators=(",",":"))
-        log = AgentLog(
+        entry = AgentLog(
             ID=str(uuid.uuid4()),
             Timestamp=ts,
             Weekday=weekday,
@@ -717,54 +2041,116 @@ class TernaryServerFirewall:
             Impact_Barometer=int(clamp(impact_barometer,1,13)),
             Mood_Check=int(clamp(mood_check,1,13)),
         )
-        print(f"[{log.ID[:8]}] agent reflection logged: {log.Summary[:48]}")
+        log.info("[%s] agent reflection logged: %s", entry.ID[:8], entry.Summary[:48])
         # hook for persistence if needed
 
     def metrics(self) -> Dict[str, Any]:
+        # each stripe is read under its own lock; the dict is not one atomic snapshot
         hi, lo = self._thresholds()
-        arr = self._scores or [0.0]
-        p50 = float(sorted(arr)[len(arr)//2])
-        p95 = float(sorted(arr)[max(0, int(len(arr)*0.95)-1)])
-        rate = 0.0
-        if len(self._ts_hist) >= 2:
-            dt = self._ts_hist[-1] - self._ts_hist[0]
-            rate = len(self._ts_hist) / dt if dt > 0 else 0.0
+        tel = self._telemetry.snapshot()
+        rate = self._ingress_rate()
+        # score percentiles and window_totals cover the recent score window;
+        # totals count the whole run, as the chain does
+        with self._hist_lock:
+            p50 = self._score_window.quantile(0.50)
+            p95 = self._score_window.quantile(0.95)
+            window_totals = self._score_window.totals()
+            totals = {"secure": self._totals[FState.SECURE], "vulnerable": self._totals[FState.VULNERABLE],
+                      "critical": self._totals[FState.CRITICAL]}
+        with self._state_lock:
+            vitals = {"energy": round(self._energy, 2), "temperature": round(self._temperature, 4),
+                      "temporal_awareness": round(self._temporal_awareness, 4),
+                      "distress_level": round(self._distress_level, 4)}
+        with self._head_lock:
+            head = (self._last_digest or "")[:16]
+        with self._hs_lock:
+            hs_tokens = self._hs_tokens
+        with self._wait_lock:
+            resolver = {
+                "workers": max(1, RESOLVER_WORKERS),
+                "queue_depth": self._resolve_q.qsize(),
+                "waiting": len(self._resolve_wait),
+                "spilled": self._spilled,
+                "settle_depth": self._settle_q.qsize(),
+                **self._resolve_stats,
+                "latency_p50_s": round(self._resolve_latency.quantile(0.50), 4),
+                "latency_p95_s": round(self._resolve_latency.quantile(0.95), 4),
+            }
         return {
             "id": self._id,
-            "energy": round(self._energy, 2),
-            "temperature": round(self._temperature, 4),
-            "temporal_awareness": round(self._temporal_awareness, 4),
-            "distress_level": round(self._distress_level, 4),
+            **vitals,
             "hi": round(hi, 4),
             "lo": round(lo, 4),
-            "totals": {
-                "secure": sum(1 for _ in filter(lambda s: s < lo, arr)),
-                "vulnerable": sum(1 for _ in filter(lambda s: lo <= s < hi, arr)),
-                "critical": sum(1 for _ in filter(lambda s: s >= hi, arr)),
-            },
+            "totals": totals,
+            "window_totals": window_totals,
+            "score_window_s": self._score_window.horizon_s,
             "score_p50": p50,
             "score_p95": p95,
             "ingress_rate_hz": rate,
-            "chain_head": (self._last_digest or "")[:16],
-            "hs_tokens": self._hs_tokens,
+            "chain_head": head,
+            "hs_tokens": hs_tokens,
+            "malformed": self._malformed,
+            "resolver": resolver,
+            "feel_queue_depth": self._feel_q.qsize(),
+            "feel_dropped": self._feel_dropped,
+            "log_dropped": log_dropped(),
+            "config": self.config_status(),
+            "telemetry": tel,
         }
 
-    def feel_the_world(self, source_event_id: Optional[str], notes: str) -> None:
-        self._spend("feel")
-        t, ts = self._now()
-        
+    def openmetrics(self) -> str:
+        """metrics and telemetry in the openmetrics text format, for a scrape endpoint."""
+        m = self.metrics()
+        tel = m["telemetry"]
+        org = {"organism": self._id}
+        return openmetrics_text([
+            ("firewall_packets", "counter", "scored packets by state",
+             [({**org, "state": k}, v) for k, v in m["totals"].items()]),
+            ("firewall_ingress_rate_hz", "gauge", "ewma packet rate per horizon",
+             [({**org, "horizon": k}, v) for k, v in tel["rates_hz"].items()]),
+            ("firewall_window_packets", "gauge", f"packets by state over the last {tel['window_s']}s",
+             [({**org, "state": k}, tel["window"][k]) for k in ("secure", "vulnerable", "critical")]),
+            ("firewall_alerts", "counter", "alerts issued or suppressed by debounce",
+             [({**org, "state": st, "outcome": out}, tel["totals"][f"{out}_{st}"])
+              for st in ("vulnerable", "critical") for out in ("issued", "suppressed")]),
+            ("firewall_suppression_ratio", "gauge", f"suppressed share of alerts over the last {tel['window_s']}s",
+             [(org, tel["suppression_ratio"])]),
+            ("firewall_energy", "gauge", "energy budget 0..100", [(org, m["energy"])]),
+            ("firewall_distress", "gauge", "distress level", [(org, m["distress_level"])]),
+            ("firewall_temperature", "gauge", "neurosymbolic temperature", [(org, m["temperature"])]),
+            ("firewall_threshold", "gauge", "effective thresholds",
+             [({**org, "bound": "hi"}, m["hi"]), ({**org, "bound": "lo"}, m["lo"])]),
+            ("firewall_resolver_queue_depth", "gauge", "ambiguity resolutions queued", [(org, m["resolver"]["queue_depth"])]),
+            ("firewall_feel_dropped", "counter", "feeling notes dropped on a full queue", [(org, m["feel_dropped"])]),
+        ])
+
+    def _mood_for(self, distress: float) -> FeelingState:
         # simple feeling logic based on distress
-        if self._distress_level > 80:
+        if distress > 80:
             mood = FeelingState.OVERWHELMED
-        elif self._distress_level > 50:
+        elif distress > 50:
             mood = FeelingState.STRESSED
-        elif self._distress_level > 20:
+        elif distress > 20:
             mood = FeelingState.ANXIOUS
         else:
             mood = FeelingState.CALM
-            
         if self._temporal_awareness > 0.9 and self._energy > 90:
             mood = FeelingState.OPTIMAL
+        return mood
+
+    def _feel(self, source_event_id: Optional[str], note: str) -> None:
+        # hand a note to the feeling worker; the queue is bounded and lossy by design
+        try:
+            self._feel_q.put_nowait((source_event_id, note, self._distress_level))
+        except queue.Full:
+            with self._stats_lock:
+                self._feel_dropped += 1
+
+    def feel_the_world(self, source_event_id: Optional[str], notes: str,
+                       coalesced: Optional[Dict[str, Any]] = None) -> None:
+        self._spend("feel")
+        t, ts = self._now()
+        mood = self._mood_for(self._distress_level)
 
         meta = {
             "feel_id": str(uuid.uuid4()),
@@ -772,9 +2158,11 @@ class TernaryServerFirewall:
             "source_event_id": source_event_id,
             "current_mood": mood.name,
             "distress_level": self._distress_level,
-            "social_bonds": self._bonds,
+            "social_bonds": dict(self._bonds),
             "notes": notes,
         }
+        if coalesced:
+            meta["coalesced"] = coalesced
         digest = self._append_chain("felt_experience", meta)
         
         fe = FeltExperience(
@@ -783,19 +2171,41 @@ class TernaryServerFirewall:
             source_event_id=source_event_id,
             current_mood=mood,
             distress_level=self._distress_level,
-            social_bonds=self._bonds,
+            social_bonds=meta["social_bonds"],
             notes=notes,
             digest=digest,
         )
-        print(f"[{fe.feel_id[:8]}] felt_experience logged: mood={mood.name} distress={self._distress_level:.2f}")
+        log.debug("[%s] felt_experience logged: mood=%s distress=%.2f", fe.feel_id[:8], mood.name, self._distress_level)
+
+    def _feel_coalesced(self, notes: List[Tuple[Optional[str], str, float]]) -> None:
+        """one felt_experience record for a run of notes, keeping the mood trajectory."""
+        distress = [d for _, _, d in notes]
+        trail: List[str] = []
+        for d in distress:
+            m = self._mood_for(d).name
+            if not trail or trail[-1] != m:
+                trail.append(m)
+        ev_ids = [e for e, _, _ in notes if e]
+        summary = {
+            "count": len(notes),
+            "first_event_id": ev_ids[0] if ev_ids else None,
+            "distress_min": round(min(distress), 4),
+            "distress_max": round(max(distress), 4),
+            "first_mood": trail[0],
+            "mood_transitions": trail[-FEEL_TRAIL_MAX:],
+            "mood_transitions_dropped": max(0, len(trail) - FEEL_TRAIL_MAX),
+            "first_note": notes[0][1],
+        }
+        self.feel_the_world(source_event_id=ev_ids[-1] if ev_ids else None, notes=notes[-1][1], coalesced=summary)
 
     def recursive_refinement(self) -> Dict[str, Any]:
         self._spend("maintenance")
-        print(f"[{self._id}] recursive self-refinement initiated.")
+        log.info("[%s] recursive self-refinement initiated.", self._id)
         
         # 1. audit the chain for long-term trends
         # this is a mock. real impl would read the file.
-        recent_scores = self._scores[-256:]
+        with self._hist_lock:
+            recent_scores = self._scores.tail(256)
         avg_score = sum(recent_scores) / len(recent_scores) if recent_scores else 0.0
         
         # 2. adjust parameters based on trends
@@ -808,15 +2218,17 @@ class TernaryServerFirewall:
         if avg_score < THRESH_LO - 0.1:
             adjustment_hi -= 0.01
             adjustment_lo -= 0.01
-            print("tendency toward low scores detected, tightening thresholds.")
+            log.info("[%s] tendency toward low scores detected, tightening thresholds.", self._id)
             
         # if average score is consistently high, loosen thresholds
         elif avg_score > THRESH_HI + 0.1:
             adjustment_hi += 0.01
             adjustment_lo += 0.01
-            print("tendency toward high scores detected, loosening thresholds.")
+            log.info("[%s] tendency toward high scores detected, loosening thresholds.", self._id)
             
         self.adjust_thresholds(hi=hi+adjustment_hi, lo=lo+adjustment_lo)
+        with _THRESH_LOCK:
+            new_hi, new_lo = THRESH_HI, THRESH_LO
         
         # 3. log the self-adjustment
         meta = {
@@ -824,8 +2236,8 @@ class TernaryServerFirewall:
             "kind": "recursive_refinement",
             "old_hi": hi,
             "old_lo": lo,
-            "new_hi": THRESH_HI,
-            "new_lo": THRESH_LO,
+            "new_hi": new_hi,
+            "new_lo": new_lo,
             "avg_score": avg_score
         }
         digest = self._append_chain("self_refinement", meta)
@@ -854,25 +2266,25 @@ class TernaryServerFirewall:
         mkdir_p(path)
         with open(path, "w", encoding="utf-8") as f:
             json.dump(blu, f, indent=2)
-        print(f"[{self._id}] child blueprint written to {path}")
+        log.info("[%s] child blueprint written to %s", self._id, path)
         return path
 
     # --------------- red queen bench ---------------
 
     class Adversary:
-        def __init__(self, seed: int = 13, fw: Optional[TernaryServerFirewall] = None):
-            self.rng = random.Random(seed)
+        def __init__(self, seed: int = 13, fw: Optional[TernaryServerFirewall] = None,
+                     rng: Optional[random.Random] = None):
+            self.rng = rng if rng is not None else random.Random(seed)
             self.bias = 0.0
             self.fw = fw
 
         def evolve(self) -> None:
-            # evolution is now influenced by the firewall's distress level and awareness
-            fw_state = {"distress": 0.0, "awareness": 0.0}
-            if self.fw:
-                fw_state = self.fw.metrics()
-            
+            # evolution is now influenced by the firewall's distress level; read
+            # directly, a full metrics() per round would dominate a bench run
+            distress = self.fw._distress_level if self.fw else 0.0
+
             # high distress makes the adversary more aggressive
-            distress_impact = clamp(fw_state["distress"] / 100.0, 0, 1)
+            distress_impact = clamp(distress / 100.0, 0, 1)
             self.bias += self.rng.uniform(-0.05, 0.08 + (distress_impact * 0.1))
             self.bias = float(clamp(self.bias, -0.6, 0.6))
 
@@ -898,68 +2310,1721 @@ class TernaryServerFirewall:
     # --------------- sinks ---------------
 
     def _default_alert_sink(self, ev: PacketEvent) -> None:
-        print(json.dumps({"event": ev.event_id, "state": ev.state.value, "score": round(ev.score,4),
-                          "ts": ev.ts_utc, "service": ev.service_id, "digest": ev.digest[:8] if ev.digest else None,
-                          "distress": round(self._distress_level, 2)}))
+        if log.isEnabledFor(logging.WARNING):
+            log.warning("[%s] alert %s score=%.4f", ev.event_id[:8], ev.state.value, ev.score,
+                        extra={"event": ev.event_id, "state": ev.state.value, "score": round(ev.score,4),
+                               "ts_utc": ev.ts_utc, "service": ev.service_id, "digest": ev.digest[:8] if ev.digest else None,
+                               "distress": round(self._distress_level, 2)})
 
     def _default_resolution_sink(self, res: IncidentResolution) -> None:
-        print(json.dumps({"resolution": res.resolution_id, "event": res.source_event_id[:8], "decision": res.decision.name,
-                          "ts": res.ts_utc, "source": res.resolver_source, "digest": res.digest[:8] if res.digest else None}))
+        if log.isEnabledFor(logging.INFO):
+            log.info("[%s] resolution %s", res.source_event_id[:8], res.decision.name,
+                     extra={"resolution": res.resolution_id, "event": res.source_event_id[:8], "decision": res.decision.name,
+                            "ts_utc": res.ts_utc, "source": res.resolver_source, "digest": res.digest[:8] if res.digest else None})
 
     def _default_handshake_sink(self, hs: HandshakeLog) -> None:
-        print("\n--- HANDSHAKE ---")
-        print(f"id: {hs.handshake_id[:8]}  event: {hs.source_event_id[:8]}  res: {hs.resolution_id[:8]}  ts: {hs.ts_utc}")
-        print(f"what: {hs.what_happened}")
-        print(f"learned: {hs.what_was_learned}")
-        print(f"why: {hs.why_it_happened}")
-        print(f"better: {hs.what_to_do_better}\n")
-    
+        if log.isEnabledFor(logging.INFO):
+            log.info("[%s] handshake %s", hs.source_event_id[:8], hs.handshake_id[:8],
+                     extra={"handshake": hs.handshake_id[:8], "event": hs.source_event_id[:8], "resolution": hs.resolution_id[:8],
+                            "ts_utc": hs.ts_utc, "what": hs.what_happened, "learned": hs.what_was_learned,
+                            "why": hs.why_it_happened, "better": hs.what_to_do_better})
+
     # --------------- config fetch ---------------
 
-    def _update_config_from_source(self) -> None:
-        if not self._config_source:
-            return
+    def _apply_config(self, cfg: Dict[str, Any], version: str) -> None:
+        # called by the poller, one apply at a time. the thresholds and the
+        # snapshot change in one _THRESH_LOCK section, so a reader holding the
+        # lock sees both old or both new
+        global THRESH_HI, THRESH_LO
+        th = cfg.get("thresholds")
+        hi = th.get("hi") if isinstance(th, dict) else None
+        lo = th.get("lo") if isinstance(th, dict) else None
+        with _THRESH_LOCK:
+            if hi is not None:
+                THRESH_HI = float(clamp(hi, 0.05, 0.95))
+            if lo is not None:
+                THRESH_LO = float(clamp(lo, 0.05, 0.95))
+            self._applied = _AppliedConfig(dict(cfg), version, THRESH_HI, THRESH_LO)
+        if hi is not None or lo is not None:
+            self._spend("actuator")
+            log.info("[%s] thresholds adjusted - hi=%.2f lo=%.2f", self._id, self._applied.hi, self._applied.lo)
+        log.info("[%s] applied config %s", self._id, version, extra={"config_version": version})
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        """the applied config snapshot; treat as read only."""
+        return self._applied.config
+
+    def applied_config(self) -> _AppliedConfig:
+        """config, version and the thresholds it set, as one consistent snapshot."""
+        return self._applied
+
+    def refresh_config(self) -> bool:
+        """poll the config source now, in the calling thread. True when a new config was applied."""
+        return self._config_poller.poll() if self._config_poller else False
+
+    def stop_config_polling(self) -> None:
+        if self._config_poller:
+            self._config_poller.stop()
+
+    def close(self, timeout: float = 10.0) -> Optional[str]:
+        """
+        stop the organism: the resolve, settle and feeling workers finish the job
+        in hand and exit, resolutions still queued or waiting are settled as OBJECT,
+        background archiving is waited for, then the open block is sealed, config
+        polling stops and the chain index is closed. returns the chain head. call
+        it once ingress has stopped; no packets after close.
+        """
+        with self._workers_lock:
+            again = self._closed
+            self._closed = True
+            self._closing.set()
+            threads = list(self._threads)
+            started = self._workers_started
+        if again:
+            return self.chain_head()[0]
+        if started:
+            # wake the resolvers now instead of at their next poll; a full queue wakes them anyway
+            for _ in range(max(1, RESOLVER_WORKERS)):
+                try:
+                    self._resolve_q.put_nowait(None)
+                except queue.Full:
+                    break
+            try:
+                self._feel_q.put(None, timeout=timeout)
+            except queue.Full:
+                log.warning("[%s] feeling queue did not drain on close", self._id)
+            try:
+                self._settle_q.put(None, timeout=timeout)
+            except queue.Full:
+                log.warning("[%s] overflow settle queue did not drain on close", self._id)
+        deadline = time.monotonic() + timeout
+        for t in threads:
+            t.join(max(0.0, deadline - time.monotonic()))
+        alive = [t.name for t in threads if t.is_alive()]
+        if alive:
+            log.warning("[%s] threads still running after close: %s", self._id, ", ".join(alive))
+        self._settle_pending()
+        head = self.flush_chain()
+        self.stop_config_polling()
+        if self._index_close:
+            self._index_close()
+        return head
+
+    def _settle_pending(self) -> None:
+        # close(): whatever the resolvers and the settler left behind is settled on OBJECT
+        while True:
+            try:
+                job = self._settle_q.get_nowait()
+            except queue.Empty:
+                break
+            self._settle_q.task_done()
+            if job is not None:
+                self._record_resolution(job.event, Ternary.OBJECT, job.enqueued, source="overflow_default_object")
+        left: List[_PendingResolution] = []
+        with self._wait_lock:
+            while self._resolve_wait:
+                left.append(heapq.heappop(self._resolve_wait)[2])
+        while True:
+            try:
+                job = self._resolve_q.get_nowait()
+            except queue.Empty:
+                break
+            self._resolve_q.task_done()
+            if job is not None:
+                left.append(job)
+        for job in left:
+            self._record_resolution(job.event, Ternary.OBJECT, job.enqueued, source="shutdown_default_object")
+
+    def config_status(self) -> Dict[str, Any]:
+        p = self._config_poller
+        if p is None:
+            return {"source": None}
+        return {"source": p.source, "version": self._applied.version, "every_s": p._every, **p.stats, "last_error": p.last_error}
+
+# --------------- archive ---------------
+
+# rotated segments can be archived into a compressed columnar file:
+#   magic, 4 byte big endian header length, header json, then one compressed
+#   blob per column and per mask, for each block of ARCHIVE_BLOCK records.
+#   record level fields (kind, digest, prev, leaf, block) and every payload key
+#   get their own column, nested objects such as signals split into child
+#   columns, so a scan of one field only decompresses that field and a point
+#   read only the block holding the record. digests, prev links and leaf hashes
+#   that follow from the chain are not stored but rebuilt on read, and a keyed
+#   seal per block over its first link, last digest and count stands in for
+#   them. records rebuild exactly, and archive_segment reads the archive back
+#   before it drops the source. version 1 archives are one block.
+
+ARCHIVE_SUFFIX = ".tcol"
+_TCOL_MAGIC = b"TCOL1\n"
+_ABSENT = object()
+_DERIVED = object()
+_EPOCH = datetime(1970, 1, 1)
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstd.ZstdCompressor(level=ARCHIVE_LEVEL).compress(data)
+    import lzma
+    return lzma.compress(data, preset=6)
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if not _HAS_ZSTD:
+            raise RuntimeError("archive is zstd compressed, install zstandard to read it")
+        return zstd.ZstdDecompressor().decompress(data)
+    import lzma
+    return lzma.decompress(data)
+
+def _pack_bits(flags: Sequence[bool]) -> bytes:
+    out = bytearray((len(flags) + 7) // 8)
+    for i, f in enumerate(flags):
+        if f:
+            out[i >> 3] |= 1 << (i & 7)
+    return bytes(out)
+
+def _unpack_bits(data: bytes, n: int) -> List[bool]:
+    return [bool(data[i >> 3] & (1 << (i & 7))) for i in range(n)]
+
+def _pack_strs(vals: Sequence[str]) -> bytes:
+    bs = [v.encode("utf-8") for v in vals]
+    return array("I", [len(b) for b in bs]).tobytes() + b"".join(bs)
+
+def _unpack_strs(data: bytes, k: int, swap: bool) -> List[str]:
+    lens = array("I")
+    lens.frombytes(data[:4 * k])
+    if swap:
+        lens.byteswap()
+    out, pos = [], 4 * k
+    for ln in lens:
+        out.append(data[pos:pos + ln].decode("utf-8"))
+        pos += ln
+    return out
+
+def _is_hex32(v: str) -> bool:
+    try:
+        return len(v) == 64 and bytes.fromhex(v).hex() == v
+    except ValueError:
+        return False
+
+def _is_uuid(v: str) -> bool:
+    try:
+        return len(v) == 36 and str(uuid.UUID(v)) == v
+    except ValueError:
+        return False
+
+def _ts_micros(v: str) -> Optional[int]:
+    # iso_utc strings as integer microseconds, None unless the text round trips
+    if not v.endswith("Z"):
+        return None
+    try:
+        d = datetime.fromisoformat(v[:-1]) - _EPOCH
+    except ValueError:
+        return None
+    m = (d.days * 86400 + d.seconds) * 1_000_000 + d.microseconds
+    return m if _micros_ts(m) == v else None
+
+def _micros_ts(m: int) -> str:
+    from datetime import timedelta
+    return (_EPOCH + timedelta(microseconds=m)).isoformat(timespec="microseconds") + "Z"
+
+def _encode_values(vals: List[Any]) -> Tuple[str, bytes, Dict[str, Any]]:
+    # narrowest encoding that round trips every value exactly
+    if vals and all(type(v) is float for v in vals):
+        return "f8", array("d", vals).tobytes(), {}
+    if vals and all(type(v) is int for v in vals):
         try:
-            # this is a mock implementation
-            new_config = self._config_source()
-            if "thresholds" in new_config:
-                hi = new_config["thresholds"].get("hi")
-                lo = new_config["thresholds"].get("lo")
-                self.adjust_thresholds(hi, lo)
-            print(f"[{self._id}] fetched and applied new config from source.")
-        except Exception as e:
-            print(f"[{self._id}] failed to fetch new config: {e}")
+            return "i8", array("q", vals).tobytes(), {}
+        except OverflowError:
+            pass
+    if vals and all(type(v) is str for v in vals):
+        if all(_is_hex32(v) for v in vals):
+            return "hex32", b"".join(bytes.fromhex(v) for v in vals), {}
+        if all(_is_uuid(v) for v in vals):
+            return "uuid", b"".join(uuid.UUID(v).bytes for v in vals), {}
+        micros = [_ts_micros(v) for v in vals]
+        if all(m is not None for m in micros):
+            # delta coded, a burst shares one ts so most deltas are zero
+            return "isots", array("q", [micros[0]] + [b - a for a, b in zip(micros, micros[1:])]).tobytes(), {}
+        distinct = list(dict.fromkeys(vals))
+        if len(distinct) <= 65535 and len(distinct) * 4 <= len(vals):
+            codes = {v: i for i, v in enumerate(distinct)}
+            return "dict", array("H", [codes[v] for v in vals]).tobytes(), {"values": distinct}
+        return "str", _pack_strs(vals), {}
+    return "json", _pack_strs([json.dumps(v, separators=(",",":")) for v in vals]), {}
+
+def _decode_values(enc: str, data: bytes, k: int, col: Dict[str, Any], swap: bool) -> List[Any]:
+    if enc in ("f8", "i8", "isots"):
+        arr = array("d" if enc == "f8" else "q")
+        arr.frombytes(data)
+        if swap:
+            arr.byteswap()
+        if enc == "isots":
+            return [_micros_ts(m) for m in itertools.accumulate(arr)]
+        return arr.tolist()
+    if enc == "hex32":
+        return [data[i:i + 32].hex() for i in range(0, 32 * k, 32)]
+    if enc == "uuid":
+        return [str(uuid.UUID(bytes=data[i:i + 16])) for i in range(0, 16 * k, 16)]
+    if enc == "dict":
+        codes = array("H")
+        codes.frombytes(data)
+        if swap:
+            codes.byteswap()
+        values = col["values"]
+        return [values[c] for c in codes]
+    strs = _unpack_strs(data, k, swap)
+    return strs if enc == "str" else [json.loads(x) for x in strs]
+
+def _archive_key_id() -> str:
+    return hashlib.sha256(b"tcol-key\x00" + HMAC_KEY).hexdigest()[:16]
+
+def _archive_seal(first_prev: Optional[str], last_digest: Optional[str], records: int) -> str:
+    s = json.dumps({"archive": {"first_prev": first_prev, "last_digest": last_digest, "records": records}},
+                   sort_keys=True, separators=(",",":")).encode("utf-8")
+    return hmac.new(HMAC_KEY, s, hashlib.sha256).hexdigest()
+
+class ChainArchive:
+    """
+    read side of a segment archive. blocks are located from the header, and
+    each column of a block decompresses on first use and is cached.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(_TCOL_MAGIC)) != _TCOL_MAGIC:
+                raise ValueError(f"not a chain archive: {path}")
+            hlen = int.from_bytes(f.read(4), "big")
+            self.header: Dict[str, Any] = json.loads(f.read(hlen))
+            self._base = f.tell()
+        h = self.header
+        # a version 1 archive is a single block described by the header itself
+        self._blocks: List[Dict[str, Any]] = h["blocks"] if "blocks" in h else [
+            {"start": 0, "records": h["records"], "first_prev": h.get("first_prev"), "seal": h.get("seal"),
+             "fields": h["fields"], "payload": h["payload"], "columns": h["columns"]}]
+        self._starts = [int(b["start"]) for b in self._blocks]
+        self._cols = [{c["name"]: c for c in b["columns"]} for b in self._blocks]
+        self._swap = h.get("byteorder", sys.byteorder) != sys.byteorder
+        self._derives = any("derived" in c for b in self._blocks for c in b["columns"])
+        self._cache: Dict[Tuple[int, str], List[Any]] = {}
+        # rebuilt records of the blocks point reads touched last
+        self._decoded: "OrderedDict[int, List[Dict[str, Any]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return int(self.header["records"])
+
+    @property
+    def columns(self) -> List[str]:
+        names: Dict[str, None] = {}
+        for cols in self._cols:
+            names.update(dict.fromkeys(cols))
+        return list(names)
+
+    def _blob(self, span: Sequence[int]) -> bytes:
+        with open(self.path, "rb") as f:
+            f.seek(self._base + span[0])
+            return _decompress(f.read(span[1]), self.header["codec"])
+
+    def _column(self, name: str, b: Optional[int] = None) -> List[Any]:
+        # aligned with the records of the archive, or of block b: _ABSENT where
+        # the field is missing, _DERIVED where records() rebuilds it
+        if b is None:
+            out: List[Any] = []
+            for k in range(len(self._blocks)):
+                out.extend(self._column(name, k))
+            return out
+        if (b, name) in self._cache:
+            return self._cache[(b, name)]
+        n = int(self._blocks[b]["records"])
+        col = self._cols[b].get(name)
+        if col is None:
+            return [_ABSENT] * n
+        present = _unpack_bits(self._blob(col["present"]), n) if "present" in col else [True] * n
+        nulls = _unpack_bits(self._blob(col["nulls"]), n) if "nulls" in col else [False] * n
+        derived = _unpack_bits(self._blob(col["derived"]), n) if "derived" in col else [False] * n
+        if col["enc"] == "struct":
+            kids = [(sub, self._column(cn, b)) for sub, cn in col["fields"]]
+            dense: Iterator[Any] = iter([{sub: vals[i] for sub, vals in kids if vals[i] is not _ABSENT}
+                                         for i in range(n) if present[i] and not nulls[i]])
+        else:
+            k = sum(1 for p, z, d in zip(present, nulls, derived) if p and not z and not d)
+            dense = iter(_decode_values(col["enc"], self._blob(col["data"]), k, col, self._swap))
+        out = [(_DERIVED if d else None if z else next(dense)) if p else _ABSENT
+               for p, z, d in zip(present, nulls, derived)]
+        self._cache[(b, name)] = out
+        return out
+
+    def column(self, name: str) -> List[Any]:
+        """one field for every record, None where it is missing or null."""
+        vals = self._column(name)
+        if any(v is _DERIVED for v in vals):
+            field_name = name[8:] if name.startswith("payload.") else name
+            return [r.get(field_name) for r in self.records()]
+        return [None if v is _ABSENT else v for v in vals]
+
+    def _block_records(self, b: int, start: int = 0) -> Iterator[Dict[str, Any]]:
+        # block b from its own first link; its seal, and the link the next block
+        # starts from, are checked once the last record is out
+        blk = self._blocks[b]
+        if self._derives and self.header.get("key_id") != _archive_key_id():
+            raise RuntimeError("archive links were derived under a different hmac key")
+        top = [(f, self._column(f, b)) for f in blk["fields"] if f != "payload"]
+        pay = [(k, self._column(cn, b)) for k, cn in blk["payload"]]
+        last = blk.get("first_prev")
+        n = int(blk["records"])
+        for i in range(n):
+            payload = {k: vals[i] for k, vals in pay if vals[i] is not _ABSENT}
+            got = {f: vals[i] for f, vals in top if vals[i] is not _ABSENT}
+            # prev before digest, which signs over it
+            if got.get("prev") is _DERIVED:
+                got["prev"] = last
+            if got.get("digest") is _DERIVED:
+                got["digest"] = signed_digest(got.get("prev"), payload)
+            if got.get("leaf") is _DERIVED:
+                got["leaf"] = leaf_hash(got.get("kind", ""), payload)
+            if "digest" in got:
+                last = got["digest"]
+            if i >= start:
+                yield {f: (payload if f == "payload" else got[f]) for f in blk["fields"] if f == "payload" or f in got}
+        if self._derives and not hmac.compare_digest(str(blk.get("seal", "")), _archive_seal(blk.get("first_prev"), last, n)):
+            raise ValueError("archive seal mismatch")
+        if b + 1 < len(self._blocks) and self._blocks[b + 1].get("first_prev") != last:
+            raise ValueError("archive block link mismatch")
+
+    def records(self, start: int = 0) -> Iterator[Dict[str, Any]]:
+        """
+        records in order from ordinal start. derived fields are rebuilt from the
+        first link of the block holding start, and each block seal is checked
+        once its last record is out; a mismatch raises ValueError.
+        """
+        if start >= len(self):
+            return
+        b = bisect.bisect_right(self._starts, start) - 1
+        for k in range(b, len(self._blocks)):
+            yield from self._block_records(k, start - self._starts[k] if k == b else 0)
+
+    _KEEP_BLOCKS = 4
+
+    def record(self, i: int) -> Dict[str, Any]:
+        """one record. only its block is decoded and seal checked; the last few blocks read are kept."""
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        b = bisect.bisect_right(self._starts, i) - 1
+        recs = self._decoded.pop(b, None)
+        if recs is None:
+            recs = list(self._block_records(b))
+        self._decoded[b] = recs
+        while len(self._decoded) > self._KEEP_BLOCKS:
+            self._decoded.popitem(last=False)
+        return recs[i - self._starts[b]]
+
+def _sidecar_index(chain_path: str) -> Optional["ChainIndex"]:
+    # the chain's sqlite index if one was ever written, so archiving never strands its rows
+    if os.path.exists(os.path.abspath(chain_path) + ".idx.sqlite"):
+        return ChainIndex(chain_path)
+    return None
+
+def archive_segment(rotated_path: str, index: Optional["ChainIndex"] = None, remove: bool = True) -> str:
+    """
+    convert a rotated segment into <segment>.tcol and return its path. the
+    archive is read back and compared record by record before it replaces the
+    segment. index rows move over to record ordinals: in the index given, or
+    else in the chain's sidecar index when there is one.
+    """
+    if not rotated_path.endswith(".rotated"):
+        raise ValueError("only rotated segments are archived")
+    if index is None:
+        # <chain>.<ts>.rotated
+        index = _sidecar_index(rotated_path[:-len(".rotated")].rsplit(".", 1)[0])
+        if index is not None:
+            try:
+                return archive_segment(rotated_path, index=index, remove=remove)
+            finally:
+                index.close()
+    with open(rotated_path, "rb") as f:
+        raw = f.read()
+    records = [json.loads(ln) for ln in raw.splitlines() if ln.strip()]
+    fields: Dict[str, None] = {}
+    for rec in records:
+        if not isinstance(rec.get("payload"), dict):
+            raise ValueError("record without an object payload, refusing to archive")
+        fields.update(dict.fromkeys(rec))
+
+    # which links follow from the chain; anything else is stored as written
+    first_prev = next((r["prev"] for r in records if "prev" in r), None)
+    derived: Dict[str, List[bool]] = {"prev": [], "digest": [], "leaf": []}
+    # links[i] is the last digest before record i, so every block knows its first link
+    links: List[Optional[str]] = [first_prev]
+    last = first_prev
+    for rec in records:
+        derived["prev"].append("prev" in rec and rec["prev"] == last)
+        derived["digest"].append("digest" in rec and rec["digest"] == signed_digest(rec.get("prev"), rec["payload"]))
+        derived["leaf"].append("leaf" in rec and rec["leaf"] == leaf_hash(rec.get("kind", ""), rec["payload"]))
+        if "digest" in rec:
+            last = rec["digest"]
+        links.append(last)
+
+    codec = "zstd" if _HAS_ZSTD else "lzma"
+    blobs: List[bytes] = []
+    cols: List[Dict[str, Any]] = []
+    pos = 0
+
+    def put(data: bytes) -> List[int]:
+        nonlocal pos
+        c = _compress(data, codec)
+        blobs.append(c)
+        span = [pos, len(c)]
+        pos += len(c)
+        return span
+
+    def add(name: str, vals: List[Any], skip: Optional[List[bool]] = None) -> str:
+        while any(c["name"] == name for c in cols):
+            name += "_"
+        col: Dict[str, Any] = {"name": name}
+        cols.append(col)
+        present = [v is not _ABSENT for v in vals]
+        nulls = [v is None for v in vals]
+        skip = skip or [False] * len(vals)
+        dense = [v for v, d in zip(vals, skip) if v is not _ABSENT and v is not None and not d]
+        if dense and all(type(v) is dict for v in dense):
+            # nested object: one child column per key
+            subs: Dict[str, None] = {}
+            for v in dense:
+                subs.update(dict.fromkeys(v))
+            col["enc"] = "struct"
+            col["fields"] = [[k, add(f"{name}.{k}", [v.get(k, _ABSENT) if type(v) is dict else _ABSENT for v in vals])]
+                             for k in subs]
+        else:
+            enc, data, extra = _encode_values(dense)
+            col.update({"enc": enc, "data": put(data), **extra})
+        if not all(present):
+            col["present"] = put(_pack_bits(present))
+        if any(nulls):
+            col["nulls"] = put(_pack_bits(nulls))
+        if any(skip):
+            col["derived"] = put(_pack_bits(skip))
+        return name
+
+    blocks: List[Dict[str, Any]] = []
+    for b0 in range(0, len(records), ARCHIVE_BLOCK):
+        recs = records[b0:b0 + ARCHIVE_BLOCK]
+        cols = []
+        bfields: Dict[str, None] = {}
+        bkeys: Dict[str, None] = {}
+        for rec in recs:
+            bfields.update(dict.fromkeys(rec))
+            bkeys.update(dict.fromkeys(rec["payload"]))
+        for f in bfields:
+            if f != "payload":
+                add(f, [r.get(f, _ABSENT) for r in recs], derived[f][b0:b0 + len(recs)] if f in derived else None)
+        payload_cols = [[k, add("payload." + k, [r["payload"].get(k, _ABSENT) for r in recs])] for k in bkeys]
+        blocks.append({"start": b0, "records": len(recs), "first_prev": links[b0],
+                       "seal": _archive_seal(links[b0], links[b0 + len(recs)], len(recs)),
+                       "fields": list(bfields), "payload": payload_cols, "columns": cols})
+
+    ts = [r["payload"]["ts"] for r in records if isinstance(r["payload"].get("ts"), str)]
+    first = records[0] if records else {}
+    header = {"version": 2, "codec": codec, "byteorder": sys.byteorder, "records": len(records),
+              "source": os.path.basename(rotated_path), "source_bytes": len(raw),
+              "source_sha256": hashlib.sha256(raw).hexdigest(),
+              "segment_head": first.get("digest") or first.get("leaf"),
+              "ts_min": min(ts) if ts else None, "ts_max": max(ts) if ts else None,
+              "first_prev": first_prev, "key_id": _archive_key_id(), "seal": _archive_seal(first_prev, last, len(records)),
+              "fields": list(fields), "block_records": ARCHIVE_BLOCK, "blocks": blocks}
+    head = json.dumps(header, separators=(",",":")).encode("utf-8")
+    out = rotated_path + ARCHIVE_SUFFIX
+    tmp = out + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_TCOL_MAGIC + len(head).to_bytes(4, "big") + head)
+        for b in blobs:
+            f.write(b)
+        f.flush()
+        os.fsync(f.fileno())
+    canon = lambda r: json.dumps(r, sort_keys=True, separators=(",",":"))
+    try:
+        arc = ChainArchive(tmp)
+        same = len(arc) == len(records) and all(canon(a) == canon(b) for a, b in zip(arc.records(), records))
+    except (ValueError, RuntimeError):
+        same = False
+    if not same:
+        os.remove(tmp)
+        raise RuntimeError(f"archive of {rotated_path} does not read back, segment kept")
+    os.replace(tmp, out)
+    if index:
+        index.archive_segment(rotated_path, out)
+    if remove:
+        os.remove(rotated_path)
+    return out
+
+def archive_chain(chain_path: str, index: Optional["ChainIndex"] = None) -> List[Dict[str, Any]]:
+    """
+    archive every rotated segment that is not archived yet, oldest first. with
+    no index given, the chain's sidecar index, if any, is kept in step.
+    """
+    own = index is None
+    if own:
+        index = _sidecar_index(chain_path)
+    out = []
+    try:
+        for fp in chain_segments(chain_path):
+            if fp.endswith(".rotated"):
+                size = os.path.getsize(fp)
+                arc = archive_segment(fp, index=index)
+                out.append({"segment": os.path.basename(fp), "archive": os.path.basename(arc),
+                            "bytes_in": size, "bytes_out": os.path.getsize(arc),
+                            "ratio": round(size / max(1, os.path.getsize(arc)), 2)})
+    finally:
+        if own and index is not None:
+            index.close()
+    return out
+
+def scan_column(chain_path: str, name: str, kind: Optional[str] = None,
+                start: Optional[str] = None, end: Optional[str] = None) -> Iterator[Any]:
+    """
+    values of one column across archived segments, optionally for one record
+    kind and payload ts in [start, end). archives outside the range are skipped
+    from their header and only the columns involved are decompressed. live and
+    unarchived segments are not scanned.
+    """
+    for fp in chain_segments(chain_path):
+        if not fp.endswith(ARCHIVE_SUFFIX):
+            continue
+        arc = ChainArchive(fp)
+        h = arc.header
+        if (start and h.get("ts_max") and h["ts_max"] < start) or (end and h.get("ts_min") and h["ts_min"] >= end):
+            continue
+        if name not in arc.columns:
+            continue
+        kinds = arc.column("kind") if kind else None
+        ts = arc.column("payload.ts") if (start or end) and "payload.ts" in arc.columns else None
+        for i, v in enumerate(arc.column(name)):
+            if v is None or (kinds is not None and kinds[i] != kind):
+                continue
+            if ts is not None:
+                t = ts[i]
+                if t is None or (start and t < start) or (end and t >= end):
+                    continue
+            yield v
 
 # --------------- verification ---------------
 
-def verify_chain(chain_path: str) -> Tuple[bool, int]:
+# process pool width for segment verification, 0 means one per cpu
+VERIFY_WORKERS = int(os.getenv("FIREWALL_VERIFY_WORKERS", "0"))
+
+# stands in for "prev not known yet" while segments verify in parallel
+_UNLINKED = "\x00unlinked"
+
+def chain_segments(chain_path: str) -> List[str]:
+    """
+    rotated segments oldest first, archived or not, then the live file, skipping
+    missing paths. a segment whose archive exists is listed as the archive.
+    """
     base = os.path.abspath(chain_path)
     dirn = os.path.dirname(base)
     patt = os.path.basename(base) + ".*.rotated"
-    files = sorted(glob.glob(os.path.join(dirn, patt))) + [base]
-    prev = None
-    n = 0
-    for fp in files:
-        if not os.path.exists(fp):
+    archived = set(glob.glob(os.path.join(dirn, patt + ARCHIVE_SUFFIX)))
+    rotated = [fp for fp in glob.glob(os.path.join(dirn, patt)) if fp + ARCHIVE_SUFFIX not in archived]
+    files = sorted(rotated + sorted(archived), key=lambda fp: fp[:-len(ARCHIVE_SUFFIX)] if fp in archived else fp)
+    return [fp for fp in files + [base] if os.path.exists(fp)]
+
+def _segment_items(fp: str, start: int) -> Iterator[Tuple[Any, int]]:
+    # (raw line or record, position after it). positions are byte offsets in a
+    # jsonl segment and record ordinals in an archive; blank lines come as None
+    if fp.endswith(ARCHIVE_SUFFIX):
+        for i, rec in enumerate(ChainArchive(fp).records(start), start + 1):
+            yield rec, i
+        return
+    with open(fp, "rb") as f:
+        f.seek(start)
+        off = start
+        for line in f:
+            off += len(line)
+            yield (line if line.strip() else None), off
+
+def _segment_head(fp: str) -> Optional[str]:
+    # digest, or leaf hash in merkle mode, of the first record names a segment across renames
+    if fp.endswith(ARCHIVE_SUFFIX):
+        return ChainArchive(fp).header.get("segment_head")
+    with open(fp, "rb") as f:
+        for line in f:
+            if line.strip():
+                rec = json.loads(line)
+                return rec.get("digest") or rec.get("leaf")
+    return None
+
+def _verify_segment(fp: str, start: int, prev: Optional[str], key: bytes) -> Dict[str, Any]:
+    """
+    verify one segment from position start, a byte offset or for an archive a
+    record ordinal. prev is the expected link of the
+    first signed record, or _UNLINKED when segments run in parallel and are
+    stitched by the caller. a terminal record hands its head to the next
+    segment, which is where the continuation record links in. merkle leaves are
+    rehashed and held until their merkle_block record checks the root; n and
+    offset only advance past closed blocks, and leaves still open at the end of
+    the segment are reported as open.
+    """
+    out: Dict[str, Any] = {"ok": True, "n": 0, "first_prev": _UNLINKED, "first_digest": None,
+                           "carry": prev, "offset": start, "open": 0, "fail": None}
+    pending: List[str] = []
+    block: Any = None
+    linked = 0
+    try:
+        for item, off in _segment_items(fp, start):
+            if item is None:
+                if not pending:
+                    out["offset"] = off
+                continue
+            try:
+                rec = json.loads(item) if isinstance(item, bytes) else item
+            except ValueError:
+                out.update(ok=False, fail="malformed record")
+                return out
+            if out["first_digest"] is None:
+                out["first_digest"] = rec.get("digest") or rec.get("leaf")
+            if "leaf" in rec:
+                if rec["leaf"] != leaf_hash(rec.get("kind", ""), rec.get("payload")):
+                    out.update(ok=False, fail="leaf hash mismatch")
+                    return out
+                if pending and rec.get("block") != block:
+                    out.update(ok=False, fail="leaf outside its block")
+                    return out
+                block = rec.get("block")
+                pending.append(rec["leaf"])
+                continue
+            rp = rec.get("prev")
+            if linked == 0:
+                out["first_prev"] = rp
+            if prev != _UNLINKED and rp != prev:
+                out.update(ok=False, fail="prev hash mismatch")
+                return out
+            s = json.dumps({"prev": rp, "payload": rec.get("payload")},
+                           sort_keys=True, separators=(",",":")).encode("utf-8")
+            expect = hmac.new(key, s, hashlib.sha256).hexdigest()
+            if rec.get("digest") != expect:
+                out.update(ok=False, fail="digest mismatch")
+                return out
+            if rec.get("kind") == "merkle_block":
+                body = rec.get("payload") or {}
+                if body.get("count") != len(pending) or body.get("root") != merkle_root(pending) \
+                        or (pending and body.get("block") != block):
+                    out.update(ok=False, fail="merkle root mismatch")
+                    return out
+                out["n"] += len(pending)
+                pending = []
+            elif pending:
+                out.update(ok=False, fail="leaves left outside a block")
+                return out
+            prev = rp if rec.get("kind") == "terminal" else rec.get("digest")
+            linked += 1
+            out["n"] += 1
+            out["carry"] = prev
+            out["offset"] = off
+    except (ValueError, RuntimeError) as e:
+        out.update(ok=False, fail=f"unreadable segment: {e}")
+        return out
+    out["open"] = len(pending)
+    return out
+
+def _checkpoint_path(chain_path: str) -> str:
+    return os.path.abspath(chain_path) + ".checkpoints.jsonl"
+
+def _checkpoint_sig(body: Dict[str, Any]) -> str:
+    s = json.dumps({"checkpoint": body}, sort_keys=True, separators=(",",":")).encode("utf-8")
+    return hmac.new(HMAC_KEY, s, hashlib.sha256).hexdigest()
+
+def _on_boundary(fp: str, offset: int) -> bool:
+    # a checkpoint offset must still sit right after a record
+    if offset == 0:
+        return True
+    if fp.endswith(ARCHIVE_SUFFIX):
+        return offset <= len(ChainArchive(fp))
+    if os.path.getsize(fp) < offset:
+        return False
+    with open(fp, "rb") as f:
+        f.seek(offset - 1)
+        return f.read(1) == b"\n"
+
+def load_checkpoint(chain_path: str) -> Optional[Dict[str, Any]]:
+    """latest checkpoint whose signature verifies, or None."""
+    path = _checkpoint_path(chain_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [ln for ln in f.read().splitlines() if ln.strip()]
+    for line in reversed(lines):
+        try:
+            rec = json.loads(line)
+        except ValueError:
+            continue
+        body = rec.get("checkpoint")
+        if isinstance(body, dict) and hmac.compare_digest(str(rec.get("sig", "")), _checkpoint_sig(body)):
+            return body
+    return None
+
+def write_checkpoint(chain_path: str, body: Dict[str, Any]) -> bool:
+    """
+    replace the checkpoint file with this one checkpoint, so it never grows. a
+    chain that can't take a sidecar (read-only copy) just goes without one:
+    logged, False returned, the verify result stands.
+    """
+    path = _checkpoint_path(chain_path)
+    line = json.dumps({"checkpoint": body, "sig": _checkpoint_sig(body)}, separators=(",",":")) + "\n"
+    tmp = path + ".tmp"
+    try:
+        mkdir_p(path)
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(line)
+        os.replace(tmp, path)
+    except OSError as e:
+        log.warning("checkpoint not written for %s: %s", chain_path, e)
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return False
+    return True
+
+def verify_chain(chain_path: str, workers: Optional[int] = None, checkpoint: bool = False) -> Tuple[bool, int]:
+    """
+    verify the chain across rotations. segments verify in a process pool and are
+    stitched through their terminal and continuation records. by default every
+    record is checked from genesis. checkpoint=True is the incremental mode for
+    a verifier that runs again and again over the same chain: the scan resumes
+    after the latest signed checkpoint, trusting what it covers, and a fresh
+    checkpoint replaces it once the whole chain verifies. the count is signed
+    records only; see verify_chain_report for leaves still waiting on their
+    merkle block.
+    """
+    rep = verify_chain_report(chain_path, workers=workers, checkpoint=checkpoint)
+    return (rep["ok"], rep["records"])
+
+def verify_chain_report(chain_path: str, workers: Optional[int] = None, checkpoint: bool = False) -> Dict[str, Any]:
+    """
+    verify_chain with the detail: ok, records verified, open_leaves hashed at
+    the tail of the live segment but not signed by a block yet, and fail. open
+    leaves anywhere else fail the chain, blocks never span segments.
+    """
+    live = os.path.abspath(chain_path)
+    segs = chain_segments(chain_path)
+    first, start, prev, base_n = 0, 0, None, 0
+    ck = load_checkpoint(chain_path) if checkpoint else None
+    if ck:
+        for i, fp in enumerate(segs):
+            if _segment_head(fp) != ck.get("segment_head"):
+                continue
+            # an archive is addressed by record ordinal, which segment_records already is
+            pos = int(ck.get("segment_records", 0)) if fp.endswith(ARCHIVE_SUFFIX) else int(ck.get("offset", 0))
+            if _on_boundary(fp, pos):
+                first, start, prev, base_n = i, pos, ck.get("digest"), int(ck.get("count", 0))
+                break
+        else:
+            ck = None
+    jobs = [(fp, start if i == first else 0, prev if i == first else _UNLINKED, HMAC_KEY)
+            for i, fp in enumerate(segs) if i >= first]
+    if not jobs:
+        return {"ok": True, "records": base_n, "open_leaves": 0, "fail": None}
+    width = workers if workers is not None else (VERIFY_WORKERS or os.cpu_count() or 1)
+    if width > 1 and len(jobs) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(width, len(jobs))) as ex:
+            results = list(ex.map(_verify_segment, *zip(*jobs)))
+    else:
+        results = [_verify_segment(*j) for j in jobs]
+
+    def failed(at: int, why: str) -> Dict[str, Any]:
+        log.error("chain integrity failure at record %d: %s", at, why)
+        return {"ok": False, "records": at, "open_leaves": 0, "fail": why}
+
+    n = base_n
+    carry = prev
+    tail: Optional[Dict[str, Any]] = None
+    for k, r in enumerate(results):
+        if r["n"] and r["first_prev"] != carry:
+            return failed(n, "prev hash mismatch")
+        if not r["ok"]:
+            return failed(n + r["n"], r["fail"])
+        # only the newest leaves of the live file may still wait for their block
+        if r["open"] and (k < len(results) - 1 or jobs[k][0] != live):
+            return failed(n + r["n"], "leaves left outside a block")
+        n += r["n"]
+        if r["n"]:
+            carry = r["carry"]
+            resumed = ck is not None and k == 0
+            tail = {"segment_head": ck["segment_head"] if resumed else r["first_digest"],
+                    "offset": r["offset"],
+                    "segment_records": (int(ck.get("segment_records", 0)) if resumed else 0) + r["n"]}
+    if checkpoint and tail is not None:
+        write_checkpoint(chain_path, {"ts": iso_utc(), **tail, "digest": carry, "count": n})
+    open_n = results[-1]["open"]
+    if open_n:
+        log.info("%d records in an open merkle block, hashed but not signed yet", open_n)
+    return {"ok": True, "records": n, "open_leaves": open_n, "fail": None}
+
+def _id_match(payload: Dict[str, Any], ident: str) -> bool:
+    return any(payload.get(k) == ident for k in _INDEX_ID_FIELDS)
+
+def merkle_proof(chain_path: str, ident: str) -> Optional[Dict[str, Any]]:
+    """
+    inclusion proof for the first leaf that carries ident in an id field: the
+    record, its sibling path and the signed merkle_block it rolls up to. None
+    when no leaf matches or its block is still open.
+    """
+    leaves: List[str] = []
+    hit: Optional[Tuple[int, Dict[str, Any]]] = None
+    for rec in iter_chain_records(chain_path):
+        if "leaf" in rec:
+            if hit is None and _id_match(rec.get("payload") or {}, ident):
+                hit = (len(leaves), rec)
+            leaves.append(rec["leaf"])
             continue
-        with open(fp, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
+        if hit is not None and rec.get("kind") == "merkle_block":
+            idx, leaf_rec = hit
+            return {"record": {"kind": leaf_rec.get("kind"), "payload": leaf_rec.get("payload")},
+                    "leaf": leaf_rec["leaf"], "index": idx, "count": len(leaves),
+                    "path": merkle_path(leaves, idx),
+                    "block": {"digest": rec.get("digest"), "prev": rec.get("prev"), "payload": rec.get("payload")}}
+        leaves = []
+        hit = None
+    return None
+
+def verify_merkle_proof(proof: Dict[str, Any], key: Optional[bytes] = HMAC_KEY) -> bool:
+    """
+    rehash the record, fold the path and compare with the block root. with a key
+    the block signature is checked too; without one only inclusion is shown.
+    """
+    rec = proof.get("record") or {}
+    leaf = leaf_hash(rec.get("kind", ""), rec.get("payload"))
+    blk = proof.get("block") or {}
+    body = blk.get("payload") or {}
+    if leaf != proof.get("leaf") or fold_merkle_path(leaf, proof.get("path") or []) != body.get("root"):
+        return False
+    if key is None:
+        return True
+    s = json.dumps({"prev": blk.get("prev"), "payload": body}, sort_keys=True, separators=(",",":")).encode("utf-8")
+    return hmac.compare_digest(str(blk.get("digest", "")), hmac.new(key, s, hashlib.sha256).hexdigest())
+
+# --------------- shards ---------------
+
+# shard count for ShardedFirewall, 0 means one per cpu
+SHARD_COUNT = int(os.getenv("FIREWALL_SHARDS", "0"))
+# seconds between coordinator seals, 0 seals only on demand and at close
+SHARD_SEAL_S = float(os.getenv("FIREWALL_SHARD_SEAL_S", "5.0"))
+# packets buffered per shard before a batch is shipped to its process
+SHARD_BATCH = int(os.getenv("FIREWALL_SHARD_BATCH", "256"))
+# batches in flight per shard before submit blocks
+SHARD_QUEUE_MAX = int(os.getenv("FIREWALL_SHARD_QUEUE_MAX", "64"))
+SHARD_SEAL_TIMEOUT_S = float(os.getenv("FIREWALL_SHARD_SEAL_TIMEOUT_S", "30.0"))
+
+def shard_chain_path(chain_path: str, shard: int) -> str:
+    # the shard tag goes before the extension so chain_segments of the
+    # top level chain never picks up shard rotations
+    root, ext = os.path.splitext(os.path.abspath(chain_path))
+    return f"{root}.shard{shard:02d}{ext}"
+
+def shard_key(packet: Dict[str, Any]) -> Optional[str]:
+    """service_id, else context source, else None for unkeyed packets."""
+    key = packet.get("service_id")
+    if key is None:
+        ctx = packet.get("context")
+        key = ctx.get("source") if isinstance(ctx, dict) else None
+    return None if key is None else str(key)
+
+def _shard_main(shard: int, chain_path: str, seed: int, inbox: Any, outbox: Any,
+                log_level: Optional[int] = None) -> None:
+    # worker process body: one organism with its own chain, fed columnar batches
+    if log_level is not None:
+        _restart_logging(log_level)
+    # the ring producer is one per process, so each shard logs to its own ring
+    ring_path = shard_chain_path(RING_LOG_PATH, shard) if RING_LOG_PATH else None
+    # a restarted shard continues its own chain: head, merkle block and state come from the replay
+    if chain_segments(chain_path):
+        fw = restore_from_chain(chain_path, seed=seed, ring_path=ring_path)
+    else:
+        fw = TernaryServerFirewall(seed=seed, chain_path=chain_path, ring_path=ring_path)
+    while True:
+        msg = inbox.get()
+        op = msg[0]
+        if op == "batch":
+            pkts = msg[1]
+            try:
+                fw.process_packets({
+                    "signal_a": [p.get("signal_a") for p in pkts],
+                    "signal_b": [p.get("signal_b") for p in pkts],
+                    "signal_c": [p.get("signal_c") for p in pkts],
+                    "context": [p.get("context") if isinstance(p.get("context"), dict) else None for p in pkts],
+                })
+            except Exception as e:
+                log.error("[shard%02d] batch failed: %s", shard, e)
+        elif op == "seal":
+            fw.flush_chain()
+            head, n = fw.chain_head()
+            outbox.put(("sealed", msg[1], shard, head, n))
+        elif op == "stop":
+            outbox.put(("stopped", shard, fw.metrics()))
+            return
+
+def _tail_digest(path: str) -> Optional[str]:
+    # head of an existing chain file so a restarted coordinator keeps linking
+    if not os.path.exists(path):
+        return None
+    last = None
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                last = line
+    return json.loads(last).get("digest") if last else None
+
+class ShardedFirewall:
+    """
+    n firewall organisms in worker processes, each with its own hmac chain at
+    shard_chain_path(chain_path, i). packets are routed by a stable hash of
+    service_id or context source, so one service always lands on one shard and
+    keeps its order; unkeyed packets go round robin. a coordinator seals the
+    shards into the top level chain at chain_path with shard_seal records that
+    commit to every shard head. verify with verify_sharded_chain.
+    """
+    def __init__(self, shards: Optional[int] = None, chain_path: Optional[str] = None, seed: int = 7,
+                 batch: int = SHARD_BATCH, seal_every_s: float = SHARD_SEAL_S):
+        import multiprocessing as mp
+        self._n = max(1, shards or SHARD_COUNT or os.cpu_count() or 1)
+        self._path = os.path.abspath(chain_path or CHAIN_PATH)
+        self._chain = JsonlChain(self._path, CHAIN_FSYNC)
+        self._last_digest = _tail_digest(self._path)
+        self._batch = max(1, batch)
+        # buffers, inboxes and the seal sequence move together under one lock
+        self._lock = threading.Lock()
+        # one seal at a time; held while the shards answer, which submit never waits on
+        self._seal_lock = threading.Lock()
+        self._buffers: List[List[Dict[str, Any]]] = [[] for _ in range(self._n)]
+        self._submitted = [0] * self._n
+        self._rr = itertools.count()
+        self._seal_seq = 0
+        self._last_heads: Optional[List[Optional[str]]] = None
+        ctx = mp.get_context()
+        self._outbox = ctx.Queue()
+        self._inboxes = [ctx.Queue(maxsize=max(1, SHARD_QUEUE_MAX)) for _ in range(self._n)]
+        self._procs = [ctx.Process(target=_shard_main, name=f"fw-shard-{i:02d}", daemon=True,
+                                   args=(i, shard_chain_path(self._path, i), seed + i, self._inboxes[i], self._outbox,
+                                         log.level if _log_handler else None))
+                       for i in range(self._n)]
+        for pr in self._procs:
+            pr.start()
+        self._closed = False
+        self._stop = threading.Event()
+        self._sealer: Optional[threading.Thread] = None
+        if seal_every_s > 0:
+            self._sealer = threading.Thread(target=self._seal_loop, args=(seal_every_s,), name="fw-shard-seal", daemon=True)
+            self._sealer.start()
+        log.info("[sharded] %d shards online, chain=%s", self._n, self._path)
+
+    @property
+    def shards(self) -> int:
+        return self._n
+
+    def shard_for(self, packet: Dict[str, Any]) -> int:
+        key = shard_key(packet)
+        if key is None:
+            return next(self._rr) % self._n
+        return zlib.crc32(key.encode("utf-8")) % self._n
+
+    def submit(self, packet: Dict[str, Any]) -> int:
+        """queue one packet for its shard, returns the shard index."""
+        i = self.shard_for(packet)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("sharded firewall is closed")
+            buf = self._buffers[i]
+            buf.append(packet)
+            self._submitted[i] += 1
+            if len(buf) >= self._batch:
+                self._ship(i)
+        return i
+
+    def submit_many(self, packets: Sequence[Dict[str, Any]]) -> None:
+        for p in packets:
+            self.submit(p)
+
+    def _ship(self, i: int) -> None:
+        # caller holds self._lock; a full inbox blocks here, which is the backpressure
+        buf = self._buffers[i]
+        if buf:
+            self._inboxes[i].put(("batch", buf))
+            self._buffers[i] = []
+
+    def flush(self) -> None:
+        with self._lock:
+            for i in range(self._n):
+                self._ship(i)
+
+    def seal(self) -> Optional[str]:
+        """
+        flush every shard and append a shard_seal record committing to the shard
+        heads. the seal request queues behind the batches already shipped, so each
+        head covers every packet submitted before the call. ingress only waits
+        for the batches and the request to be queued, not for the shards to
+        answer. returns the seal digest, or None when nothing moved since the
+        last seal.
+        """
+        with self._seal_lock:
+            with self._lock:
+                for i in range(self._n):
+                    self._ship(i)
+                self._seal_seq += 1
+                seq = self._seal_seq
+                submitted = list(self._submitted)
+                for q in self._inboxes:
+                    q.put(("seal", seq))
+            heads: List[Optional[str]] = [None] * self._n
+            counts = [0] * self._n
+            pending = set(range(self._n))
+            deadline = time.monotonic() + SHARD_SEAL_TIMEOUT_S
+            while pending:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    raise RuntimeError(f"seal {seq} timed out waiting for shards {sorted(pending)}")
+                try:
+                    msg = self._outbox.get(timeout=left)
+                except queue.Empty:
                     continue
-                rec = json.loads(line)
-                if rec.get("prev") != prev:
-                    print(f"chain integrity failure at record {n}: prev hash mismatch")
-                    return (False, n)
-                s = json.dumps({"prev": rec.get("prev"), "payload": rec.get("payload")},
-                               sort_keys=True, separators=(",",":")).encode("utf-8")
-                expect = hmac.new(HMAC_KEY, s, hashlib.sha256).hexdigest()
-                if rec.get("digest") != expect:
-                    print(f"chain integrity failure at record {n}: digest mismatch")
-                    return (False, n)
-                prev = rec.get("digest")
-                n += 1
-    return (True, n)
+                if msg[0] != "sealed" or msg[1] != seq:
+                    continue  # a late reply from a seal that already timed out
+                _, _, shard, head, n = msg
+                heads[shard], counts[shard] = head, n
+                pending.discard(shard)
+            if heads == self._last_heads:
+                return None
+            payload = {"ts": iso_utc(), "seal": seq,
+                       "shards": [{"shard": i, "chain": os.path.basename(shard_chain_path(self._path, i)),
+                                   "head": heads[i], "records": counts[i], "packets": submitted[i]}
+                                  for i in range(self._n)]}
+            dgst = signed_digest(self._last_digest, payload)
+            self._chain.write("shard_seal", payload, dgst, self._last_digest)
+            self._last_digest = dgst
+            self._last_heads = heads
+            return dgst
+
+    def _seal_loop(self, every_s: float) -> None:
+        while not self._stop.wait(every_s):
+            try:
+                self.seal()
+            except Exception as e:
+                log.error("[sharded] seal failed: %s", e)
+
+    def close(self) -> List[Dict[str, Any]]:
+        """final seal, stop the workers and return their metrics in shard order."""
+        if self._closed:
+            return []
+        self._stop.set()
+        if self._sealer:
+            self._sealer.join()
+        with self._lock:
+            self._closed = True
+        # nothing can be submitted past this seal
+        self.seal()
+        with self._lock:
+            for q in self._inboxes:
+                q.put(("stop",))
+        out: List[Optional[Dict[str, Any]]] = [None] * self._n
+        pending = set(range(self._n))
+        deadline = time.monotonic() + SHARD_SEAL_TIMEOUT_S
+        while pending and time.monotonic() < deadline:
+            try:
+                msg = self._outbox.get(timeout=max(0.01, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if msg[0] == "stopped":
+                out[msg[1]] = msg[2]
+                pending.discard(msg[1])
+        for pr in self._procs:
+            pr.join(timeout=5.0)
+        return [m or {} for m in out]
+
+    def __enter__(self) -> "ShardedFirewall":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+def iter_chain_records(chain_path: str) -> Iterator[Dict[str, Any]]:
+    """every record across rotations and archives, oldest first. no verification."""
+    for fp in chain_segments(chain_path):
+        for item, _ in _segment_items(fp, 0):
+            if item is not None:
+                yield json.loads(item) if isinstance(item, bytes) else item
+
+def follow_chain(chain_path: str, cursor: Optional[Dict[str, Any]] = None,
+                 on_restart: Optional[Callable[[], None]] = None
+                 ) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    (record, cursor) for every record after cursor, oldest first, across
+    rotations and archives. a cursor names its segment by the first record, as
+    checkpoints do, so it survives rename and archiving; pass the last one back
+    to pick up where the previous pass stopped. a cursor whose segment is gone
+    or that no longer lands on a record boundary restarts from genesis, and
+    on_restart is called before the first record so the caller can drop what it
+    built from the earlier passes. no verification.
+    """
+    segs = chain_segments(chain_path)
+    first, start, done = 0, 0, 0
+    if cursor:
+        resumed = False
+        for i, fp in enumerate(segs):
+            if _segment_head(fp) != cursor.get("segment_head"):
+                continue
+            pos = int(cursor.get("segment_records", 0)) if fp.endswith(ARCHIVE_SUFFIX) else int(cursor.get("offset", 0))
+            if _on_boundary(fp, pos):
+                first, start, done = i, pos, int(cursor.get("segment_records", 0))
+                resumed = True
+            break
+        if not resumed:
+            log.warning("chain cursor %s does not resume in %s, following from genesis",
+                        str(cursor.get("segment_head"))[:16], chain_path)
+            if on_restart is not None:
+                on_restart()
+    for i in range(first, len(segs)):
+        fp = segs[i]
+        head = None
+        n = done if i == first else 0
+        for item, off in _segment_items(fp, start if i == first else 0):
+            if item is None:
+                continue
+            rec = json.loads(item) if isinstance(item, bytes) else item
+            if head is None:
+                head = _segment_head(fp) if (i == first and start) else (rec.get("digest") or rec.get("leaf"))
+            n += 1
+            yield rec, {"segment_head": head, "offset": off, "segment_records": n}
+
+def _shard_seals(chain_path: str) -> List[Dict[str, Any]]:
+    return [r["payload"] for r in iter_chain_records(chain_path) if r.get("kind") == "shard_seal"]
+
+def _walk_shard(shard_path: str, heads: List[Optional[str]]) -> Optional[int]:
+    # heads must appear in the shard chain in seal order; returns the first
+    # seal position that does not, or None when all of them do
+    k = 0
+    while k < len(heads) and heads[k] is None:
+        k += 1
+    if k < len(heads):
+        for rec in iter_chain_records(shard_path):
+            d = rec.get("digest")
+            while k < len(heads) and heads[k] == d:
+                k += 1
+            if k >= len(heads):
+                break
+    return None if k >= len(heads) else k
+
+def verify_sharded_chain(chain_path: str, workers: Optional[int] = None,
+                         checkpoint: bool = False) -> Tuple[bool, int]:
+    """
+    verify the top level chain and every shard chain it names, then check that
+    each shard head committed by a seal is a record of that shard chain, in seal
+    order. returns (ok, records across the top level chain and all shards).
+    """
+    ok, n = verify_chain(chain_path, workers=workers, checkpoint=checkpoint)
+    if not ok:
+        return (False, n)
+    seals = _shard_seals(chain_path)
+    heads: Dict[str, List[Optional[str]]] = {}
+    for seal in seals:
+        for sh in seal.get("shards", []):
+            heads.setdefault(sh["chain"], []).append(sh.get("head"))
+    dirn = os.path.dirname(os.path.abspath(chain_path))
+    total = n
+    for name in sorted(heads):
+        path = os.path.join(dirn, name)
+        if not os.path.exists(path) and any(h is not None for h in heads[name]):
+            log.error("shard chain missing: %s", name)
+            return (False, total)
+        if os.path.exists(path):
+            sok, sn = verify_chain(path, workers=workers, checkpoint=checkpoint)
+            total += sn
+            if not sok:
+                log.error("shard chain failed: %s", name)
+                return (False, total)
+    width = workers if workers is not None else (VERIFY_WORKERS or os.cpu_count() or 1)
+    names = sorted(heads)
+    paths = [os.path.join(dirn, name) for name in names]
+    if width > 1 and len(names) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(width, len(names))) as ex:
+            misses = list(ex.map(_walk_shard, paths, [heads[nm] for nm in names]))
+    else:
+        misses = [_walk_shard(p, heads[nm]) for p, nm in zip(paths, names)]
+    for name, miss in zip(names, misses):
+        if miss is not None:
+            log.error("seal %s commits to a head not found in order in %s", seals[miss].get("seal"), name)
+            return (False, total)
+    return (True, total)
+
+def merge_shard_chains(chain_path: str) -> Iterator[Tuple[Optional[int], Dict[str, Any]]]:
+    """
+    one ordered stream over a sharded deployment as (shard, record) pairs. seals
+    split the shard chains into epochs; within an epoch the shard records are
+    merged by payload ts and followed by the seal itself, with shard None. records
+    written after the last seal come out merged at the end.
+    """
+    seals = _shard_seals(chain_path)
+    top = [r for r in iter_chain_records(chain_path) if r.get("kind") == "shard_seal"]
+    dirn = os.path.dirname(os.path.abspath(chain_path))
+    names = sorted({sh["chain"]: sh["shard"] for seal in seals for sh in seal.get("shards", [])}.items(),
+                   key=lambda kv: kv[1])
+    its = {shard: iter_chain_records(os.path.join(dirn, name)) for name, shard in names}
+    reached: Dict[int, Optional[str]] = {shard: None for shard in its}
+    ts_of = lambda pair: str(pair[1].get("payload", {}).get("ts", ""))
+
+    def upto(shard: int, head: Optional[str]) -> List[Tuple[Optional[int], Dict[str, Any]]]:
+        out: List[Tuple[Optional[int], Dict[str, Any]]] = []
+        if head is None or reached[shard] == head:
+            return out
+        for rec in its[shard]:
+            out.append((shard, rec))
+            if rec.get("digest") == head:
+                break
+        reached[shard] = head
+        return out
+
+    for rec in top:
+        parts = [upto(sh["shard"], sh.get("head")) for sh in rec["payload"].get("shards", []) if sh["shard"] in its]
+        yield from heapq.merge(*parts, key=ts_of)
+        yield (None, rec)
+    yield from heapq.merge(*[[(shard, r) for r in it] for shard, it in its.items()], key=ts_of)
+
+# --------------- replay ---------------
+
+# event ids ChainReplay remembers to charge one alert per event; a resolution
+# lands within the resolver deadline of its event, far inside this window
+REPLAY_ALERTED_MAX = max(1, int(os.getenv("FIREWALL_REPLAY_ALERTED_MAX", "65536")))
+
+@dataclass
+class ReplayState:
+    """organism state folded back out of a chain, see ChainReplay."""
+    records: int = 0
+    events: int = 0
+    head: Optional[str] = None
+    last_ts: Optional[str] = None
+    temperature: float = 0.0
+    base_hi: float = THRESH_HI
+    base_lo: float = THRESH_LO
+    energy: float = 80.0
+    distress: float = 0.0
+    bonds: Dict[str, float] = field(default_factory=dict)
+    totals: Dict[str, int] = field(default_factory=lambda: {st.value: 0 for st in FState})
+    decisions: Dict[str, int] = field(default_factory=dict)
+    refinements: int = 0
+    # merkle mode: the block that is still open and its unsigned leaves
+    block_no: int = 0
+    open_leaves: List[str] = field(default_factory=list)
+
+class ChainReplay:
+    """
+    streams a chain, rotations and archives included, and folds it back into
+    organism state. event records carry score, state, temperature and the
+    effective thresholds; felt_experience records anchor distress and bonds;
+    self_refinement records carry the base thresholds. energy is replayed from
+    the action costs the records imply. no verification, run verify_chain first
+    when the chain is not trusted.
+    """
+    def __init__(self, chain_path: str, history: int = 1024):
+        self._path = chain_path
+        self.state = ReplayState()
+        self.scores = RingBuffer(history)
+        self.hi_lo = RingBuffer(history, width=3)
+        self.sketch = QuantileSketch()
+        self._awareness = 0.5
+        # recently alerted event ids, oldest first, at most REPLAY_ALERTED_MAX
+        self._alerted: "OrderedDict[Optional[str], None]" = OrderedDict()
+
+    def _spend(self, kind: str) -> None:
+        st = self.state
+        st.energy = clamp(st.energy - ENERGY_COSTS.get(kind, 0.1), 0.0, 100.0)
+
+    def feed(self, rec: Dict[str, Any]) -> None:
+        st = self.state
+        kind, p = rec.get("kind"), rec.get("payload") or {}
+        st.records += 1
+        if rec.get("digest"):
+            st.head = rec["digest"]
+        if "leaf" in rec:
+            st.block_no = rec.get("block", st.block_no)
+            st.open_leaves.append(rec["leaf"])
+        elif kind == "merkle_block":
+            st.block_no = p["block"] + 1
+            st.open_leaves = []
+        st.last_ts = p.get("ts", st.last_ts)
+        if kind == "event":
+            s, fs = float(p["score"]), FState(p["state"])
+            temp = float(p.get("temperature", st.temperature))
+            prev = self.scores.last() if len(self.scores) > 1 else None
+            # idle recovery and the score cost cancel except at the clamps
+            self._spend("idle")
+            self._spend("score")
+            st.distress = distress_step(st.distress, s, fs, prev, self._awareness)
+            st.temperature = temp
+            if "hi" in p and "lo" in p and not st.refinements:
+                # the base pair is only recorded by self_refinement; before the
+                # first one, undo the temperature shift (exact away from the clamps)
+                st.base_hi = float(p["hi"]) - temp * 0.10
+                st.base_lo = float(p["lo"]) - temp * 0.10
+            self.scores.append(s)
+            self.hi_lo.append(float(p.get("hi", 0.0)), float(p.get("lo", 0.0)), temp)
+            self.sketch.add(s)
+            st.totals[fs.value] += 1
+            st.events += 1
+        elif kind == "resolution":
+            # a resolution means its event raised an alert
+            ev = p.get("source_event_id")
+            if ev in self._alerted:
+                self._alerted.move_to_end(ev)
+            else:
+                self._alerted[ev] = None
+                if len(self._alerted) > REPLAY_ALERTED_MAX:
+                    self._alerted.popitem(last=False)
+                self._spend("alert")
+            d = p.get("decision", "")
+            st.decisions[d] = st.decisions.get(d, 0) + 1
+            if d == Ternary.AFFIRM.name:
+                self._spend("actuator")
+        elif kind == "felt_experience":
+            self._spend("feel")
+            st.distress = float(p.get("distress_level", st.distress))
+            st.bonds = dict(p.get("social_bonds") or {})
+        elif kind == "self_refinement":
+            self._spend("maintenance")
+            self._spend("actuator")
+            st.base_hi, st.base_lo = float(p["new_hi"]), float(p["new_lo"])
+            st.refinements += 1
+
+    def run(self) -> ReplayState:
+        for rec in iter_chain_records(self._path):
+            self.feed(rec)
+        self._alerted.clear()
+        return self.state
+
+def replay_chain(chain_path: str, history: int = 1024) -> ChainReplay:
+    """replay a whole chain and return the replay, state plus history rings."""
+    rp = ChainReplay(chain_path, history=history)
+    rp.run()
+    return rp
+
+def restore_from_chain(chain_path: str, fw: Optional[TernaryServerFirewall] = None,
+                       resume: bool = True, **kwargs: Any) -> TernaryServerFirewall:
+    """
+    rebuild an organism from its chain. with fw None a new one is created on
+    chain_path (kwargs go to the constructor). resume continues the chain from
+    its head instead of starting a new genesis record, and in merkle mode keeps
+    the open block so its leaves are sealed by the next block record. the base
+    thresholds are module wide and are set as well.
+    """
+    global THRESH_HI, THRESH_LO
+    rp = replay_chain(chain_path)
+    st = rp.state
+    if fw is None:
+        fw = TernaryServerFirewall(chain_path=chain_path, **kwargs)
+    with _THRESH_LOCK:
+        THRESH_HI = float(clamp(st.base_hi, 0.05, 0.95))
+        THRESH_LO = float(clamp(st.base_lo, 0.05, 0.95))
+    with fw._state_lock:
+        fw._temperature = st.temperature
+        fw._energy = st.energy
+        fw._distress_level = st.distress
+        fw._bonds = dict(st.bonds)
+    with fw._hist_lock:
+        for s in rp.scores.tail(len(rp.scores)):
+            fw._scores.append(s)
+        for row in rp.hi_lo.tail(len(rp.hi_lo)):
+            fw._hi_lo_hist.append(*row)
+        # the replayed scores are not recent load: the score window starts empty
+        for f in FState:
+            fw._totals[f] = st.totals[f.value]
+    if resume:
+        with fw._head_lock:
+            fw._last_digest = st.head
+            if fw._merkle:
+                fw._block_no = st.block_no
+                fw._block_leaves = list(st.open_leaves)
+                fw._block_opened = time.monotonic()
+    log.info("[%s] restored from %s: %d records, head %s", fw._id, chain_path, st.records, (st.head or "")[:16])
+    return fw
+
+def _rescore_flush(core: Any, cols: Dict[str, List[Any]], hi: Optional[float], lo: Optional[float],
+                   temperature: Optional[float], cache: Dict[float, Tuple[float, float]]) -> Tuple[List[float], List[FState]]:
+    # one batch: vectorized scores, then thresholds per distinct temperature
+    scores = core.score_many(cols["a"], cols["b"], cols["c"])
+    if hi is None and lo is None and temperature is None:
+        his, los = cols["hi"], cols["lo"]
+    else:
+        base_hi = THRESH_HI if hi is None else hi
+        base_lo = THRESH_LO if lo is None else lo
+        his, los = [], []
+        for t in cols["temp"]:
+            t = t if temperature is None else temperature
+            pair = cache.get(t)
+            if pair is None:
+                pair = cache[t] = effective_thresholds(base_hi, base_lo, t)
+            his.append(pair[0]); los.append(pair[1])
+    margin = clamp(VULN_MARGIN, 0.02, 0.5)
+    if _HAS_NUMPY:
+        arr, h = np.asarray(scores, dtype=float), np.asarray(his, dtype=float)
+        band = np.maximum(np.asarray(los, dtype=float), h - margin)
+        codes = np.where(arr >= h, 2, np.where(arr >= band, 1, 0)).tolist()
+        return scores, [_FSTATE_BY_CODE[k] for k in codes]
+    return scores, [FState.CRITICAL if s >= h else FState.VULNERABLE if s >= max(l, h - margin) else FState.SECURE
+                    for s, h, l in zip(scores, his, los)]
+
+def rescore_chain(chain_path: str, core: Any = None, hi: Optional[float] = None, lo: Optional[float] = None,
+                  temperature: Optional[float] = None, batch: int = 65536, sample: int = 20) -> Dict[str, Any]:
+    """
+    re-score every event in a chain under another core and/or threshold set and
+    compare with what was recorded. core needs score_many(a, b, c). hi and lo are
+    base thresholds, shifted by the recorded temperature unless temperature is
+    given; with none of the three the recorded effective thresholds are kept, so
+    only the core changes. events stream through in batches of batch, memory
+    stays flat. returns totals before and after, the transition counts and up to
+    sample changed events.
+    """
+    core = core or SimpleAnomalyCore()
+    old = {st.value: 0 for st in FState}
+    new = {st.value: 0 for st in FState}
+    moves: Dict[str, int] = {}
+    changed: List[Dict[str, Any]] = []
+    cache: Dict[float, Tuple[float, float]] = {}
+    drift = 0.0
+    n = 0
+    first_ts = last_ts = None
+    cols: Dict[str, List[Any]] = {k: [] for k in ("a", "b", "c", "hi", "lo", "temp", "old", "score", "id", "ts")}
+
+    def flush() -> None:
+        nonlocal drift, n
+        scores, states = _rescore_flush(core, cols, hi, lo, temperature, cache)
+        for i, (s, fs) in enumerate(zip(scores, states)):
+            was = cols["old"][i]
+            old[was] += 1
+            new[fs.value] += 1
+            drift += abs(s - cols["score"][i])
+            if was != fs.value:
+                key = f"{was}->{fs.value}"
+                moves[key] = moves.get(key, 0) + 1
+                if len(changed) < sample:
+                    changed.append({"event_id": cols["id"][i], "ts": cols["ts"][i], "old": was, "new": fs.value,
+                                    "score_old": cols["score"][i], "score_new": round(s, 6)})
+        n += len(scores)
+        for v in cols.values():
+            v.clear()
+
+    t0 = time.perf_counter()
+    for rec in iter_chain_records(chain_path):
+        if rec.get("kind") != "event":
+            continue
+        p = rec["payload"]
+        sig = p.get("signals") or {}
+        cols["a"].append(sig.get("signal_a", 0.0)); cols["b"].append(sig.get("signal_b", 0.0))
+        cols["c"].append(sig.get("signal_c", 0.0))
+        cols["hi"].append(p.get("hi", THRESH_HI)); cols["lo"].append(p.get("lo", THRESH_LO))
+        cols["temp"].append(p.get("temperature", 0.0))
+        cols["old"].append(p["state"]); cols["score"].append(p["score"])
+        cols["id"].append(p.get("event_id")); cols["ts"].append(p.get("ts"))
+        first_ts = first_ts or p.get("ts")
+        last_ts = p.get("ts", last_ts)
+        if len(cols["a"]) >= max(1, batch):
+            flush()
+    if cols["a"]:
+        flush()
+    wall = time.perf_counter() - t0
+    return {
+        "chain": chain_path,
+        "core": type(core).__name__,
+        "hi": hi,
+        "lo": lo,
+        "temperature": temperature,
+        "events": n,
+        "ts_first": first_ts,
+        "ts_last": last_ts,
+        "wall_s": round(wall, 4),
+        "events_per_s": round(n / wall, 1) if wall > 0 else None,
+        "totals_recorded": old,
+        "totals_rescored": new,
+        "changed": sum(moves.values()),
+        "transitions": moves,
+        "score_drift_mean": round(drift / n, 6) if n else 0.0,
+        "sample": changed,
+    }
+
+def load_core(spec: str) -> Any:
+    """a scoring core from "module:Class", built with no arguments."""
+    import importlib
+    mod, _, name = spec.partition(":")
+    if not name:
+        raise ValueError(f"core spec {spec!r} is not module:Class")
+    return getattr(importlib.import_module(mod), name)()
+
+# --------------- bench ---------------
+
+def run_bench(packets: int = 100_000, seed: int = 7, batch: int = 0, quiet: bool = True,
+              temperature: float = -0.2, chain_path: Optional[str] = None,
+              sample_every: int = 1024) -> Dict[str, Any]:
+    """
+    red queen traffic against one organism, timed. packets come from an evolving
+    adversary with fixed seeds; batch > 0 sends them through process_packets in
+    bursts of that size. latency is per process_packet call, or per burst when
+    batched. the chain goes to a temp dir unless chain_path is given, and quiet
+    raises the log level past critical while the clock runs.
+    """
+    import tempfile
+    tmp = None if chain_path else tempfile.mkdtemp(prefix="fw-bench-")
+    path = chain_path or os.path.join(tmp, "bench.chain.jsonl")
+    # the traffic's own stream; the process-wide random module is left alone
+    rng = random.Random(seed + 1)
+    level = log.level
+    lat = QuantileSketch(min_value=1e-7)
+    depth = {"resolve_queue": 0, "resolve_waiting": 0, "feel_queue": 0}
+    wins = 0
+    busy = 0.0
+    fw: Optional[TernaryServerFirewall] = None
+    if quiet:
+        log.setLevel(logging.CRITICAL + 1)
+    try:
+        fw = TernaryServerFirewall(seed=seed, chain_path=path)
+        fw.set_temperature(temperature)
+        adv = TernaryServerFirewall.Adversary(fw=fw, rng=rng)
+        step = max(1, batch)
+        clock = time.perf_counter
+        t0 = clock()
+        for done in range(0, packets, step):
+            if batch > 0:
+                pkts = [adv.craft() for _ in range(min(step, packets - done))]
+                cols = {k: [p[k] for p in pkts] for k in ("signal_a", "signal_b", "signal_c")}
+                t = clock()
+                states = fw.process_packets(cols)
+                dt = clock() - t
+                wins += sum(1 for st in states if st is FState.CRITICAL)
+            else:
+                pkt = adv.craft()
+                t = clock()
+                st = fw.process_packet(pkt)
+                dt = clock() - t
+                wins += st is FState.CRITICAL
+            busy += dt
+            lat.add(dt)
+            adv.evolve()
+            if (done // step) % sample_every == 0:
+                depth["resolve_queue"] = max(depth["resolve_queue"], fw._resolve_q.qsize())
+                depth["resolve_waiting"] = max(depth["resolve_waiting"], len(fw._resolve_wait))
+                depth["feel_queue"] = max(depth["feel_queue"], fw._feel_q.qsize())
+        wall = clock() - t0
+        fw.flush_chain()
+        m = fw.metrics()
+        chain_bytes = sum(os.path.getsize(fp) for fp in chain_segments(path))
+        return {
+            "packets": packets,
+            "seed": seed,
+            "batch": batch,
+            "chain_mode": CHAIN_MODE,
+            "numpy": _HAS_NUMPY,
+            "wall_s": round(wall, 4),
+            "busy_s": round(busy, 4),
+            "pkts_per_s": round(packets / busy, 1) if busy > 0 else None,
+            "pkts_per_s_wall": round(packets / wall, 1) if wall > 0 else None,
+            "latency_unit": "burst" if batch > 0 else "packet",
+            "latency_p50_us": round(lat.quantile(0.50) * 1e6, 2),
+            "latency_p99_us": round(lat.quantile(0.99) * 1e6, 2),
+            "chain_bytes": chain_bytes,
+            "chain_bytes_per_s": round(chain_bytes / wall, 1) if wall > 0 else None,
+            "queue_depth_max": depth,
+            "queue_depth_end": {"resolve_queue": m["resolver"]["queue_depth"], "resolve_waiting": m["resolver"]["waiting"],
+                                "feel_queue": m["feel_queue_depth"]},
+            "red_queen": {"wins": wins, "losses": packets - wins},
+            "totals": m["totals"],
+        }
+    finally:
+        # workers append to the chain until they are joined
+        if fw is not None:
+            fw.close()
+        log.setLevel(level)
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+def run_stress(threads: int = 8, packets: int = 2000, seed: int = 7, batch: int = 0,
+               quiet: bool = True, chain_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    many ingress threads against one organism. each thread sends its own seeded
+    traffic through process_packet, or process_packets when batch > 0, released
+    together by a barrier. afterwards the chain must verify end to end (no fork
+    in the prev links), the totals must add up to every packet sent and the chain
+    record count must match the organism's own counter.
+    """
+    import tempfile
+    tmp = None if chain_path else tempfile.mkdtemp(prefix="fw-stress-")
+    path = chain_path or os.path.join(tmp, "stress.chain.jsonl")
+    level = log.level
+    errors: List[str] = []
+    gate = threading.Barrier(threads)
+
+    def ingress(n: int, fw: TernaryServerFirewall) -> None:
+        rng = random.Random(seed * 1000 + n)
+        pkts = [{"signal_a": rng.uniform(0.1, 1.9), "signal_b": rng.uniform(0.1, 1.9),
+                 "signal_c": rng.uniform(0.1, 1.9)} for _ in range(packets)]
+        gate.wait()
+        try:
+            if batch > 0:
+                for i in range(0, packets, batch):
+                    part = pkts[i:i + batch]
+                    fw.process_packets({k: [p[k] for p in part] for k in ("signal_a", "signal_b", "signal_c")})
+            else:
+                for p in pkts:
+                    fw.process_packet(p)
+        except Exception as e:
+            errors.append("%s: %s" % (type(e).__name__, e))
+
+    fw: Optional[TernaryServerFirewall] = None
+    if quiet:
+        log.setLevel(logging.CRITICAL + 1)
+    try:
+        fw = TernaryServerFirewall(seed=seed, chain_path=path)
+        ts = [threading.Thread(target=ingress, args=(n, fw), name="fw-ingress-%d" % n) for n in range(threads)]
+        t0 = time.perf_counter()
+        for t in ts:
+            t.start()
+        for t in ts:
+            t.join()
+        wall = time.perf_counter() - t0
+        # let the resolve and feeling workers settle, the head must hold still
+        # across two looks before it is compared with the file
+        last, deadline = None, time.monotonic() + RESOLVER_TIMEOUT_S + 5.0
+        while time.monotonic() < deadline:
+            busy = fw._resolve_q.qsize() or len(fw._resolve_wait) or fw._feel_q.unfinished_tasks
+            now = fw.chain_head()
+            if not busy and now == last:
+                break
+            last = now
+            time.sleep(0.05)
+        # joins the workers and seals the chain, so nothing is appended past this point
+        fw.close()
+        m = fw.metrics()
+        head, records = fw.chain_head()
+        ok, n = verify_chain(path, checkpoint=False)
+        sent = threads * packets
+        counted = sum(m["totals"].values())
+        return {
+            "threads": threads,
+            "packets": sent,
+            "batch": batch,
+            "chain_mode": CHAIN_MODE,
+            "wall_s": round(wall, 4),
+            "pkts_per_s": round(sent / wall, 1) if wall > 0 else None,
+            "chain_ok": ok,
+            "chain_records": n,
+            "head_records": records,
+            "records_match": n == records,
+            "totals": m["totals"],
+            "totals_match": counted == sent,
+            "errors": errors,
+            "ok": ok and n == records and counted == sent and not errors,
+        }
+    finally:
+        if fw is not None:
+            fw.close()
+        log.setLevel(level)
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
 
 # --------------- cli ---------------
 
@@ -987,32 +4052,138 @@ def _demo_refinement():
     # check new thresholds
     print(json.dumps({"refined_metrics": fw.metrics()}, indent=2))
 
-def _bench():
-    fw = TernaryServerFirewall(seed=7)
-    fw.set_temperature(-0.2)
-    r = fw.red_queen(rounds=48)
-    print(json.dumps({"red_queen": r, "metrics": fw.metrics()}, indent=2))
+def _bench(packets: int, seed: int, batch: int, quiet: bool, out: Optional[str], chain: Optional[str]):
+    rep = run_bench(packets=packets, seed=seed, batch=batch, quiet=quiet, chain_path=chain)
+    text = json.dumps(rep, indent=2)
+    if out:
+        mkdir_p(out)
+        with open(out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+def _stress(threads: int, packets: int, seed: int, batch: int, quiet: bool, chain: Optional[str]) -> bool:
+    rep = run_stress(threads=threads, packets=packets, seed=seed, batch=batch, quiet=quiet, chain_path=chain)
+    print(json.dumps(rep, indent=2))
+    return rep["ok"]
+
+def _replay(path: str):
+    rp = replay_chain(path)
+    st = asdict(rp.state)
+    st["open_leaves"] = len(st["open_leaves"])
+    st["score_p50"] = rp.sketch.quantile(0.50)
+    st["score_p95"] = rp.sketch.quantile(0.95)
+    print(json.dumps({"replay": st}, indent=2))
+
+def _rescore(path: str, core: Optional[str], hi: Optional[float], lo: Optional[float],
+             temp: Optional[float], batch: int):
+    rep = rescore_chain(path, core=load_core(core) if core else None, hi=hi, lo=lo,
+                        temperature=temp, batch=batch or 65536)
+    print(json.dumps(rep, indent=2))
 
 def _blueprint(path: str):
     fw = TernaryServerFirewall(seed=5)
     p = fw.write_child_blueprint(path, mutate=0.03)
     print(json.dumps({"blueprint": p, "metrics": fw.metrics()}, indent=2))
 
-def _verify(path: str):
-    ok, n = verify_chain(path)
-    print(json.dumps({"chain_ok": ok, "records": n}, indent=2))
+def _verify(path: str, workers: Optional[int] = None, incremental: bool = False):
+    rep = verify_chain_report(path, workers=workers, checkpoint=incremental)
+    print(json.dumps({"chain_ok": rep["ok"], "records": rep["records"], "open_leaves": rep["open_leaves"],
+                      "fail": rep["fail"]}, indent=2))
+
+def _archive(path: str):
+    print(json.dumps({"archived": archive_chain(path)}, indent=2))
+
+def _scan(path: str, column: str, span: Optional[List[str]], kind: Optional[str]):
+    # any numeric column, so a range wide enough for counters and epoch stamps
+    sk = QuantileSketch(max_value=1e18)
+    counts: Dict[str, int] = {}
+    n = 0
+    for v in scan_column(path, column, kind=kind, start=span[0] if span else None, end=span[1] if span else None):
+        n += 1
+        if isinstance(v, (int, float)) and not isinstance(v, bool):
+            sk.add(float(v))
+        else:
+            key = v if isinstance(v, str) else json.dumps(v, sort_keys=True)
+            counts[key] = counts.get(key, 0) + 1
+    out: Dict[str, Any] = {"column": column, "values": n}
+    if len(sk):
+        out.update({f"p{q}": sk.quantile(q / 100) for q in (50, 95, 99)})
+    if counts:
+        out["counts"] = dict(sorted(counts.items(), key=lambda kv: -kv[1])[:20])
+    print(json.dumps(out, indent=2))
+
+def _sharded(n: int, packets: int):
+    sfw = ShardedFirewall(shards=n)
+    services = [f"svc-{k}" for k in range(4 * sfw.shards)]
+    for _ in range(packets):
+        sfw.submit({"service_id": random.choice(services), "signal_a": random.uniform(0.1, 1.5),
+                    "signal_b": random.uniform(0.1, 1.5), "signal_c": random.uniform(0.1, 1.5)})
+    shards = sfw.close()
+    print(json.dumps({"shards": [{"id": m.get("id"), "totals": m.get("totals")} for m in shards]}, indent=2))
+
+def _query(path: str, find: Optional[str], span: Optional[List[str]], kind: Optional[str], reindex: bool):
+    idx = ChainIndex(path)
+    try:
+        if reindex:
+            print(json.dumps({"reindexed": idx.rebuild()}))
+        if find:
+            locs = idx.find(find)
+        elif span:
+            locs = idx.range(span[0], span[1], kind=kind)
+        elif kind:
+            locs = idx.by_kind(kind)
+        else:
+            locs = []
+        for seg, off, _ in locs:
+            print(json.dumps({"segment": seg, "offset": off, "record": idx.read(seg, off)}))
+    finally:
+        idx.close()
 
 def main(argv: Optional[List[str]] = None) -> int:
     import argparse
     ap = argparse.ArgumentParser(description="ternary server firewall organism")
     ap.add_argument("--demo", action="store_true", help="run a short traffic demo")
-    ap.add_argument("--bench", action="store_true", help="run red queen bench")
+    ap.add_argument("--bench", action="store_true", help="run the red queen benchmark, json report on stdout")
+    ap.add_argument("--seed", type=int, default=7, help="with --bench or --stress: seed for the organism and the traffic")
+    ap.add_argument("--batch", type=int, default=0, metavar="N", help="with --bench or --stress: send bursts of n through process_packets")
+    ap.add_argument("--verbose", action="store_true", help="with --bench or --stress: keep organism output instead of running quiet")
+    ap.add_argument("--out", metavar="PATH", help="with --bench: also write the report here")
+    ap.add_argument("--chain", metavar="PATH", help="with --bench or --stress: chain path to keep, temp dir otherwise; with --prove: chain to prove against")
     ap.add_argument("--blueprint", metavar="PATH", help="write child blueprint json")
     ap.add_argument("--verify", metavar="CHAIN", help="verify audit chain integrity")
-    ap.add_argument("--temp", type=float, default=None, help="set temperature before run")
+    ap.add_argument("--workers", type=int, default=None, help="process pool width for --verify")
+    ap.add_argument("--incremental", action="store_true",
+                    help="with --verify or --verify-sharded: resume after the last signed checkpoint and write a new one")
+    ap.add_argument("--query", metavar="CHAIN", help="look up records through the chain index")
+    ap.add_argument("--find", metavar="ID", help="with --query: event, resolution, handshake or feel id")
+    ap.add_argument("--range", nargs=2, metavar=("START", "END"), help="with --query or --scan: iso ts range, end exclusive")
+    ap.add_argument("--kind", metavar="KIND", help="with --query or --scan: record kind, alone or to narrow --range")
+    ap.add_argument("--reindex", action="store_true", help="with --query: rebuild the index from the chain first")
+    ap.add_argument("--sharded", type=int, metavar="N", help="run the demo traffic across n shard processes")
+    ap.add_argument("--stress", type=int, metavar="N", help="run n concurrent ingress threads on one organism, verify the chain after")
+    ap.add_argument("--packets", type=int, default=None, help="with --sharded, --bench or --stress (per thread): packets to send")
+    ap.add_argument("--verify-sharded", metavar="CHAIN", help="verify a sharded deployment from its top level chain")
+    ap.add_argument("--merge", metavar="CHAIN", help="print the ordered merge of a sharded deployment as jsonl")
+    ap.add_argument("--archive", metavar="CHAIN", help="convert rotated segments into compressed columnar archives")
+    ap.add_argument("--scan", metavar="CHAIN", help="summarize one archived column, see --column")
+    ap.add_argument("--column", default="payload.score", help="with --scan: column name, payload fields as payload.<key>")
+    ap.add_argument("--prove", metavar="ID", help="print a merkle inclusion proof for an event id, from --chain or FIREWALL_CHAIN_PATH")
+    ap.add_argument("--check-proof", metavar="FILE", help="verify a proof written by --prove")
+    ap.add_argument("--replay", metavar="CHAIN", help="fold a chain back into organism state and print it")
+    ap.add_argument("--rescore", metavar="CHAIN", help="re-score every chained event, see --hi, --lo, --temp and --core")
+    ap.add_argument("--hi", type=float, default=None, help="with --rescore: base critical threshold")
+    ap.add_argument("--lo", type=float, default=None, help="with --rescore: base vulnerable threshold")
+    ap.add_argument("--core", metavar="MODULE:CLASS", help="with --rescore: scoring core with score_many, default SimpleAnomalyCore")
+    ap.add_argument("--temp", type=float, default=None, help="set temperature before run, with --rescore the temperature to apply")
     ap.add_argument("--refine", action="store_true", help="run recursive self-refinement demo")
+    ap.add_argument("--log-level", default=None, help="override FIREWALL_LOG_LEVEL, logs go to stderr")
     args = ap.parse_args(argv)
+    configure_logging(args.log_level)
 
+    if args.replay:
+        _replay(args.replay); return 0
+    if args.rescore:
+        _rescore(args.rescore, args.core, args.hi, args.lo, args.temp, args.batch); return 0
     if args.temp is not None:
         t = float(clamp(args.temp, -1.0, 1.0))
         print(json.dumps({"set_temperature": t}))
@@ -1020,13 +4191,41 @@ def main(argv: Optional[List[str]] = None) -> int:
     if args.demo:
         _demo(); return 0
     if args.bench:
-        _bench(); return 0
+        _bench(args.packets or 100_000, args.seed, args.batch, not args.verbose, args.out, args.chain); return 0
+    if args.stress:
+        ok = _stress(args.stress, args.packets or 2000, args.seed, args.batch, not args.verbose, args.chain)
+        return 0 if ok else 1
     if args.blueprint:
         _blueprint(args.blueprint); return 0
     if args.verify:
-        _verify(args.verify); return 0
+        _verify(args.verify, workers=args.workers, incremental=args.incremental); return 0
     if args.refine:
         _demo_refinement(); return 0
+    if args.query:
+        _query(args.query, args.find, args.range, args.kind, args.reindex); return 0
+    if args.archive:
+        _archive(args.archive); return 0
+    if args.scan:
+        _scan(args.scan, args.column, args.range, args.kind); return 0
+    if args.prove:
+        proof = merkle_proof(args.chain or CHAIN_PATH, args.prove)
+        print(json.dumps(proof, indent=2))
+        return 0 if proof else 1
+    if args.check_proof:
+        with open(args.check_proof, "r", encoding="utf-8") as f:
+            ok = verify_merkle_proof(json.load(f))
+        print(json.dumps({"proof_ok": ok}))
+        return 0 if ok else 1
+    if args.sharded:
+        _sharded(args.sharded, args.packets or 2000); return 0
+    if args.verify_sharded:
+        ok, n = verify_sharded_chain(args.verify_sharded, workers=args.workers, checkpoint=args.incremental)
+        print(json.dumps({"chain_ok": ok, "records": n}, indent=2))
+        return 0 if ok else 1
+    if args.merge:
+        for shard, rec in merge_shard_chains(args.merge):
+            print(json.dumps({"shard": shard, **rec}, separators=(",",":")))
+        return 0
 
     print("no action requested. try --demo or --bench")
     return 0
@@ -1198,14 +4397,22 @@ if __name__ == "__main__":
         }
 # json_logger.py
 from __future__ import annotations
-import os, io, json, hmac, time, hashlib, threading, queue
+import os, io, sys, json, hmac, time, hashlib, threading, queue
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 def _iso_utc(ts: Optional[float] = None) -> str:
     t = datetime.fromtimestamp(ts if ts is not None else time.time(), tz=timezone.utc)
     return t.isoformat(timespec="microseconds").replace("+00:00", "Z")
 
+class _Ticket:
+    # lets a producer wait for the writer to sign its record
+    __slots__ = ("done", "digest")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.digest: Optional[str] = None
+
 class JsonLogger:
     """
     structured json logger with:
@@ -1214,8 +4421,25 @@ class JsonLogger:
       - size rotation with continuity footer and header
       - optional hmac signature per record
       - context merge and correlation ids
+
+    producers only enqueue (kind, payload, level). the writer thread owns the
+    chain head: it signs each record against the head it has itself applied,
+    so concurrent producers can never chain off a stale head. it drains up to
+    batch_max queued records per wake and writes them with one buffered write
+    (one flush, one fsync when enabled).
+
+    overflow when the queue is full:
+      - drop_oldest: evict the oldest queued record (the default); when that
+        one must not be lost (append(), block_levels) the incoming one is dropped
+      - drop_new: drop the incoming record
+      - block: wait up to block_timeout_s for room, then drop the incoming one
+    levels in block_levels always take the block path, as does append().
+    every drop is counted per level of the record that was lost, see stats().
     """
 
+    _LEVELS = {"debug": 10, "info": 20, "warn": 30, "error": 40}
+    _OVERFLOW = ("drop_oldest", "drop_new", "block")
+
     def __init__(
         self,
         path: Optional[str] = None,
@@ -1228,7 +4452,13 @@ class JsonLogger:
         default_ctx: Optional[Dict[str, Any]] = None,
         stdout_fallback: bool = True,
         name: str = "jsonlogger",
+        batch_max: int = 512,
+        overflow: str = "drop_oldest",
+        block_timeout_s: float = 1.0,
+        block_levels: Sequence[str] = (),
     ):
+        if overflow not in self._OVERFLOW:
+            raise ValueError(f"overflow must be one of {self._OVERFLOW}")
         self._name = name
         self._path = path
         self._rotate_bytes = int(rotate_mb * 1024 * 1024)
@@ -1236,53 +4466,58 @@ class JsonLogger:
         self._key = signer_key
         self._default_ctx = dict(default_ctx or {})
         self._stdout_fallback = stdout_fallback
-        self._q: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=queue_size)
+        # items are (kind, payload, level, ticket); None wakes the writer to stop
+        self._q: "queue.Queue[Optional[Tuple[str, Dict[str, Any], str, Optional[_Ticket]]]]" = queue.Queue(maxsize=queue_size)
         self._lvl = self._coerce_level(level)
+        self._batch_max = max(1, int(batch_max))
+        self._overflow = overflow
+        self._block_timeout = max(0.0, float(block_timeout_s))
+        self._block_levels = {s.lower() for s in block_levels}
         self._lock = threading.Lock()
         self._f: Optional[io.TextIOBase] = None
+        self._bytes = 0
+        # written and read only by the writer thread
         self._head_digest: Optional[str] = None
         self._stop = False
+        self._stats_lock = threading.Lock()
+        self._dropped = {lv: 0 for lv in self._LEVELS}
+        self._counts = {"written": 0, "batches": 0, "block_waits": 0, "block_timeouts": 0, "write_errors": 0}
         self._open_sink()
-        t = threading.Thread(target=self._worker, name=f"{name}-writer", daemon=True)
-        t.start()
+        self._thread = threading.Thread(target=self._worker, name=f"{name}-writer", daemon=True)
+        self._thread.start()
 
     # --------------- basics ---------------
     def _coerce_level(self, s: str) -> int:
-        m = {"debug": 10, "info": 20, "warn": 30, "error": 40}
-        return m.get(s.lower(), 20)
+        return self._LEVELS.get(s.lower(), 20)
 
     def _open_sink(self) -> None:
         if not self._path:
             return
         os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
         self._f = open(self._path, "a", encoding="utf-8")
-
-    def _needs_rotate(self) -> bool:
-        if not self._path or not self._f:
-            return False
-        try:
-            return self._f.tell() >= self._rotate_bytes
-        except Exception:
-            try:
-                return os.path.getsize(self._path) >= self._rotate_bytes
-            except Exception:
-                return False
+        self._bytes = self._f.tell()
 
     def _rotate(self) -> None:
+        # writer thread only, with the pending batch already written
         if not self._path or not self._f:
             return
-        ts = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        ts = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
         rotated = f"{self._path}.{ts}.rotated"
-        # write terminal footer
+        # write terminal footer, it does not move the head
         footer = {"ts": _iso_utc(), "terminal": True, "head": self._head_digest}
-        self._write_line(self._decorate("terminal", footer), raw=True)
+        self._f.write(self._line(self._decorate("terminal", footer)))
         self._f.flush()
+        if self._fsync:
+            os.fsync(self._f.fileno())
+        self._f.close()
         os.replace(self._path, rotated)
         # reopen and write continuation header
         self._f = open(self._path, "a", encoding="utf-8")
         header = {"ts": _iso_utc(), "continued_from": self._head_digest}
         meta = self._decorate("continuation", header)
-        self._write_line(meta, raw=True)
+        line = self._line(meta)
+        self._f.write(line)
+        self._bytes = len(line.encode("utf-8"))
         self._head_digest = meta.get("digest")
 
     def _sign(self, prev: Optional[str], payload: Dict[str, Any]) -> Optional[str]:
@@ -1293,6 +4528,7 @@ class JsonLogger:
         return hmac.new(self._key, s, hashlib.sha256).hexdigest()
 
     def _decorate(self, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        # writer thread only: the head it reads is the one it last applied
         rec = {
             "ts": _iso_utc(),
             "kind": kind,
@@ -1304,39 +4540,160 @@ class JsonLogger:
             rec["digest"] = dg
         return rec
 
-    def _write_line(self, rec: Dict[str, Any], raw: bool = False) -> None:
-        line = json.dumps(rec, separators=(",", ":")) + "\n"
+    @staticmethod
+    def _line(rec: Dict[str, Any]) -> str:
+        return json.dumps(rec, separators=(",", ":")) + "\n"
+
+    def _write_lines(self, lines: List[str]) -> None:
+        if not lines:
+            return
+        buf = "".join(lines)
         if self._f:
-            self._f.write(line)
+            self._f.write(buf)
+            self._f.flush()
             if self._fsync:
-                self._f.flush()
                 os.fsync(self._f.fileno())
+            self._bytes += len(buf.encode("utf-8"))
         elif self._stdout_fallback:
             # stdio fallback
             try:
-                import sys
-                sys.stdout.write(line)
+                sys.stdout.write(buf)
                 sys.stdout.flush()
             except Exception:
                 pass
-        if not raw:
-            # update head only for regular records
-            if "digest" in rec:
-                self._head_digest = rec["digest"]
 
-    def _worker(self) -> None:
-        while not self._stop:
-            rec = self._q.get()
+    def _drain(self, first: Tuple[str, Dict[str, Any], str, Optional[_Ticket]]) -> int:
+        # first plus whatever else is queued, up to batch_max; returns items taken
+        batch = [first]
+        stop = False
+        while len(batch) < self._batch_max:
             try:
-                with self._lock:
-                    if self._needs_rotate():
+                item = self._q.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                stop = True
+                self._q.task_done()
+                break
+            batch.append(item)
+        lines: List[str] = []
+        pending = 0
+        # tickets of the lines not yet written, and of those on disk
+        tickets: List[Tuple[_Ticket, Optional[str]]] = []
+        written: Dict[_Ticket, Optional[str]] = {}
+        n = done = 0
+        with self._lock:
+            # head of what is on disk; the head only moves past records once they are written
+            committed = self._head_digest
+            try:
+                for kind, payload, _level, ticket in batch:
+                    # rotation is decided per record, counting the unwritten part of the batch
+                    if self._path and self._f and self._bytes + pending >= self._rotate_bytes:
+                        self._write_lines(lines)
+                        written.update(tickets)
+                        done, committed = n, self._head_digest
+                        lines, pending, tickets = [], 0, []
                         self._rotate()
-                    self._write_line(rec)
+                        committed = self._head_digest
+                    rec = self._decorate(kind, payload)
+                    line = self._line(rec)
+                    lines.append(line)
+                    pending += len(line.encode("utf-8"))
+                    n += 1
+                    if "digest" in rec:
+                        self._head_digest = rec["digest"]
+                    if ticket is not None:
+                        tickets.append((ticket, rec.get("digest")))
+                self._write_lines(lines)
+                written.update(tickets)
+                done, committed = n, self._head_digest
             except Exception:
-                # swallow logger errors; never crash the host
-                pass
-            finally:
+                # swallow logger errors; never crash the host. the lost records
+                # leave no trace in the chain: the next one links to the last written
+                self._head_digest = committed
+                with self._stats_lock:
+                    self._counts["write_errors"] += 1
+            with self._stats_lock:
+                self._counts["written"] += done
+                self._counts["batches"] += 1
+        # every ticket is released, "" for a record that was not written
+        for _kind, _payload, _level, ticket in batch:
+            if ticket is not None:
+                ticket.digest = written.get(ticket) or ""
+                ticket.done.set()
+        for _ in batch:
+            self._q.task_done()
+        if stop:
+            self._stop = True
+        return len(batch)
+
+    def _worker(self) -> None:
+        while not self._stop:
+            item = self._q.get()
+            if item is None:
                 self._q.task_done()
+                break
+            self._drain(item)
+
+    # --------------- enqueue and overflow ---------------
+    def _count_drop(self, level: str) -> None:
+        with self._stats_lock:
+            self._dropped[level if level in self._dropped else "info"] += 1
+
+    def _evict_oldest(self) -> Optional[Tuple[str, Dict[str, Any], str, Optional[_Ticket]]]:
+        # pop the oldest queued item unless it is the stop request, an append()
+        # record (it has a ticket) or a block_levels record. peek and pop happen
+        # under the queue's own mutex, so the writer cannot take it in between
+        q = self._q
+        with q.mutex:
+            if not q.queue:
+                return None
+            old = q.queue[0]
+            if old is None or old[3] is not None or old[2] in self._block_levels:
+                return None
+            q.queue.popleft()
+            # as get() then task_done(): the item leaves without being written
+            q.unfinished_tasks -= 1
+            if q.unfinished_tasks == 0:
+                q.all_tasks_done.notify_all()
+            q.not_full.notify()
+        return old
+
+    def _enqueue(self, kind: str, payload: Dict[str, Any], level: str,
+                 block: bool = False, ticket: Optional[_Ticket] = None) -> bool:
+        item = (kind, payload, level, ticket)
+        try:
+            self._q.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+        if block or self._overflow == "block" or level in self._block_levels:
+            with self._stats_lock:
+                self._counts["block_waits"] += 1
+            try:
+                self._q.put(item, timeout=self._block_timeout)
+                return True
+            except queue.Full:
+                with self._stats_lock:
+                    self._counts["block_timeouts"] += 1
+                self._count_drop(level)
+                return False
+        if self._overflow == "drop_new":
+            self._count_drop(level)
+            return False
+        # drop_oldest: make room, the evicted record is the one counted. a
+        # record that must not be lost is never evicted, the new one goes instead
+        old = self._evict_oldest()
+        if old is None:
+            self._count_drop(level)
+            return False
+        self._count_drop(old[2])
+        try:
+            self._q.put_nowait(item)
+            return True
+        except queue.Full:
+            self._count_drop(level)
+            return False
 
     # --------------- public api ---------------
     def _emit(self, level: str, msg: str, *, ctx: Optional[Dict[str, Any]] = None, **fields: Any) -> None:
@@ -1359,20 +4716,7 @@ class JsonLogger:
             payload["ctx"] = merged
         if fields:
             payload["fields"] = fields
-        rec = self._decorate("log", payload)
-        try:
-            self._q.put_nowait(rec)
-        except queue.Full:
-            # last resort: drop oldest and insert
-            try:
-                _ = self._q.get_nowait()
-                self._q.task_done()
-            except Exception:
-                pass
-            try:
-                self._q.put_nowait(rec)
-            except Exception:
-                pass
+        self._enqueue("log", payload, level)
 
     def debug(self, msg: str, *, ctx: Optional[Dict[str, Any]] = None, **fields: Any) -> None:
         self._emit("debug", msg, ctx=ctx, **fields)
@@ -1386,6 +4730,22 @@ class JsonLogger:
     def error(self, msg: str, *, ctx: Optional[Dict[str, Any]] = None, **fields: Any) -> None:
         self._emit("error", msg, ctx=ctx, **fields)
 
+    def append(self, kind: str, payload: Dict[str, Any], wait: bool = True,
+               timeout: Optional[float] = None) -> str:
+        """
+        append a record that must not be lost: a full queue blocks up to
+        block_timeout_s instead of dropping. with wait the call returns the digest
+        the writer signed it with, once it is written ("" when unsigned, dropped,
+        or not written within timeout).
+        """
+        ticket = _Ticket() if wait else None
+        if not self._enqueue(kind, payload, "info", block=True, ticket=ticket):
+            return ""
+        if ticket is None:
+            return ""
+        ticket.done.wait(timeout)
+        return ticket.digest or ""
+
     # helpers for common structured events
     def event(self, name: str, **fields: Any) -> None:
         self.info(f"event:{name}", **fields)
@@ -1393,12 +4753,28 @@ class JsonLogger:
     def metric(self, name: str, value: float, **fields: Any) -> None:
         self.info("metric", metric=name, value=float(value), **fields)
 
+    def stats(self) -> Dict[str, Any]:
+        """queue depth, write and batch counts, drops per level and block outcomes."""
+        with self._stats_lock:
+            return {
+                "queued": self._q.qsize(),
+                "overflow": self._overflow,
+                **self._counts,
+                "dropped": dict(self._dropped),
+                "dropped_total": sum(self._dropped.values()),
+            }
+
+    def flush(self) -> None:
+        """wait until every record queued so far is written."""
+        self._q.join()
+
     def stop(self) -> None:
-        self._stop = True
-        try:
-            self._q.join()
-        except Exception:
-            pass
+        if self._stop or not self._thread.is_alive():
+            self._stop = True
+        else:
+            # the stop request queues behind everything already accepted
+            self._q.put(None)
+            self._thread.join()
         if self._f:
             try:
                 self._f.flush()
@@ -1407,25 +4783,6 @@ class JsonLogger:
                 self._f.close()
             except Exception:
                 pass
-class JsonLogger:
-    # ... existing code ...
-
-    def append(self, kind: str, payload: Dict[str, Any]) -> str:
-        """Append a signed record to the log and return its digest (or head)."""
-        rec = self._decorate(kind, payload)
-        try:
-            self._q.put_nowait(rec)
-        except queue.Full:
-            try:
-                _ = self._q.get_nowait(); self._q.task_done()
-            except Exception:
-                pass
-            try:
-                self._q.put_nowait(rec)
-            except Exception:
-                pass
-        # optimistic return; writer will update on disk asynchronously
-        return rec.get("digest", "") or (self._head_digest or "")
 
 
 # pad 0001